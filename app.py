@@ -7,15 +7,21 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_swagger_ui import get_swaggerui_blueprint
 import atexit
+import sys
 
 # Importar configuración
 from config.database import get_database_connection, close_connection
+from config import settings
 
 # Importar utilidades
 from utils.mime_types import configure_mime_types
 from utils.camara import start_capture_thread
 from utils.aws_face_model import AWSFaceModel
 from utils.mqtt_client import MQTTClient
+from utils.mqtt_subscriber import EmbeddedSubscriber
+from utils.event_hub import EventHub
+from utils.change_stream_watcher import ChangeStreamWatcher
+from utils.line_listener import LineProtocolListener
 
 # Importar modelo
 from models.image_model import ImageModel
@@ -23,6 +29,7 @@ from models.image_model import ImageModel
 # Importar controladores
 from controllers.image_controller import ImageController
 from controllers.mqtt_controller import MQTTController
+from controllers.events_controller import EventsController
 
 # Importar vistas
 from views.routes import register_routes
@@ -62,31 +69,94 @@ def create_app():
     # Crear instancia del modelo de detección de rostros
     aws_face_model = AWSFaceModel()
     
-    # Crear instancia del cliente MQTT solo para publicación
+    # Crear instancia del cliente MQTT (publicación y, en modo embebido, suscripción)
     mqtt_client = MQTTClient(
-        broker_host="192.168.45.221",  # Dirección del broker
-        broker_port=1883,              # Puerto TCP estándar
-        client_id="backend_publisher"  # Solo para publicar mensajes
+        broker_host=settings.MQTT_BROKER_HOST,  # Dirección del broker
+        broker_port=settings.MQTT_BROKER_PORT,  # Puerto TCP estándar
+        client_id=settings.MQTT_CLIENT_ID,
+        qos=settings.MQTT_PUBLISH_QOS,
+        buffer_size=settings.MQTT_PUBLISH_BUFFER_SIZE
     )
     
     # Registrar función para cerrar la conexión MQTT al finalizar la aplicación
     atexit.register(mqtt_client.close)
 
-    # Iniciar hilo de captura automática
-    capture_thread = start_capture_thread(
-        image_model=image_model,
-        aws_face_model=aws_face_model,
-        mqtt_client=mqtt_client,
-        interval=20  # Capturar cada 20 segundos
+    # Hub de eventos del feed en vivo (lecturas, predicciones y detecciones)
+    event_hub = EventHub(
+        history_size=settings.EVENTS_HISTORY_SIZE,
+        client_buffer_size=settings.EVENTS_CLIENT_BUFFER_SIZE,
+        max_clients=settings.EVENTS_MAX_CLIENTS
     )
+
+    # Iniciar hilo de captura automática (con change streams las detecciones
+    # llegan al feed desde fs.files, también las de otras instancias)
+    capture_thread = None
+    if settings.CAPTURE_ENABLED:
+        capture_thread = start_capture_thread(
+            image_model=image_model,
+            aws_face_model=aws_face_model,
+            mqtt_client=mqtt_client,
+            interval=20,  # Capturar cada 20 segundos
+            event_hub=None if settings.CHANGE_STREAMS_ENABLED else event_hub
+        )
     app.config['CAPTURE_THREAD'] = capture_thread
 
     # Crear instancias de los controladores
     image_controller = ImageController(image_model)
-    mqtt_controller = MQTTController(db, mqtt_client=mqtt_client)
+    mqtt_controller = MQTTController(db, mqtt_client=mqtt_client, event_hub=event_hub)
+    events_controller = EventsController(event_hub, heartbeat_seconds=settings.EVENTS_HEARTBEAT_SECONDS)
+
+    # Registrar función para guardar los mensajes pendientes de la escritura diferida al finalizar
+    atexit.register(mqtt_controller.flush_writes)
+
+    # Registrar función para detener el trabajador de predicciones al finalizar la aplicación
+    atexit.register(mqtt_controller.prediction_worker.stop)
+
+    # Seguir los cambios de MongoDB para compartir eventos y caché entre instancias
+    if settings.CHANGE_STREAMS_ENABLED:
+        # Con un identificador compartido, los procesos se pisarían el resume token
+        if not settings.CHANGE_STREAM_INSTANCE_ID:
+            print("Error: CHANGE_STREAMS_ENABLED requiere CHANGE_STREAM_INSTANCE_ID, único para cada proceso")
+            sys.exit(1)
+        change_stream_watcher = ChangeStreamWatcher(
+            db,
+            mqtt_controller.change_stream_handlers(),
+            instance_id=settings.CHANGE_STREAM_INSTANCE_ID
+        )
+        change_stream_watcher.start()
+        atexit.register(change_stream_watcher.stop)
+        mqtt_controller.change_stream_watcher = change_stream_watcher
+
+    # En modo embebido el backend se suscribe al broker y guarda los mensajes sin el puente HTTP
+    if settings.MQTT_MODE == "embedded":
+        embedded_subscriber = EmbeddedSubscriber(
+            mqtt_client,
+            mqtt_controller.ingest_message,
+            settings.MQTT_SUBSCRIBE_TOPICS,
+            workers=settings.MQTT_SUBSCRIBER_WORKERS,
+            max_pending=settings.MQTT_SUBSCRIBER_MAX_PENDING
+        )
+        embedded_subscriber.start()
+        atexit.register(embedded_subscriber.stop)
+        mqtt_controller.embedded_subscriber = embedded_subscriber
+
+    # Receptor UDP/TCP de lecturas en line protocol para dispositivos sin MQTT
+    if settings.LINE_LISTENER_ENABLED:
+        line_listener = LineProtocolListener(
+            mqtt_controller.ingest_messages,
+            host=settings.LINE_LISTENER_HOST,
+            udp_port=settings.LINE_LISTENER_UDP_PORT,
+            tcp_port=settings.LINE_LISTENER_TCP_PORT,
+            batch_size=settings.LINE_LISTENER_BATCH_SIZE,
+            batch_interval=settings.LINE_LISTENER_BATCH_INTERVAL,
+            max_pending=settings.LINE_LISTENER_MAX_PENDING
+        )
+        line_listener.start()
+        atexit.register(line_listener.stop)
+        mqtt_controller.line_listener = line_listener
 
     # Registrar rutas
-    register_routes(app, image_controller, mqtt_controller)
+    register_routes(app, image_controller, mqtt_controller, events_controller)
 
     # Configurar Swagger
     swagger_config = get_swagger_config()
@@ -112,15 +182,25 @@ def create_app():
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)
 
     # Registrar información sobre la configuración MQTT
-    app.config['MQTT_INFO'] = {
-        'mode': 'http_bridge',
-        'description': 'El backend recibe mensajes MQTT a través del endpoint HTTP /api/mensaje',
-        'broker': '192.168.45.221:9001 (WebSockets)',
-        'topics': ['sensor/temperatura', 'sistema/notificaciones', 'actuador/ventilador', 'actuador/bombillo']
-    }
-    
-    print("Configuración MQTT: Usando puente HTTP para recibir mensajes MQTT")
-    print("El script mqtt_to_backend.py debe estar en ejecución para recibir mensajes del broker MQTT")
+    if settings.MQTT_MODE == "embedded":
+        app.config['MQTT_INFO'] = {
+            'mode': 'embedded',
+            'description': 'El backend se suscribe directamente al broker MQTT',
+            'broker': f'{settings.MQTT_BROKER_HOST}:{settings.MQTT_BROKER_PORT} (TCP)',
+            'topics': settings.MQTT_SUBSCRIBE_TOPICS
+        }
+
+        print("Configuración MQTT: Suscriptor embebido, no se necesita el puente HTTP")
+    else:
+        app.config['MQTT_INFO'] = {
+            'mode': 'http_bridge',
+            'description': 'El backend recibe mensajes MQTT a través del endpoint HTTP /api/mensaje',
+            'broker': '192.168.45.221:9001 (WebSockets)',
+            'topics': ['sensor/temperatura/#', 'sistema/notificaciones', 'actuador/ventilador', 'actuador/bombillo']
+        }
+
+        print("Configuración MQTT: Usando puente HTTP para recibir mensajes MQTT")
+        print("El script mqtt_to_backend.py debe estar en ejecución para recibir mensajes del broker MQTT")
 
     return app
 
@@ -4,7 +4,7 @@ Este módulo se encarga de cargar las variables de entorno,
 establecer la conexión a MongoDB y configurar GridFS.
 """
 
-from pymongo import MongoClient
+from pymongo import MongoClient, WriteConcern
 import gridfs
 import os
 from dotenv import load_dotenv
@@ -57,6 +57,23 @@ def get_database_connection():
         print(f"Error al conectar a la base de datos: {str(e)}")
         sys.exit(1)
 
+def with_write_concern(collection, write_concern):
+    """
+    Obtiene la colección con el write concern indicado.
+
+    Args:
+        collection: Colección de MongoDB
+        write_concern: "majority", número de nodos ("0", "1", ...) o vacío
+            para usar el del servidor
+
+    Returns:
+        Collection: Colección con el write concern configurado
+    """
+    if not write_concern:
+        return collection
+    w = int(write_concern) if str(write_concern).isdigit() else write_concern
+    return collection.with_options(write_concern=WriteConcern(w=w))
+
 # Función para cerrar la conexión a la base de datos
 def close_connection(client):
     """
@@ -0,0 +1,178 @@
+"""
+Módulo de parámetros de configuración de la aplicación.
+Los valores se leen de las variables de entorno (archivo .env)
+y, si no están definidos, se usan los valores por defecto.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Cargar variables de entorno desde el archivo .env
+load_dotenv()
+
+def _get_str(name, default):
+    return os.getenv(name, default)
+
+def _get_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+def _get_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+def _get_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "si", "on")
+
+# ==================== MQTT ====================
+
+# Modo de recepción de mensajes MQTT: "http_bridge" o "embedded"
+MQTT_MODE = _get_str("MQTT_MODE", "http_bridge")
+MQTT_BROKER_HOST = _get_str("MQTT_BROKER_HOST", "192.168.45.221")
+MQTT_BROKER_PORT = _get_int("MQTT_BROKER_PORT", 1883)
+# Identificador del cliente en el broker: dos procesos con el mismo se desconectan entre sí
+MQTT_CLIENT_ID = _get_str("MQTT_CLIENT_ID", "backend_publisher")
+
+# Tópicos a los que se suscribe el modo embebido
+MQTT_SUBSCRIBE_TOPICS = [
+    topic.strip()
+    for topic in _get_str(
+        "MQTT_SUBSCRIBE_TOPICS",
+        "sensor/temperatura/#,sistema/notificaciones,actuador/ventilador,actuador/bombillo"
+    ).split(",")
+    if topic.strip()
+]
+MQTT_SUBSCRIBER_WORKERS = _get_int("MQTT_SUBSCRIBER_WORKERS", 4)
+MQTT_SUBSCRIBER_MAX_PENDING = _get_int("MQTT_SUBSCRIBER_MAX_PENDING", 1000)
+
+# Publicación en segundo plano: QoS por defecto y mensajes retenidos mientras
+# el broker no está disponible (al llenarse se descartan los más antiguos)
+MQTT_PUBLISH_QOS = _get_int("MQTT_PUBLISH_QOS", 0)
+MQTT_PUBLISH_BUFFER_SIZE = _get_int("MQTT_PUBLISH_BUFFER_SIZE", 1000)
+
+# Receptor UDP/TCP de lecturas en line protocol para dispositivos sin MQTT
+# (puerto 0 = desactivado). Las lecturas se guardan por lotes de BATCH_SIZE o
+# cada BATCH_INTERVAL segundos; con MAX_PENDING lecturas en cola se descartan
+LINE_LISTENER_ENABLED = _get_bool("LINE_LISTENER_ENABLED", False)
+LINE_LISTENER_HOST = _get_str("LINE_LISTENER_HOST", "0.0.0.0")
+LINE_LISTENER_UDP_PORT = _get_int("LINE_LISTENER_UDP_PORT", 8094)
+LINE_LISTENER_TCP_PORT = _get_int("LINE_LISTENER_TCP_PORT", 8094)
+LINE_LISTENER_BATCH_SIZE = _get_int("LINE_LISTENER_BATCH_SIZE", 500)
+LINE_LISTENER_BATCH_INTERVAL = _get_float("LINE_LISTENER_BATCH_INTERVAL", 0.5)
+LINE_LISTENER_MAX_PENDING = _get_int("LINE_LISTENER_MAX_PENDING", 10000)
+
+# Reenvío de temperaturas a sistema/notificaciones: "all" (cada lectura),
+# "every_n" (una de cada N), "delta" (cambio de al menos DELTA grados) o
+# "interval" (como mucho una cada INTERVAL segundos). Los mensajes que
+# resumen varias lecturas incluyen min, max, avg y count
+REPUBLISH_MODE = _get_str("REPUBLISH_MODE", "all")
+REPUBLISH_EVERY_N = _get_int("REPUBLISH_EVERY_N", 10)
+REPUBLISH_DELTA = _get_float("REPUBLISH_DELTA", 0.5)
+REPUBLISH_INTERVAL_SECONDS = _get_float("REPUBLISH_INTERVAL_SECONDS", 60)
+
+# ==================== ALMACENAMIENTO ====================
+
+# Almacenamiento de las lecturas de temperatura: "documents" (mqtt_messages) o
+# "timeseries" (colección de series temporales sensor_readings, MongoDB 5.0+)
+SENSOR_STORAGE_MODE = _get_str("SENSOR_STORAGE_MODE", "documents")
+# Retención de las lecturas en modo timeseries (0 = sin expiración)
+SENSOR_TIMESERIES_EXPIRE_SECONDS = _get_int("SENSOR_TIMESERIES_EXPIRE_SECONDS", 0)
+
+# Escritura diferida de los mensajes: se agrupan y se guardan con insert_many
+# no ordenado cada MAX_DOCUMENTS documentos o MAX_DELAY_MS milisegundos. Con
+# MAX_PENDING documentos sin guardar el llamador espera a que se escriban
+WRITE_BEHIND_ENABLED = _get_bool("WRITE_BEHIND_ENABLED", False)
+WRITE_BEHIND_MAX_DOCUMENTS = _get_int("WRITE_BEHIND_MAX_DOCUMENTS", 500)
+WRITE_BEHIND_MAX_DELAY_MS = _get_int("WRITE_BEHIND_MAX_DELAY_MS", 200)
+WRITE_BEHIND_MAX_PENDING = _get_int("WRITE_BEHIND_MAX_PENDING", 50000)
+
+# Write concern de las inserciones por colección: "majority", número de nodos
+# ("0" sin confirmación, "1" solo el primario) o vacío para el del servidor
+WRITE_CONCERN_MESSAGES = _get_str("WRITE_CONCERN_MESSAGES", "1")
+WRITE_CONCERN_PREDICTIONS = _get_str("WRITE_CONCERN_PREDICTIONS", "majority")
+
+# Segundos entre sincronizaciones de las estadísticas de /api/mqtt/status desde MongoDB
+STATUS_REFRESH_SECONDS = _get_int("STATUS_REFRESH_SECONDS", 30)
+# Segundos entre escrituras de los contadores acumulados en memoria
+STATUS_FLUSH_SECONDS = _get_float("STATUS_FLUSH_SECONDS", 1.0)
+
+# ==================== PREDICCIONES ====================
+
+# Segundos tras los cuales una ventana reclamada y no completada puede reclamarse de nuevo
+PREDICTION_CLAIM_LEASE_SECONDS = _get_int("PREDICTION_CLAIM_LEASE_SECONDS", 300)
+
+# Hilos del trabajador de predicciones y trabajos terminados que se conservan
+PREDICTION_WORKERS = _get_int("PREDICTION_WORKERS", 1)
+PREDICTION_JOB_HISTORY = _get_int("PREDICTION_JOB_HISTORY", 100)
+
+# Modo de ventana de predicción: "tumbling" (bloques de 60 sin solape) o "sliding"
+PREDICTION_WINDOW_MODE = _get_str("PREDICTION_WINDOW_MODE", "tumbling")
+# Lecturas nuevas entre predicciones en modo deslizante
+PREDICTION_STRIDE = _get_int("PREDICTION_STRIDE", 10)
+# Cadencia propia de algunos flujos: "ubicacion/sensor:stride,..." (p. ej. "invernadero1/s1:5")
+PREDICTION_STREAM_STRIDES = {
+    key.strip(): int(value)
+    for key, _, value in (
+        item.rpartition(":") for item in _get_str("PREDICTION_STREAM_STRIDES", "").split(",")
+    )
+    if key.strip() and value.strip()
+}
+
+# Caché de predicciones: ventanas iguales a la precisión indicada reutilizan la predicción
+PREDICTION_CACHE_ENABLED = _get_bool("PREDICTION_CACHE_ENABLED", True)
+PREDICTION_CACHE_SIZE = _get_int("PREDICTION_CACHE_SIZE", 256)
+PREDICTION_CACHE_TTL_SECONDS = _get_int("PREDICTION_CACHE_TTL_SECONDS", 3600)
+PREDICTION_CACHE_PRECISION = _get_int("PREDICTION_CACHE_PRECISION", 1)
+
+# Guardar las ventanas de las predicciones empaquetadas (float32 e IDs de 12 bytes), sin la
+# respuesta cruda del modelo en las predicciones exitosas
+PREDICTION_COMPACT_STORAGE = _get_bool("PREDICTION_COMPACT_STORAGE", True)
+
+# Motor de pronóstico: "remote" (AWS), "local", "fallback" (AWS y local si falla) o "shadow"
+FORECAST_MODE = _get_str("FORECAST_MODE", "remote")
+# Método del motor local: linear, ar, holt o ensemble
+LOCAL_FORECAST_METHOD = _get_str("LOCAL_FORECAST_METHOD", "ensemble")
+LOCAL_FORECAST_HORIZON = _get_int("LOCAL_FORECAST_HORIZON", 1)
+
+# ==================== MODELOS REMOTOS ====================
+
+# Timeouts (segundos), reintentos y pool de conexiones de las llamadas a los modelos de AWS
+REMOTE_CONNECT_TIMEOUT = _get_float("REMOTE_CONNECT_TIMEOUT", 3.05)
+REMOTE_READ_TIMEOUT = _get_float("REMOTE_READ_TIMEOUT", 15)
+REMOTE_MAX_RETRIES = _get_int("REMOTE_MAX_RETRIES", 2)
+REMOTE_BACKOFF_BASE = _get_float("REMOTE_BACKOFF_BASE", 0.5)
+REMOTE_BACKOFF_MAX = _get_float("REMOTE_BACKOFF_MAX", 8)
+REMOTE_POOL_SIZE = _get_int("REMOTE_POOL_SIZE", 10)
+
+# Circuit breaker: fallos consecutivos para abrir y segundos hasta probar de nuevo
+BREAKER_FAILURE_THRESHOLD = _get_int("BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RECOVERY_SECONDS = _get_float("BREAKER_RECOVERY_SECONDS", 30)
+
+# Hedging de la detección de rostros: copia de la solicitud si no responde antes del percentil indicado
+FACE_HEDGING_ENABLED = _get_bool("FACE_HEDGING_ENABLED", False)
+FACE_HEDGING_PERCENTILE = _get_float("FACE_HEDGING_PERCENTILE", 95)
+FACE_HEDGING_INITIAL_DELAY = _get_float("FACE_HEDGING_INITIAL_DELAY", 2.0)
+FACE_HEDGING_MAX_RATIO = _get_float("FACE_HEDGING_MAX_RATIO", 0.1)
+
+# Captura periódica de la ESP32-CAM con detección de rostros en AWS
+CAPTURE_ENABLED = _get_bool("CAPTURE_ENABLED", True)
+
+# ==================== EVENTOS EN VIVO ====================
+
+# Feed SSE (/api/eventos): eventos conservados para reanudar con Last-Event-ID,
+# eventos pendientes por cliente, clientes máximos y segundos entre keepalives
+EVENTS_HISTORY_SIZE = _get_int("EVENTS_HISTORY_SIZE", 1000)
+EVENTS_CLIENT_BUFFER_SIZE = _get_int("EVENTS_CLIENT_BUFFER_SIZE", 256)
+EVENTS_MAX_CLIENTS = _get_int("EVENTS_MAX_CLIENTS", 100)
+EVENTS_HEARTBEAT_SECONDS = _get_int("EVENTS_HEARTBEAT_SECONDS", 15)
+
+# Change streams de MongoDB (requiere replica set): cada instancia recibe los
+# eventos y las invalidaciones de caché de todas. El identificador de la
+# instancia separa sus resume tokens; debe ser estable entre reinicios y
+# distinto en cada proceso (también entre los workers de un mismo host), por
+# lo que es obligatorio al activar los change streams
+CHANGE_STREAMS_ENABLED = _get_bool("CHANGE_STREAMS_ENABLED", False)
+CHANGE_STREAM_INSTANCE_ID = _get_str("CHANGE_STREAM_INSTANCE_ID", "")
@@ -0,0 +1,115 @@
+"""
+Controlador para el feed de eventos en vivo (Server-Sent Events).
+"""
+
+from flask import request, jsonify, Response
+import json
+import logging
+
+logger = logging.getLogger("events_controller")
+
+# Tipos de evento que publica el backend
+EVENT_TYPES = ("mensaje", "prediccion", "deteccion")
+
+class EventsController:
+    """
+    Controlador que entrega los eventos del hub a los clientes por SSE.
+    """
+
+    def __init__(self, event_hub, heartbeat_seconds=15):
+        """
+        Inicializa el controlador.
+
+        Args:
+            event_hub: Instancia de EventHub
+            heartbeat_seconds: Segundos entre comentarios de keepalive
+        """
+        self.event_hub = event_hub
+        self.heartbeat_seconds = heartbeat_seconds
+
+    @staticmethod
+    def _format_event(event_type, data, event_id=None):
+        """
+        Da formato SSE a un evento.
+
+        Returns:
+            str: Evento con las líneas id, event y data
+        """
+        lines = []
+        if event_id:
+            lines.append(f"id: {event_id}")
+        lines.append(f"event: {event_type}")
+        lines.append(f"data: {json.dumps(data, default=str)}")
+        return "\n".join(lines) + "\n\n"
+
+    def stream_events(self):
+        """
+        Maneja la solicitud del feed de eventos en vivo.
+
+        Parámetros:
+            types: Tipos separados por comas (mensaje, prediccion, deteccion)
+            last_event_id: Alternativa a la cabecera Last-Event-ID
+
+        Returns:
+            Response: Flujo text/event-stream, o (response, status_code) si hay error
+        """
+        types = None
+        if request.args.get('types'):
+            types = {t.strip() for t in request.args['types'].split(',') if t.strip()}
+            invalid = types - set(EVENT_TYPES)
+            if invalid:
+                return jsonify({
+                    "status": "error",
+                    "message": f"Tipos de evento inválidos: {', '.join(sorted(invalid))}. Use {', '.join(EVENT_TYPES)}"
+                }), 400
+
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscription, resumed = self.event_hub.subscribe(last_event_id=last_event_id, types=types)
+        if subscription is None:
+            return jsonify({
+                "status": "error",
+                "message": "Se alcanzó el número máximo de clientes del feed de eventos"
+            }), 503
+
+        def generate():
+            try:
+                # Tiempo de reconexión sugerido al navegador
+                yield "retry: 3000\n\n"
+
+                # El cliente perdió eventos que ya no se pueden reenviar: debe recargar por REST
+                if last_event_id and not resumed:
+                    yield self._format_event("reset", {"reason": "last_event_id_unavailable"})
+
+                while not subscription.closed:
+                    events, dropped = subscription.get(timeout=self.heartbeat_seconds)
+                    if dropped:
+                        yield self._format_event("lagged", {"dropped": dropped})
+                    if not events:
+                        yield ": keepalive\n\n"
+                        continue
+                    for event in events:
+                        yield self._format_event(event["type"], event["data"], event["id"])
+            finally:
+                self.event_hub.unsubscribe(subscription)
+                logger.info("Cliente desconectado del feed de eventos")
+
+        return Response(
+            generate(),
+            mimetype="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"
+            }
+        )
+
+    def get_stats(self):
+        """
+        Maneja la solicitud de estadísticas del feed de eventos.
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        return jsonify({
+            "status": "success",
+            "events": self.event_hub.get_stats()
+        }), 200
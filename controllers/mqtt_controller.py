@@ -5,8 +5,28 @@ Controlador para manejar los mensajes recibidos del cliente MQTT.
 from flask import request, jsonify
 import datetime
 import logging
+import uuid
+from pymongo.errors import BulkWriteError
 from utils.aws_model import AWSModel
+from utils.temperature_window import TemperatureWindow
+from utils.prediction_worker import PredictionWorker
+from utils.prediction_cache import PredictionCache
+from utils.republish_policy import RepublishPolicy
+from utils.local_forecast import LocalForecastModel
+from utils.http_client import get_http_clients_stats
+from utils.window_codec import pack_values, unpack_values, encode_values, pack_ids, unpack_ids
+from utils.write_buffer import WriteBehindBuffer
+from utils.message_codecs import message_format, decode_messages, UnsupportedFormatError
+from bson.binary import Binary
+from models.temperature_rollup_model import TemperatureRollupModel, GRANULARITIES, GRANULARITY_STEPS
+from models.mqtt_stats_model import MQTTStatsModel
+from models.sensor_reading_model import (
+    create_sensor_reading_model, is_temperature_topic, parse_temperature_message,
+    stream_key, split_stream_key, DEFAULT_STREAM
+)
 import threading
+from config import settings
+from config.database import with_write_concern
 
 # Configurar logging
 logging.basicConfig(
@@ -15,12 +35,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mqtt_controller")
 
+# Número máximo de mensajes aceptados en un lote
+MAX_BATCH_SIZE = 5000
+
+# Número de lecturas de temperatura que requiere el modelo
+TEMPERATURE_WINDOW_SIZE = 60
+
+# Intervalos por defecto de /api/temperaturas/stats para cada granularidad
+DEFAULT_STATS_BUCKETS = {"minute": 60, "hour": 24, "day": 30}
+
 class MQTTController:
     """
     Controlador para manejar los mensajes recibidos del cliente MQTT.
     """
 
-    def __init__(self, db, api_url=None, api_key=None, mqtt_client=None):
+    def __init__(self, db, api_url=None, api_key=None, mqtt_client=None, event_hub=None):
         """
         Inicializa el controlador con la base de datos y la conexión al modelo AWS.
 
@@ -29,6 +58,7 @@ class MQTTController:
             api_url: URL de la API de AWS (opcional)
             api_key: Clave de la API de AWS (opcional)
             mqtt_client: Cliente MQTT para enviar alertas (opcional)
+            event_hub: Hub de eventos del feed en vivo (opcional)
         """
         self.db = db
         # Crear colección para los mensajes MQTT si no existe
@@ -39,14 +69,133 @@ class MQTTController:
         if "predicciones" not in self.db.list_collection_names():
             self.db.create_collection("predicciones")
 
+        # Índice para listar las predicciones de cada flujo por fecha
+        self.db.predicciones.create_index([("stream", 1), ("timestamp", -1)])
+
+        # Write concern por colección para las inserciones: relajado para los
+        # mensajes crudos y más estricto para las predicciones
+        self.messages = with_write_concern(self.db.mqtt_messages, settings.WRITE_CONCERN_MESSAGES)
+        self.predictions = with_write_concern(self.db.predicciones, settings.WRITE_CONCERN_PREDICTIONS)
+
         # Inicializar el modelo de AWS
         self.aws_model = AWSModel(api_url, api_key)
+
+        # Motor local de pronóstico: principal, respaldo o sombra según FORECAST_MODE
+        self.forecast_mode = settings.FORECAST_MODE
+        self.local_model = None
+        if self.forecast_mode != "remote":
+            self.local_model = LocalForecastModel(
+                method=settings.LOCAL_FORECAST_METHOD,
+                horizon=settings.LOCAL_FORECAST_HORIZON
+            )
         
         # Cliente MQTT para enviar alertas
         self.mqtt_client = mqtt_client
 
+        # Qué lecturas de temperatura se reenvían a sistema/notificaciones
+        self.republish_policy = RepublishPolicy(
+            mode=settings.REPUBLISH_MODE,
+            every_n=settings.REPUBLISH_EVERY_N,
+            delta=settings.REPUBLISH_DELTA,
+            interval_seconds=settings.REPUBLISH_INTERVAL_SECONDS
+        )
+
+        # Hub de eventos para el feed en vivo (SSE). Con change streams los eventos de
+        # lo que se guarda en MongoDB llegan desde el observador (de todas las instancias)
+        self.event_hub = event_hub
+        self.change_streams_enabled = settings.CHANGE_STREAMS_ENABLED
+        # Marca de los documentos escritos por este proceso, para distinguir sus propios cambios
+        self.writer_id = uuid.uuid4().hex
+
+        # Observador de change streams (solo si está activo, se asigna desde app.py)
+        self.change_stream_watcher = None
+
+        # Suscriptor embebido (solo en modo embedded, se asigna desde app.py)
+        self.embedded_subscriber = None
+
+        # Receptor UDP/TCP de line protocol (solo si está activo, se asigna desde app.py)
+        self.line_listener = None
+
+        # Agregados incrementales de temperatura por minuto, hora y día
+        self.rollup_model = TemperatureRollupModel(self.db)
+
+        # Estadísticas de /api/mqtt/status mantenidas a medida que se escribe
+        self.stats_model = MQTTStatsModel(
+            self.db,
+            refresh_seconds=settings.STATUS_REFRESH_SECONDS,
+            flush_seconds=settings.STATUS_FLUSH_SECONDS
+        )
+
+        # Almacenamiento de las lecturas de temperatura (mqtt_messages o serie temporal)
+        self.reading_model = create_sensor_reading_model(
+            self.db,
+            storage_mode=settings.SENSOR_STORAGE_MODE,
+            expire_after_seconds=settings.SENSOR_TIMESERIES_EXPIRE_SECONDS,
+            write_concern=settings.WRITE_CONCERN_MESSAGES
+        )
+
+        # Escritura diferida: los mensajes se agrupan y se guardan por lotes en segundo plano
+        self.message_buffer = None
+        self.reading_buffer = None
+        if settings.WRITE_BEHIND_ENABLED:
+            buffer_options = {
+                "max_documents": settings.WRITE_BEHIND_MAX_DOCUMENTS,
+                "max_delay_ms": settings.WRITE_BEHIND_MAX_DELAY_MS,
+                "max_pending": settings.WRITE_BEHIND_MAX_PENDING
+            }
+            # Las estadísticas y los agregados se actualizan al guardar cada lote
+            self.message_buffer = WriteBehindBuffer(
+                self._insert_messages, name="messages", on_written=self._record_stored, **buffer_options
+            )
+            self.reading_buffer = WriteBehindBuffer(
+                self.reading_model.insert, name="readings", on_written=self._record_stored, **buffer_options
+            )
+
+        # Una ventana en memoria de temperaturas pendientes por flujo (ubicación/sensor),
+        # sembradas desde MongoDB. En modo deslizante se emite una ventana cada
+        # PREDICTION_STRIDE lecturas nuevas (o el valor de PREDICTION_STREAM_STRIDES del flujo)
+        self.temperature_windows = {}
+        self._windows_lock = threading.Lock()
+        self._seed_temperature_windows()
+
+        # Caché de predicciones para no repetir llamadas al modelo con ventanas idénticas
+        self.prediction_cache = None
+        if settings.PREDICTION_CACHE_ENABLED:
+            self.prediction_cache = PredictionCache(
+                max_entries=settings.PREDICTION_CACHE_SIZE,
+                ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+                precision=settings.PREDICTION_CACHE_PRECISION
+            )
+
+        # Trabajador en segundo plano para no bloquear las solicitudes con el modelo AWS
+        self.prediction_worker = PredictionWorker(
+            workers=settings.PREDICTION_WORKERS,
+            history_size=settings.PREDICTION_JOB_HISTORY
+        )
+
         logger.info("Controlador MQTT inicializado")
 
+    @staticmethod
+    def _read_payload():
+        """
+        Obtiene el cuerpo de la solicitud según su Content-Type.
+
+        Además de JSON se aceptan MessagePack, CBOR (uno o varios frames
+        concatenados) y line protocol (una lectura por línea).
+
+        Returns:
+            tuple: (data, format_name) donde data es el JSON recibido o, en
+                los demás formatos, la lista de mensajes decodificados
+
+        Raises:
+            UnsupportedFormatError: Si el Content-Type no es aceptado
+            ValueError: Si el cuerpo no se puede decodificar
+        """
+        format_name = message_format(request.content_type)
+        if format_name == "json":
+            return request.get_json(), format_name
+        return decode_messages(format_name, request.get_data()), format_name
+
     def receive_message(self):
         """
         Maneja la solicitud para recibir un mensaje MQTT a través del endpoint HTTP.
@@ -56,7 +205,23 @@ class MQTTController:
         """
         try:
             # Obtener datos de la solicitud
-            data = request.get_json()
+            try:
+                data, format_name = self._read_payload()
+            except UnsupportedFormatError as e:
+                return jsonify({"status": "error", "message": str(e)}), 415
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+
+            # Los formatos binarios y de texto deben contener un único mensaje
+            if format_name != "json":
+                if len(data) > 1:
+                    return jsonify({
+                        "status": "error",
+                        "message": "Se recibió más de un mensaje, use /api/mensajes/batch para lotes"
+                    }), 400
+                data = data[0] if data else None
+                if isinstance(data, ValueError):
+                    return jsonify({"status": "error", "message": str(data)}), 400
 
             if not data:
                 return jsonify({
@@ -65,75 +230,25 @@ class MQTTController:
                 }), 400
 
             # Validar datos
-            if "topic" not in data or "valor" not in data:
+            if not isinstance(data, dict) or "topic" not in data or "valor" not in data:
                 return jsonify({
                     "status": "error",
                     "message": "Se requieren los campos 'topic' y 'valor'"
                 }), 400
 
-            # Crear documento para guardar en la base de datos
-            document = {
-                "topic": data["topic"],
-                "valor": data["valor"],
-                "timestamp": datetime.datetime.now(datetime.timezone.utc),
-                "source": "http_endpoint"
-            }
-
-            # Si el topic es sensor/temperatura, procesar el valor
-            if data["topic"] == "sensor/temperatura":
-                try:
-                    # El valor puede ser una cadena o un número
-                    if isinstance(data["valor"], str):
-                        temperatura = float(data["valor"])
-                    else:
-                        temperatura = float(data["valor"])
-                    
-                    # Obtener fecha y hora actual
-                    now = datetime.datetime.now()
-                    current_date = now.strftime("%Y-%m-%d")
-                    current_time = now.strftime("%H:%M:%S")
-                    
-                    # Crear el nuevo formato de mensaje
-                    transformed_message = {
-                        "sensor": "sensor",
-                        "date": current_date,
-                        "time": current_time,
-                        "location": "ia",
-                        "value": str(temperatura),
-                        "isNew": "true"
-                    }
-                    
-                    # Guardar el mensaje transformado en el documento
-                    document["valor_original"] = data["valor"]
-                    document["valor_transformado"] = transformed_message
-                    document["valor"] = temperatura
-                    
-                    # Enviar el mensaje transformado al tópico sistema/notificaciones
-                    if self.mqtt_client:
-                        self.mqtt_client.publish(
-                            topic="sistema/notificaciones",
-                            message=transformed_message
-                        )
-                        logger.info(f"Mensaje transformado enviado a sistema/notificaciones: {transformed_message}")
-                    
-                except ValueError as e:
-                    logger.warning(f"Error al procesar el valor de temperatura: {str(e)}")
-                    document["error_procesamiento"] = str(e)
-
-            # Guardar en la base de datos
-            result = self.db.mqtt_messages.insert_one(document)
+            if not isinstance(data["topic"], str) or not data["topic"]:
+                return jsonify({
+                    "status": "error",
+                    "message": "El campo 'topic' debe ser una cadena no vacía"
+                }), 400
 
-            # Registrar en el log
-            logger.info(f"Mensaje MQTT recibido y guardado: {data['topic']} -> {data['valor']}")
-            
-            # Verificar si hay suficientes datos de temperatura para procesar
-            if data["topic"] == "sensor/temperatura":
-                self._check_and_process_temperatures()
+            # Guardar y procesar el mensaje
+            inserted_id = self.ingest_message(data["topic"], data["valor"])
 
             return jsonify({
                 "status": "success",
                 "message": "Mensaje recibido y guardado correctamente",
-                "document_id": str(result.inserted_id)
+                "document_id": str(inserted_id)
             }), 201
 
         except Exception as e:
@@ -143,6 +258,482 @@ class MQTTController:
                 "message": f"Error al procesar mensaje: {str(e)}"
             }), 500
 
+    def receive_messages_batch(self):
+        """
+        Maneja la solicitud para recibir un lote de mensajes MQTT a través del endpoint HTTP.
+
+        Acepta una lista de objetos {topic, valor} o un objeto {"mensajes": [...]},
+        en JSON, MessagePack o CBOR (también varios frames concatenados), o
+        una lectura por línea en line protocol. Los mensajes válidos se
+        guardan con una única escritura no ordenada.
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            # Obtener datos de la solicitud
+            try:
+                data, format_name = self._read_payload()
+            except UnsupportedFormatError as e:
+                return jsonify({"status": "error", "message": str(e)}), 415
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+
+            if isinstance(data, dict):
+                data = data.get("mensajes")
+
+            if not isinstance(data, list) or not data:
+                return jsonify({
+                    "status": "error",
+                    "message": "Se requiere una lista no vacía de mensajes"
+                }), 400
+
+            if len(data) > MAX_BATCH_SIZE:
+                return jsonify({
+                    "status": "error",
+                    "message": f"El lote excede el máximo de {MAX_BATCH_SIZE} mensajes"
+                }), 413
+
+            # Separar mensajes válidos e inválidos
+            messages = []
+            rejected = []
+            for index, item in enumerate(data):
+                # Línea del line protocol que no se pudo interpretar
+                if isinstance(item, ValueError):
+                    rejected.append({"index": index, "message": str(item)})
+                    continue
+                if not isinstance(item, dict) or "topic" not in item or "valor" not in item:
+                    rejected.append({
+                        "index": index,
+                        "message": "Se requieren los campos 'topic' y 'valor'"
+                    })
+                    continue
+                if not isinstance(item["topic"], str) or not item["topic"]:
+                    rejected.append({
+                        "index": index,
+                        "message": "El campo 'topic' debe ser una cadena no vacía"
+                    })
+                    continue
+                messages.append((item["topic"], item["valor"]))
+
+            if not messages:
+                return jsonify({
+                    "status": "error",
+                    "message": "Ningún mensaje del lote es válido",
+                    "rejected": rejected
+                }), 400
+
+            # Guardar y procesar los mensajes
+            inserted_ids, write_errors = self.ingest_messages(messages)
+
+            return jsonify({
+                "status": "success" if not write_errors and not rejected else "partial",
+                "message": f"{len(inserted_ids)} de {len(data)} mensajes guardados correctamente",
+                "inserted": len(inserted_ids),
+                "rejected": rejected,
+                "write_errors": write_errors
+            }), 201
+
+        except Exception as e:
+            logger.error(f"Error al procesar lote de mensajes MQTT: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error al procesar lote de mensajes: {str(e)}"
+            }), 500
+
+    def ingest_message(self, topic, valor, source="http_endpoint"):
+        """
+        Guarda un mensaje MQTT y ejecuta el procesamiento asociado a su tópico.
+
+        No depende del contexto de la solicitud Flask.
+
+        Args:
+            topic: Tópico MQTT del mensaje
+            valor: Valor recibido
+            source: Origen del mensaje
+
+        Returns:
+            ObjectId: ID del documento guardado
+        """
+        document, transformed_message = self._build_message_document(topic, valor, source)
+
+        # Guardar en la base de datos; las temperaturas van al modelo de lecturas
+        if self.message_buffer:
+            buffer = self.reading_buffer if transformed_message is not None else self.message_buffer
+            inserted_id = buffer.add([document])[0]
+        elif transformed_message is not None:
+            inserted_id = self.reading_model.insert_one(document)
+        else:
+            inserted_id = self.messages.insert_one(document).inserted_id
+
+        # Registrar en el log
+        logger.info(f"Mensaje MQTT recibido y guardado: {topic} -> {valor}")
+
+        self._after_ingest([(document, transformed_message)])
+
+        return inserted_id
+
+    def ingest_messages(self, messages, source="http_endpoint"):
+        """
+        Guarda un lote de mensajes MQTT con insert_many no ordenado y ejecuta
+        el procesamiento asociado una sola vez para todo el lote.
+
+        Con la escritura diferida activa los mensajes se encolan y los errores
+        de escritura solo se registran en el log.
+
+        Args:
+            messages: Lista de tuplas (topic, valor)
+            source: Origen de los mensajes
+
+        Returns:
+            tuple: (inserted_ids, write_errors) donde:
+                - inserted_ids: Lista de IDs de los documentos guardados
+                - write_errors: Lista de errores de escritura por índice
+        """
+        built = [self._build_message_document(topic, valor, source) for topic, valor in messages]
+
+        # Las temperaturas van al modelo de lecturas y el resto a mqtt_messages
+        reading_indexes = [index for index, (_, transformed) in enumerate(built) if transformed is not None]
+        other_indexes = [index for index, (_, transformed) in enumerate(built) if transformed is None]
+
+        # Con ordered=False el resto del lote se escribe aunque fallen algunos documentos
+        write_errors = []
+        if self.message_buffer:
+            if reading_indexes:
+                self.reading_buffer.add([built[index][0] for index in reading_indexes])
+            if other_indexes:
+                self.message_buffer.add([built[index][0] for index in other_indexes])
+        else:
+            if reading_indexes:
+                errors = self.reading_model.insert([built[index][0] for index in reading_indexes])
+                write_errors.extend(dict(error, index=reading_indexes[error["index"]]) for error in errors)
+            if other_indexes:
+                errors = self._insert_messages([built[index][0] for index in other_indexes])
+                write_errors.extend(dict(error, index=other_indexes[error["index"]]) for error in errors)
+
+        failed = {error["index"] for error in write_errors}
+        write_errors.sort(key=lambda error: error["index"])
+        stored = [item for index, item in enumerate(built) if index not in failed]
+        inserted_ids = [document["_id"] for document, _ in stored]
+
+        logger.info(f"Lote de {len(inserted_ids)} mensajes MQTT guardado")
+
+        self._after_ingest(stored)
+
+        return inserted_ids, write_errors
+
+    def _insert_messages(self, documents):
+        """
+        Guarda mensajes en mqtt_messages con insert_many no ordenado.
+
+        Args:
+            documents: Lista de documentos
+
+        Returns:
+            list: Errores de escritura por índice (vacía si todo se guardó)
+        """
+        try:
+            self.messages.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            return [
+                {"index": error["index"], "message": error.get("errmsg")}
+                for error in e.details.get("writeErrors", [])
+            ]
+        return []
+
+    def flush_writes(self):
+        """
+        Guarda los mensajes pendientes de la escritura diferida y detiene sus hilos.
+        """
+        for buffer in (self.reading_buffer, self.message_buffer):
+            if buffer:
+                buffer.close()
+        # Después de los buffers: sus últimos lotes también suman a los contadores
+        self.stats_model.close()
+
+    def _build_message_document(self, topic, valor, source):
+        """
+        Construye el documento a guardar para un mensaje MQTT.
+
+        Args:
+            topic: Tópico MQTT del mensaje
+            valor: Valor recibido
+            source: Origen del mensaje
+
+        Returns:
+            tuple: (document, transformed_message) donde transformed_message es
+                None si el mensaje no es una temperatura válida
+        """
+        # Crear documento para guardar en la base de datos
+        document = {
+            "topic": topic,
+            "valor": valor,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc),
+            "source": source
+        }
+        self._tag_writer(document)
+        transformed_message = None
+
+        # Si el topic es sensor/temperatura (o un subtópico), procesar el valor
+        if is_temperature_topic(topic):
+            try:
+                # El valor puede ser una cadena, un número o un objeto con sensor y ubicación
+                temperatura, sensor, location = parse_temperature_message(topic, valor)
+
+                # Obtener fecha y hora actual
+                now = datetime.datetime.now()
+                current_date = now.strftime("%Y-%m-%d")
+                current_time = now.strftime("%H:%M:%S")
+
+                # Crear el nuevo formato de mensaje
+                transformed_message = {
+                    "sensor": sensor,
+                    "date": current_date,
+                    "time": current_time,
+                    "location": location,
+                    "value": str(temperatura),
+                    "isNew": "true"
+                }
+
+                # Guardar el mensaje transformado en el documento
+                document["valor_original"] = valor
+                document["valor_transformado"] = transformed_message
+                document["valor"] = temperatura
+                document["stream"] = stream_key(location, sensor)
+                document["processed"] = False
+
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Error al procesar el valor de temperatura: {str(e)}")
+                document["error_procesamiento"] = str(e)
+
+        return document, transformed_message
+
+    def _after_ingest(self, stored):
+        """
+        Ejecuta el procesamiento posterior al guardado de uno o varios mensajes.
+
+        Args:
+            stored: Lista de tuplas (document, transformed_message) ya guardadas
+        """
+        # Con escritura diferida las estadísticas y los agregados se actualizan al guardar el lote
+        if not self.message_buffer:
+            self._record_stored([document for document, _ in stored])
+
+        # Publicar los mensajes en el feed en vivo
+        in_messages = self.reading_model.storage_mode == "documents"
+        for document, transformed_message in stored:
+            self._publish_message_event(document, local=transformed_message is not None and not in_messages)
+
+        for document, transformed_message in stored:
+            if transformed_message is None:
+                continue
+
+            # Enviar el mensaje transformado al tópico sistema/notificaciones según la política de reenvío
+            if self.mqtt_client:
+                notification = self.republish_policy.offer(document["stream"], document["valor"], transformed_message)
+                if notification is not None:
+                    self.mqtt_client.publish(
+                        topic="sistema/notificaciones",
+                        message=notification
+                    )
+                    logger.info(f"Mensaje transformado enviado a sistema/notificaciones: {notification}")
+
+            # Agregar la lectura a la ventana de su flujo y verificar si hay suficientes datos para procesar
+            stream = document["stream"]
+            self._get_window(stream).append(document["_id"], document["valor"])
+            self._check_and_process_temperatures(stream)
+
+    def _record_stored(self, documents):
+        """
+        Actualiza los contadores del estado MQTT y los agregados de temperatura de mensajes guardados.
+
+        Args:
+            documents: Lista de documentos guardados
+        """
+        try:
+            self.stats_model.record_messages(documents)
+        except Exception as e:
+            logger.error(f"Error al actualizar las estadísticas MQTT: {str(e)}")
+
+        # Actualizar los agregados de temperatura con una sola escritura por intervalo
+        readings = [
+            (document["timestamp"], document["valor"])
+            for document in documents
+            if "valor_transformado" in document
+        ]
+        if readings:
+            try:
+                self.rollup_model.record(readings)
+            except Exception as e:
+                logger.error(f"Error al actualizar los agregados de temperatura: {str(e)}")
+
+    def _publish_event(self, event_type, data):
+        """
+        Publica un evento en el feed en vivo si hay un hub configurado.
+
+        Args:
+            event_type: Tipo de evento
+            data: Contenido del evento
+        """
+        if not self.event_hub:
+            return
+        try:
+            self.event_hub.publish(event_type, data)
+        except Exception as e:
+            logger.error(f"Error al publicar el evento {event_type}: {str(e)}")
+
+    def _tag_writer(self, document):
+        """
+        Marca un documento como escrito por este proceso.
+
+        Solo con change streams activos: al llegar su cambio, las estadísticas
+        ya lo incluyen y no hace falta invalidarlas.
+
+        Args:
+            document: Documento a guardar (se modifica en el sitio)
+        """
+        if self.change_streams_enabled:
+            document["writer"] = self.writer_id
+
+    def _publish_message_event(self, document, local=False):
+        """
+        Publica en el feed en vivo un mensaje guardado.
+
+        Con change streams activos, los mensajes de mqtt_messages se publican
+        al llegar su cambio; solo se publican aquí los que no están en esa
+        colección (local=True, lecturas de la serie temporal).
+
+        Args:
+            document: Documento del mensaje
+            local: Si el documento no se guardó en mqtt_messages
+        """
+        if self.change_streams_enabled and not local:
+            return
+        self._publish_event("mensaje", self._message_event_data(document))
+
+    @staticmethod
+    def _message_event_data(document):
+        """
+        Obtiene el contenido del evento de un mensaje.
+
+        Args:
+            document: Documento del mensaje
+
+        Returns:
+            dict: Datos del evento "mensaje"
+        """
+        data = {
+            "_id": str(document["_id"]),
+            "topic": document["topic"],
+            "valor": document["valor"],
+            "timestamp": document["timestamp"].isoformat(),
+            "source": document.get("source")
+        }
+        if "stream" in document:
+            data["stream"] = document["stream"]
+        return data
+
+    @staticmethod
+    def _prediction_event_data(document):
+        """
+        Obtiene el contenido del evento de una predicción guardada.
+
+        Args:
+            document: Documento de la predicción
+
+        Returns:
+            dict: Datos del evento "prediccion"
+        """
+        result = document.get("result") or {}
+        return {
+            "_id": str(document["_id"]),
+            "timestamp": document["timestamp"].isoformat(),
+            "stream": document.get("stream"),
+            "sensor": document.get("sensor"),
+            "location": document.get("location"),
+            "status": result.get("status"),
+            "prediction": result.get("prediction"),
+            "engine": result.get("engine"),
+            "window_start_id": document.get("window_start_id"),
+            "window_end_id": document.get("window_end_id"),
+            "cache_hit": document.get("cache_hit", False)
+        }
+
+    def change_stream_handlers(self):
+        """
+        Obtiene los manejadores de cambios para el observador de change streams.
+
+        Returns:
+            dict: {nombre_coleccion: función(change)}
+        """
+        return {
+            "mqtt_messages": self._on_message_change,
+            "predicciones": self._on_prediction_change,
+            "fs.files": self._on_image_change
+        }
+
+    def _on_message_change(self, change):
+        """
+        Procesa un cambio de mqtt_messages, de esta u otra instancia.
+        """
+        if change["operationType"] != "insert":
+            return
+        document = change["fullDocument"]
+        # Los mensajes propios ya se registraron en las estadísticas al guardarlos
+        if document.get("writer") != self.writer_id:
+            self.stats_model.invalidate()
+        self._publish_event("mensaje", self._message_event_data(document))
+
+    def _on_prediction_change(self, change):
+        """
+        Procesa un cambio de predicciones, de esta u otra instancia.
+
+        Las predicciones exitosas se agregan a la caché local, de modo que
+        ninguna instancia repite una llamada al modelo que ya hizo otra.
+        """
+        operation = change["operationType"]
+        if operation == "delete":
+            if self.prediction_cache:
+                self.prediction_cache.clear()
+            self.stats_model.invalidate()
+            return
+        if operation != "insert":
+            return
+
+        document = change["fullDocument"]
+        if document.get("writer") != self.writer_id:
+            self.stats_model.invalidate()
+        result = document.get("result") or {}
+        if self.prediction_cache and document.get("cache_key") and result.get("status") == "success":
+            self.prediction_cache.put(document["cache_key"], result)
+        self._publish_event("prediccion", self._prediction_event_data(document))
+
+    def _on_image_change(self, change):
+        """
+        Procesa un cambio de fs.files y publica las detecciones de rostros.
+        """
+        if change["operationType"] not in ("update", "replace"):
+            return
+        if change["operationType"] == "update":
+            updated = change.get("updateDescription", {}).get("updatedFields", {})
+            if not any(field == "metadata" or field.startswith("metadata.face_detection") for field in updated):
+                return
+
+        document = change.get("fullDocument") or {}
+        metadata = document.get("metadata") or {}
+        result = metadata.get("face_detection_result")
+        if result is None:
+            return
+        self._publish_event("deteccion", {
+            "image_id": str(document["_id"]),
+            "filename": document.get("filename"),
+            "source": metadata.get("source"),
+            "status": result.get("status"),
+            "has_persons": metadata.get("has_persons", False),
+            "total_persons": metadata.get("total_persons", 0),
+            "timestamp": metadata.get("detection_time")
+        })
+
     def get_messages(self):
         """
         Maneja la solicitud para obtener los mensajes MQTT.
@@ -167,9 +758,12 @@ class MQTTController:
             if topic:
                 filter_query["topic"] = topic
 
-            # Obtener mensajes
-            cursor = self.db.mqtt_messages.find(filter_query).sort("timestamp", -1).skip(skip).limit(limit)
-            total = self.db.mqtt_messages.count_documents(filter_query)
+            # Obtener mensajes (las temperaturas en modo timeseries están en su propia colección)
+            if topic and is_temperature_topic(topic) and self.reading_model.storage_mode == "timeseries":
+                cursor, total = self.reading_model.find(topic, limit, skip)
+            else:
+                cursor = self.db.mqtt_messages.find(filter_query, {"writer": 0}).sort("timestamp", -1).skip(skip).limit(limit)
+                total = self.db.mqtt_messages.count_documents(filter_query)
 
             # Convertir cursor a lista
             messages = []
@@ -193,81 +787,242 @@ class MQTTController:
                 "message": f"Error al obtener mensajes: {str(e)}"
             }), 500
 
-    def _check_and_process_temperatures(self):
+    def get_temperature_stats(self):
         """
-        Verifica si hay 60 datos de temperatura no procesados y los envía al modelo AWS.
+        Maneja la solicitud para obtener estadísticas de temperatura desde los agregados.
+
+        Returns:
+            tuple: (response, status_code)
         """
         try:
-            # Contar cuántos datos de temperatura no procesados hay
-            count = self.db.mqtt_messages.count_documents({
-                "topic": "sensor/temperatura",
-                "processed": False
-            })
+            # Obtener parámetros de consulta
+            granularity = request.args.get('granularity', 'hour')
+            if granularity not in GRANULARITIES:
+                return jsonify({
+                    "status": "error",
+                    "message": "El parámetro 'granularity' debe ser minute, hour o day"
+                }), 400
+
+            try:
+                now = datetime.datetime.now(datetime.timezone.utc)
+                end = self._parse_datetime(request.args.get('to')) or now
+                start = self._parse_datetime(request.args.get('from'))
+                if start is None:
+                    # Por defecto, hoy para horas y los últimos intervalos para minutos y días
+                    if granularity == "hour":
+                        start = GRANULARITIES["day"](end)
+                    else:
+                        start = end - GRANULARITY_STEPS[granularity] * DEFAULT_STATS_BUCKETS[granularity]
+            except ValueError:
+                return jsonify({
+                    "status": "error",
+                    "message": "Los parámetros 'from' y 'to' deben estar en formato ISO 8601"
+                }), 400
 
-            logger.info(f"Datos de temperatura no procesados: {count}")
+            buckets = self.rollup_model.get_buckets(granularity, start, end)
 
-            # Si hay al menos 60 datos, procesarlos
-            if count >= 60:
-                logger.info("Se han acumulado 60 datos de temperatura, enviando al modelo AWS...")
-                self._process_temperatures()
+            return jsonify({
+                "status": "success",
+                "granularity": granularity,
+                "from": start.isoformat(),
+                "to": end.isoformat(),
+                "summary": TemperatureRollupModel.summarize_totals(buckets),
+                "data": buckets
+            }), 200
 
         except Exception as e:
-            logger.error(f"Error al verificar datos de temperatura: {str(e)}")
+            logger.error(f"Error al obtener estadísticas de temperatura: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error al obtener estadísticas de temperatura: {str(e)}"
+            }), 500
+
+    @staticmethod
+    def _parse_datetime(value):
+        """
+        Convierte una fecha ISO 8601 en datetime UTC.
 
-    def _process_temperatures(self):
+        Returns:
+            datetime: Fecha con zona horaria UTC, o None si no se indicó
         """
-        Procesa los datos de temperatura y los envía al modelo AWS.
+        if not value:
+            return None
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+        return parsed.astimezone(datetime.timezone.utc)
+
+    def _get_window(self, stream):
+        """
+        Obtiene la ventana en memoria de un flujo, creándola si no existe.
+
+        Args:
+            stream: Clave del flujo (ubicación/sensor)
+
+        Returns:
+            TemperatureWindow: Ventana del flujo
+        """
+        window = self.temperature_windows.get(stream)
+        if window is None:
+            with self._windows_lock:
+                window = self.temperature_windows.get(stream)
+                if window is None:
+                    window = self._create_window(stream)
+                    self.temperature_windows[stream] = window
+        return window
+
+    @staticmethod
+    def _create_window(stream):
+        """
+        Crea una ventana de temperaturas vacía con el modo configurado para el flujo.
+
+        Args:
+            stream: Clave del flujo
+
+        Returns:
+            TemperatureWindow: Ventana consecutiva o deslizante
+        """
+        stride = None
+        if settings.PREDICTION_WINDOW_MODE == "sliding":
+            stride = settings.PREDICTION_STREAM_STRIDES.get(stream, settings.PREDICTION_STRIDE)
+        return TemperatureWindow(TEMPERATURE_WINDOW_SIZE, stride=stride)
+
+    def _seed_temperature_windows(self):
+        """
+        Carga en la ventana de cada flujo las temperaturas no procesadas guardadas en MongoDB.
+
+        En modo deslizante se cargan las últimas 60 lecturas (procesadas o no),
+        ya que las ventanas se solapan con lecturas usadas anteriormente.
         """
         try:
-            # Obtener los 60 datos de temperatura más antiguos no procesados
-            cursor = self.db.mqtt_messages.find({
-                "topic": "sensor/temperatura",
-                "processed": False
-            }).sort("timestamp", 1).limit(60)
+            for stream in self.reading_model.streams():
+                window = self._get_window(stream)
+                if window.sliding:
+                    readings, fresh = self.reading_model.load_recent(stream, TEMPERATURE_WINDOW_SIZE)
+                    window.seed(readings, fresh=fresh)
+                else:
+                    window.seed(self.reading_model.load_pending(stream))
+                logger.info(f"Ventana de temperaturas de {stream} sembrada con {len(window)} lecturas pendientes")
+        except Exception as e:
+            logger.error(f"Error al sembrar las ventanas de temperaturas: {str(e)}")
 
-            # Convertir cursor a lista
-            temperature_docs = list(cursor)
+    def _check_and_process_temperatures(self, stream=DEFAULT_STREAM):
+        """
+        Verifica si hay 60 datos de temperatura no procesados en un flujo y encola su envío al modelo AWS.
+
+        Args:
+            stream: Clave del flujo
+        """
+        try:
+            window = self._get_window(stream)
+            logger.info(f"Datos de temperatura no procesados de {stream}: {len(window)}")
+
+            # Encolar cada ventana lista (60 datos nuevos, o `stride` datos en modo deslizante)
+            ready = window.take()
+            while ready:
+                logger.info(f"Ventana de 60 datos de temperatura de {stream} lista, encolando predicción...")
+                self._submit_prediction(stream, *ready)
+                ready = window.take()
+
+        except Exception as e:
+            logger.error(f"Error al verificar datos de temperatura: {str(e)}")
+
+    def _submit_prediction(self, stream, readings, fresh):
+        """
+        Encola una ventana de temperaturas en el trabajador de predicciones.
+
+        Args:
+            stream: Clave del flujo
+            readings: Lista de 60 tuplas (doc_id, valor)
+            fresh: Número de lecturas finales que no se habían usado en otra ventana
+
+        Returns:
+            str: ID del trabajo
+        """
+        return self.prediction_worker.submit(
+            self._process_temperatures,
+            readings,
+            fresh,
+            stream,
+            description="Predicción de temperatura",
+            stream=stream,
+            readings=len(readings),
+            first_doc_id=str(readings[0][0]),
+            last_doc_id=str(readings[-1][0])
+        )
+
+    def _process_temperatures(self, readings=None, fresh=None, stream=DEFAULT_STREAM):
+        """
+        Procesa los datos de temperatura de un flujo y los envía al modelo AWS.
+
+        Args:
+            readings: Lista de 60 tuplas (doc_id, valor); si no se indica, se
+                extraen de la ventana en memoria
+            fresh: Número de lecturas finales que no se habían usado en otra
+                ventana (por defecto, todas)
+            stream: Clave del flujo (ubicación/sensor)
+
+        Returns:
+            str: ID de la predicción guardada, o False si no se procesó la ventana
+        """
+        window = self._get_window(stream)
+        if readings is None:
+            ready = window.take()
 
             # Verificar si hay suficientes datos
-            if len(temperature_docs) < 60:
-                logger.warning(f"No hay suficientes datos de temperatura para procesar: {len(temperature_docs)}/60")
-                return
+            if not ready:
+                logger.warning(f"No hay suficientes datos de temperatura para procesar en {stream}: {len(window)}/60")
+                return False
+            readings, fresh = ready
+        if fresh is None:
+            fresh = len(readings)
+
+        # Solo se reclaman y marcan las lecturas nuevas; las solapadas ya se procesaron
+        new_readings = readings[len(readings) - fresh:]
 
+        # Reclamar la ventana para que solo un hilo o proceso la envíe al modelo
+        claim_token, taken = self._claim_readings(new_readings)
+        if not claim_token:
+            window.restore(readings, fresh, exclude=taken)
+            return False
+
+        location, sensor = split_stream_key(stream)
+
+        prediction_id = None
+        try:
             # Extraer los valores de temperatura
-            temperatures = [doc["valor"] for doc in temperature_docs]
+            temperatures = [value for _, value in readings]
 
-            # Guardar los IDs de los documentos para marcarlos como procesados después
-            doc_ids = [doc["_id"] for doc in temperature_docs]
+            # IDs de las lecturas nuevas, que se marcan como procesadas
+            new_doc_ids = [doc_id for doc_id, _ in new_readings]
 
-            # Enviar los datos al modelo AWS
-            logger.info(f"Enviando {len(temperatures)} valores de temperatura al modelo AWS")
-            result = self.aws_model.predict(temperatures)
+            # Obtener la predicción del motor configurado
+            prediction = self._predict(temperatures)
+            result = prediction[0]
 
             # Guardar la predicción en la base de datos
-            prediction_doc = {
-                "timestamp": datetime.datetime.now(datetime.timezone.utc),
-                "temperatures": temperatures,
-                "result": result,
-                "temperature_doc_ids": [str(doc_id) for doc_id in doc_ids]
-            }
+            prediction_doc = self._build_prediction_document(
+                stream, readings, fresh, window.sliding, prediction
+            )
+            self._tag_writer(prediction_doc)
+            cache_hit = prediction_doc["cache_hit"]
 
-            self.db.predicciones.insert_one(prediction_doc)
+            prediction_id = str(self.predictions.insert_one(prediction_doc).inserted_id)
+            self.stats_model.record_prediction(cache_hit=cache_hit)
+            if not self.change_streams_enabled:
+                self._publish_event("prediccion", self._prediction_event_data(prediction_doc))
 
-            # Marcar los datos como procesados
-            for doc_id in doc_ids:
-                self.db.mqtt_messages.update_one(
-                    {"_id": doc_id},
-                    {"$set": {"processed": True}}
-                )
+            # Marcar los datos como procesados con una única operación
+            self.reading_model.mark_processed(new_doc_ids, claim_token, stream)
 
             logger.info(f"Predicción completada y guardada: {result}")
             
             # Enviar alerta MQTT si hay un cliente MQTT disponible
             if self.mqtt_client and result.get("status") == "success":
-                # Obtener la predicción de temperatura
-                prediction_value = None
-                if "prediction" in result and "prediccion" in result["prediction"]:
-                    prediction_value = result["prediction"]["prediccion"]
+                # Obtener la predicción de temperatura (valor directo o {"prediccion": valor})
+                prediction_value = result.get("prediction")
+                if isinstance(prediction_value, dict):
+                    prediction_value = prediction_value.get("prediccion")
                 
                 # Determinar el mensaje según el valor de temperatura
                 temperature_status = "normal"
@@ -291,6 +1046,8 @@ class MQTTController:
                     "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
                     "temperature_value": prediction_value,
                     "temperature_status": temperature_status,
+                    "sensor": sensor,
+                    "location": location,
                     "message": temperature_message,
                     "notification": {
                         "title": f"Temperatura {temperature_status.upper()}",
@@ -305,8 +1062,161 @@ class MQTTController:
                 )
                 logger.info(f"Alerta de temperatura enviada por MQTT: {temperature_message}")
 
+            return prediction_id
+
         except Exception as e:
             logger.error(f"Error al procesar datos de temperatura: {str(e)}")
+            # Liberar la ventana y devolver las lecturas para reintentarlas si no se guardó la predicción
+            if not prediction_id:
+                self._release_claim(claim_token)
+                window.restore(readings, fresh)
+            return prediction_id or False
+
+    @staticmethod
+    def _build_prediction_document(stream, readings, fresh, sliding, prediction, timestamp=None):
+        """
+        Construye el documento de predicción de una ventana.
+
+        Args:
+            stream: Clave del flujo
+            readings: Lista de tuplas (doc_id, valor) de la ventana
+            fresh: Número de lecturas finales que no se habían usado en otra ventana
+            sliding: Si la ventana es deslizante
+            prediction: Tupla (result, cache_hit, cache_key, shadow) devuelta por _predict
+            timestamp: Fecha de la predicción (por defecto, la actual)
+
+        Returns:
+            dict: Documento para la colección predicciones
+        """
+        result, cache_hit, cache_key, shadow = prediction
+        location, sensor = split_stream_key(stream)
+        temperatures = [value for _, value in readings]
+        doc_ids = [doc_id for doc_id, _ in readings]
+
+        prediction_doc = {
+            "timestamp": timestamp or datetime.datetime.now(datetime.timezone.utc),
+            "temperatures": temperatures,
+            "result": result,
+            "engine": result.get("engine"),
+            "temperature_doc_ids": [str(doc_id) for doc_id in doc_ids],
+            "window_start_id": str(doc_ids[0]),
+            "window_end_id": str(doc_ids[-1]),
+            "window_size": len(doc_ids),
+            "stream": stream,
+            "sensor": sensor,
+            "location": location,
+            "window_mode": "sliding" if sliding else "tumbling",
+            "new_readings": fresh,
+            "cache_hit": cache_hit,
+            # Solo para que las demás instancias llenen su caché desde el change stream
+            "cache_key": cache_key
+        }
+
+        # Resultado del motor local en modo sombra, para comparar con el remoto
+        if shadow:
+            prediction_doc["shadow"] = shadow
+
+        # Forma compacta: valores float32 e IDs de 12 bytes empaquetados. La
+        # respuesta cruda de una predicción exitosa solo repite la predicción;
+        # la de un error se conserva para diagnosticarlo
+        if settings.PREDICTION_COMPACT_STORAGE:
+            prediction_doc["temperatures"] = pack_values(temperatures)
+            prediction_doc["temperature_doc_ids"] = pack_ids(doc_ids)
+            if result.get("status") == "success" and "raw_response" in result:
+                prediction_doc["result"] = {key: value for key, value in result.items() if key != "raw_response"}
+
+        return prediction_doc
+
+    def _predict(self, temperatures):
+        """
+        Obtiene la predicción de una ventana según el modo de pronóstico.
+
+        Modos (FORECAST_MODE):
+            - remote: solo el modelo de AWS
+            - local: solo el motor local
+            - fallback: modelo de AWS y, si falla, el motor local
+            - shadow: modelo de AWS, calculando además el motor local para comparar
+
+        Args:
+            temperatures: Lista de valores de temperatura
+
+        Returns:
+            tuple: (result, cache_hit, cache_key, shadow)
+        """
+        if self.forecast_mode == "local":
+            return self.local_model.predict(temperatures), False, None, None
+
+        # Consultar la caché antes de llamar al modelo remoto
+        cache_key = self.prediction_cache.key(temperatures) if self.prediction_cache else None
+        result = self.prediction_cache.get(cache_key) if cache_key else None
+        cache_hit = result is not None
+
+        if cache_hit:
+            logger.info(f"Predicción obtenida de la caché para la ventana {cache_key}")
+        else:
+            # Enviar los datos al modelo AWS
+            logger.info(f"Enviando {len(temperatures)} valores de temperatura al modelo AWS")
+            result = dict(self.aws_model.predict(temperatures), engine="aws")
+
+            # Solo se guardan en caché las predicciones exitosas
+            if cache_key and result.get("status") == "success":
+                self.prediction_cache.put(cache_key, result)
+
+        shadow = None
+        if self.forecast_mode == "fallback" and result.get("status") != "success":
+            logger.warning("El modelo AWS falló, usando el motor local de pronóstico")
+            remote_error = result.get("message")
+            result = self.local_model.predict(temperatures)
+            result["remote_error"] = remote_error
+
+        elif self.forecast_mode == "shadow":
+            local_result = self.local_model.predict(temperatures)
+            shadow = {
+                "engine": local_result.get("engine"),
+                "status": local_result.get("status"),
+                "prediction": local_result.get("prediction"),
+                "elapsed_us": local_result.get("elapsed_us")
+            }
+            try:
+                remote_value = result.get("prediction")
+                if isinstance(remote_value, dict):
+                    remote_value = remote_value.get("prediccion")
+                shadow["difference"] = round(float(local_result["prediction"]) - float(remote_value), 4)
+            except (KeyError, TypeError, ValueError):
+                shadow["difference"] = None
+
+        return result, cache_hit, cache_key, shadow
+
+    def _claim_readings(self, readings):
+        """
+        Reclama atómicamente las lecturas de una ventana de temperaturas.
+
+        Args:
+            readings: Lista de tuplas (doc_id, valor)
+
+        Returns:
+            tuple: (token, taken) donde token es None si otra instancia tomó
+                parte de la ventana y taken son los IDs que ya no deben reintentarse
+        """
+        doc_ids = [doc_id for doc_id, _ in readings]
+
+        # Las lecturas de la ventana deben estar guardadas antes de reclamarlas
+        if self.reading_buffer:
+            self.reading_buffer.flush()
+
+        token, taken = self.reading_model.claim(doc_ids, settings.PREDICTION_CLAIM_LEASE_SECONDS)
+        if not token:
+            logger.warning(f"Ventana reclamada parcialmente ({len(doc_ids) - len(taken)}/{len(doc_ids)} libres), otra instancia la está procesando")
+        return token, taken
+
+    def _release_claim(self, token):
+        """
+        Libera las lecturas reclamadas con un token sin marcarlas como procesadas.
+
+        Args:
+            token: Token del reclamo
+        """
+        self.reading_model.release(token)
 
     def get_predictions(self):
         """
@@ -319,6 +1229,9 @@ class MQTTController:
             # Obtener parámetros de consulta
             limit = int(request.args.get('limit', 10))
             skip = int(request.args.get('skip', 0))
+            # Con expand se devuelven las temperaturas, los IDs y la respuesta cruda del modelo (si se guardó)
+            expand = request.args.get('expand', '').strip().lower() in ("1", "true", "yes", "si")
+            stream = request.args.get('stream', None)
 
             # Validar parámetros
             if limit < 1 or limit > 100:
@@ -326,22 +1239,30 @@ class MQTTController:
             if skip < 0:
                 skip = 0
 
-            # Obtener predicciones
-            cursor = self.db.predicciones.find().sort("timestamp", -1).skip(skip).limit(limit)
-            total = self.db.predicciones.count_documents({})
+            # Obtener predicciones (sin la respuesta cruda del modelo salvo que se expanda)
+            projection = {"writer": 0, "cache_key": 0}
+            if not expand:
+                projection["result.raw_response"] = 0
+            filter_query = {}
+            if stream:
+                # Las predicciones anteriores a los flujos pertenecen al flujo por defecto
+                filter_query["stream"] = {"$in": [stream, None]} if stream == DEFAULT_STREAM else stream
+            cursor = self.db.predicciones.find(filter_query, projection).sort("timestamp", -1).skip(skip).limit(limit)
+            total = self.db.predicciones.count_documents(filter_query)
 
             # Convertir cursor a lista
             predictions = []
             for doc in cursor:
                 doc["_id"] = str(doc["_id"])
                 doc["timestamp"] = doc["timestamp"].isoformat() if hasattr(doc["timestamp"], "isoformat") else str(doc["timestamp"])
-                predictions.append(doc)
+                predictions.append(self._expand_prediction(doc) if expand else self._compact_prediction(doc))
 
             return jsonify({
                 "status": "success",
                 "total": total,
                 "limit": limit,
                 "skip": skip,
+                "pending_jobs": self.prediction_worker.pending_count(),
                 "data": predictions
             }), 200
 
@@ -352,6 +1273,97 @@ class MQTTController:
                 "message": f"Error al obtener predicciones: {str(e)}"
             }), 500
 
+    @staticmethod
+    def _compact_prediction(doc):
+        """
+        Prepara una predicción para la respuesta en su forma compacta.
+
+        Args:
+            doc: Documento de predicciones
+
+        Returns:
+            dict: Documento con las temperaturas empaquetadas en base64 y sin la lista de IDs
+        """
+        temperatures = doc.get("temperatures")
+        if isinstance(temperatures, list):
+            # Predicciones guardadas antes de la forma compacta
+            temperatures = pack_values(temperatures)
+        if isinstance(temperatures, (bytes, Binary)):
+            doc["temperatures"] = encode_values(temperatures)
+        doc.pop("temperature_doc_ids", None)
+        return doc
+
+    @staticmethod
+    def _expand_prediction(doc):
+        """
+        Prepara una predicción para la respuesta en su forma completa.
+
+        Las predicciones guardadas solo con el rango de IDs (antes de empaquetar
+        los IDs) se devuelven sin la lista, que no puede reconstruirse con
+        seguridad: el rango puede incluir lecturas de otras ventanas.
+
+        Args:
+            doc: Documento de predicciones
+
+        Returns:
+            dict: Documento con la lista de temperaturas y de IDs
+        """
+        temperatures = doc.get("temperatures")
+        if isinstance(temperatures, (bytes, Binary)):
+            doc["temperatures"] = unpack_values(temperatures)
+
+        doc_ids = doc.get("temperature_doc_ids")
+        if isinstance(doc_ids, (bytes, Binary)):
+            doc["temperature_doc_ids"] = [str(doc_id) for doc_id in unpack_ids(doc_ids)]
+        return doc
+
+    def get_prediction_jobs(self):
+        """
+        Maneja la solicitud para obtener los trabajos de predicción pendientes y terminados.
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        try:
+            jobs = self.prediction_worker.get_jobs()
+
+            return jsonify({
+                "status": "success",
+                "total_pending": len(jobs["pending"]),
+                "total_completed": len(jobs["completed"]),
+                "pending": jobs["pending"],
+                "completed": jobs["completed"]
+            }), 200
+
+        except Exception as e:
+            logger.error(f"Error al obtener trabajos de predicción: {str(e)}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error al obtener trabajos de predicción: {str(e)}"
+            }), 500
+
+    def get_prediction_job(self, job_id):
+        """
+        Maneja la solicitud para obtener el estado de un trabajo de predicción.
+
+        Args:
+            job_id: ID del trabajo
+
+        Returns:
+            tuple: (response, status_code)
+        """
+        job = self.prediction_worker.get_job(job_id)
+        if not job:
+            return jsonify({
+                "status": "error",
+                "message": "No se encontró el trabajo de predicción"
+            }), 404
+
+        return jsonify({
+            "status": "success",
+            "data": job
+        }), 200
+
     def process_temperatures_manually(self):
         """
         Maneja la solicitud para procesar los datos de temperatura manualmente.
@@ -360,25 +1372,28 @@ class MQTTController:
             tuple: (response, status_code)
         """
         try:
-            # Contar cuántos datos de temperatura no procesados hay
-            count = self.db.mqtt_messages.count_documents({
-                "topic": "sensor/temperatura",
-                "processed": False
-            })
+            # Flujo a procesar (por defecto, el flujo por defecto)
+            stream = request.args.get('stream', DEFAULT_STREAM)
 
-            if count < 60:
+            # Tomar la siguiente ventana lista del flujo
+            window = self.temperature_windows.get(stream)
+            ready = window.take() if window else None
+            if not ready:
                 return jsonify({
                     "status": "error",
-                    "message": f"No hay suficientes datos de temperatura para procesar: {count}/60"
+                    "message": f"No hay suficientes datos de temperatura para procesar en {stream}: {len(window) if window else 0}/60"
                 }), 400
 
-            # Procesar los datos
-            self._process_temperatures()
+            # Encolar el procesamiento de la ventana
+            job_id = self._submit_prediction(stream, *ready)
 
             return jsonify({
                 "status": "success",
-                "message": "Datos de temperatura procesados correctamente"
-            }), 200
+                "message": "Procesamiento de temperaturas encolado",
+                "stream": stream,
+                "job_id": job_id,
+                "job_url": f"/api/predicciones/jobs/{job_id}"
+            }), 202
 
         except Exception as e:
             logger.error(f"Error al procesar datos de temperatura manualmente: {str(e)}")
@@ -395,51 +1410,75 @@ class MQTTController:
             tuple: (response, status_code)
         """
         try:
-            # Contar mensajes recibidos en las últimas 24 horas
-            from datetime import datetime, timedelta
+            # Estadísticas mantenidas incrementalmente, sin consultar MongoDB en cada llamada
+            stats = self.stats_model.get_stats()
+            recent_messages = stats["messages_last_24h"]
+            total_predictions = stats["total_predictions"]
+
+            # Temperaturas pendientes en las ventanas en memoria
+            unprocessed_temp = sum(len(window) for window in list(self.temperature_windows.values()))
+
+            # Último mensaje recibido
+            last_message_data = stats["last_message"]
+            if last_message_data and hasattr(last_message_data["timestamp"], "isoformat"):
+                last_message_data["timestamp"] = last_message_data["timestamp"].isoformat()
+
+            mqtt_system = {
+                "backend_endpoint": "/api/mensaje",
+                "external_subscriber": {
+                    "expected_broker": "192.168.196.202:1883",
+                    "expected_topic": "sensor/temperatura",
+                    "note": "El backend recibe datos del subscriber externo vía HTTP"
+                },
+                "statistics": {
+                    "messages_last_24h": recent_messages,
+                    "unprocessed_temperatures": unprocessed_temp,
+                    "total_predictions": total_predictions,
+                    "last_message": last_message_data
+                },
+                "sensor_storage": self.reading_model.storage_mode,
+                "streams": {
+                    stream: {"pending_readings": len(window), "window_mode": "sliding" if window.sliding else "tumbling"}
+                    for stream, window in sorted(list(self.temperature_windows.items()))
+                }
+            }
 
-            last_24h = datetime.now(datetime.timezone.utc) - timedelta(hours=24)
+            # Escritura diferida de mensajes y lecturas
+            if self.message_buffer:
+                mqtt_system["write_behind"] = {
+                    "messages": self.message_buffer.get_stats(),
+                    "readings": self.reading_buffer.get_stats()
+                }
 
-            recent_messages = self.db.mqtt_messages.count_documents({
-                "timestamp": {"$gte": last_24h}
-            })
+            # Cola de publicación MQTT (mensajes pendientes mientras no hay conexión)
+            if self.mqtt_client:
+                mqtt_system["publisher"] = self.mqtt_client.get_stats()
+                mqtt_system["republish"] = self.republish_policy.get_stats()
 
-            # Contar mensajes de temperatura no procesados
-            unprocessed_temp = self.db.mqtt_messages.count_documents({
-                "topic": "sensor/temperatura",
-                "processed": False
-            })
+            # Estado de los clientes de los modelos remotos y sus circuit breakers
+            mqtt_system["remote_models"] = get_http_clients_stats()
 
-            # Obtener el último mensaje recibido
-            last_message = self.db.mqtt_messages.find().sort("timestamp", -1).limit(1)
-            last_message_data = None
-            for msg in last_message:
-                last_message_data = {
-                    "topic": msg["topic"],
-                    "valor": msg["valor"],
-                    "timestamp": msg["timestamp"].isoformat() if hasattr(msg["timestamp"], "isoformat") else str(msg["timestamp"])
-                }
-                break
+            # Estadísticas de la caché de predicciones
+            if self.prediction_cache:
+                cache_stats = self.prediction_cache.get_stats()
+                cache_stats["saved_remote_calls"] = stats["cache_hits"]
+                mqtt_system["prediction_cache"] = cache_stats
+
+            # Estadísticas del suscriptor embebido si está activo
+            if self.embedded_subscriber:
+                mqtt_system["embedded_subscriber"] = self.embedded_subscriber.get_stats()
 
-            # Contar predicciones
-            total_predictions = self.db.predicciones.count_documents({})
+            # Estadísticas del receptor de line protocol si está activo
+            if self.line_listener:
+                mqtt_system["line_listener"] = self.line_listener.get_stats()
+
+            # Estadísticas del observador de change streams si está activo
+            if self.change_stream_watcher:
+                mqtt_system["change_streams"] = self.change_stream_watcher.get_stats()
 
             return jsonify({
                 "status": "success",
-                "mqtt_system": {
-                    "backend_endpoint": "/api/mensaje",
-                    "external_subscriber": {
-                        "expected_broker": "192.168.196.202:1883",
-                        "expected_topic": "sensor/temperatura",
-                        "note": "El backend recibe datos del subscriber externo vía HTTP"
-                    },
-                    "statistics": {
-                        "messages_last_24h": recent_messages,
-                        "unprocessed_temperatures": unprocessed_temp,
-                        "total_predictions": total_predictions,
-                        "last_message": last_message_data
-                    }
-                }
+                "mqtt_system": mqtt_system
             }), 200
 
         except Exception as e:
@@ -506,9 +1545,12 @@ class MQTTController:
                 "timestamp": datetime.datetime.now(datetime.timezone.utc),
                 "source": "test_endpoint"
             }
+            self._tag_writer(document)
             
             # Guardar en la base de datos
-            result = self.db.mqtt_messages.insert_one(document)
+            result = self.messages.insert_one(document)
+            self.stats_model.record_messages([document])
+            self._publish_message_event(document)
             
             # Enviar el mensaje transformado al tópico sistema/notificaciones
             if self.mqtt_client:
@@ -611,7 +1653,16 @@ class MQTTController:
             }
             
             # Guardar en la base de datos
-            result = self.db.mqtt_messages.insert_one(document)
+            result = self.messages.insert_one(document)
+            self.stats_model.record_messages([document])
+            self._publish_message_event(document)
+            self._publish_event("deteccion", {
+                "source": "test_intrusion_endpoint",
+                "simulated": True,
+                "has_persons": True,
+                "total_persons": total_persons,
+                "timestamp": document["timestamp"].isoformat()
+            })
             
             return jsonify({
                 "status": "success",
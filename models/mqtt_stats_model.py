@@ -0,0 +1,365 @@
+"""
+Modelo para las estadísticas incrementales del sistema MQTT (/api/mqtt/status).
+"""
+
+import datetime
+import logging
+import threading
+import time
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from models.sensor_reading_model import TIMESERIES_COLLECTION
+
+# Minutos que cubre el contador deslizante de mensajes
+WINDOW_MINUTES = 24 * 60
+
+# Identificador del documento con los totales
+STATS_ID = "mqtt_status"
+
+logger = logging.getLogger("mqtt_stats_model")
+
+class MQTTStatsModel:
+    """
+    Mantiene las estadísticas de /api/mqtt/status a medida que ocurren las escrituras.
+
+    En memoria se guarda un contador deslizante de 24 horas con un bucket
+    por minuto (un arreglo circular de 1440 posiciones y su suma), el
+    último mensaje y los totales de predicciones, de modo que el estado se
+    responde sin consultar MongoDB.
+
+    Los incrementos se acumulan en memoria y un hilo los persiste cada
+    `flush_seconds` con $inc, sin escrituras en el camino de cada mensaje:
+        - mqtt_stats_minutes: un documento por minuto, con expiración automática.
+        - mqtt_stats: un documento con los totales y el último mensaje.
+
+    La memoria se vuelve a sincronizar desde esas colecciones cada
+    `refresh_seconds`, así cada instancia refleja también las escrituras
+    de las demás.
+    """
+
+    def __init__(self, db, refresh_seconds=30, flush_seconds=1.0):
+        """
+        Inicializa el modelo, carga las estadísticas guardadas e inicia su hilo de escritura.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            refresh_seconds: Segundos entre sincronizaciones desde MongoDB (0 = solo al iniciar)
+            flush_seconds: Segundos entre escrituras de los incrementos acumulados
+        """
+        self.db = db
+        self.stats = db.mqtt_stats
+        self.minutes = db.mqtt_stats_minutes
+        self.refresh_seconds = refresh_seconds
+        self.flush_seconds = flush_seconds
+
+        # Los buckets de minuto se eliminan pasado un margen sobre las 24 horas
+        self.minutes.create_index("minute", expireAfterSeconds=(WINDOW_MINUTES + 60) * 60)
+
+        self._lock = threading.Lock()
+        self._counts = [0] * WINDOW_MINUTES
+        self._total = 0
+        self._current_minute = self._minute_number(self._now())
+        self._totals = {}
+        self._last_message = None
+        self._synced_at = 0
+        self._stale = False
+
+        # Incrementos aún no guardados en MongoDB
+        self._pending_minutes = {}
+        self._pending_totals = {}
+        self._pending_last = None
+        # Reentrante: sync() guarda los pendientes y recarga sin que el hilo escriba entre medias
+        self._flush_lock = threading.RLock()
+        self._closing = threading.Event()
+
+        self._bootstrap()
+        self.sync()
+
+        self._thread = threading.Thread(target=self._run, name="mqtt-stats-flush", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    @staticmethod
+    def _as_utc(timestamp):
+        # MongoDB devuelve las fechas sin zona horaria, siempre en UTC
+        if timestamp is not None and timestamp.tzinfo is None:
+            return timestamp.replace(tzinfo=datetime.timezone.utc)
+        return timestamp
+
+    @classmethod
+    def _minute_number(cls, timestamp):
+        return int(cls._as_utc(timestamp).timestamp() // 60)
+
+    @staticmethod
+    def _minute_start(minute):
+        return datetime.datetime.fromtimestamp(minute * 60, datetime.timezone.utc)
+
+    def _bootstrap(self):
+        """
+        Crea el documento de totales a partir de los datos existentes si aún no existe.
+
+        Solo se ejecuta la primera vez; después los totales se mantienen con $inc.
+        """
+        if self.stats.find_one({"_id": STATS_ID}, {"_id": 1}):
+            return
+
+        last_message = None
+        for doc in self.db.mqtt_messages.find().sort("timestamp", -1).limit(1):
+            last_message = self._summarize_message(doc)
+
+        # Contar una sola vez por minuto los mensajes de las últimas 24 horas
+        since = self._minute_start(self._minute_number(self._now()) - WINDOW_MINUTES + 1)
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}}},
+            {"$group": {
+                "_id": {"$dateToString": {"format": "%Y-%m-%dT%H:%M", "date": "$timestamp"}},
+                "count": {"$sum": 1}
+            }}
+        ]
+        collections = [self.db.mqtt_messages]
+        if TIMESERIES_COLLECTION in self.db.list_collection_names():
+            collections.append(self.db[TIMESERIES_COLLECTION])
+        for collection in collections:
+            for bucket in collection.aggregate(pipeline):
+                minute_start = datetime.datetime.strptime(bucket["_id"], "%Y-%m-%dT%H:%M").replace(tzinfo=datetime.timezone.utc)
+                self.minutes.update_one(
+                    {"_id": minute_start.isoformat()},
+                    {"$setOnInsert": {"minute": minute_start}, "$inc": {"count": bucket["count"]}},
+                    upsert=True
+                )
+
+        self.stats.update_one(
+            {"_id": STATS_ID},
+            {"$setOnInsert": {
+                "total_predictions": self.db.predicciones.count_documents({}),
+                "cache_hits": self.db.predicciones.count_documents({"cache_hit": True}),
+                "last_message": last_message
+            }},
+            upsert=True
+        )
+
+    @classmethod
+    def _summarize_message(cls, doc):
+        return {
+            "topic": doc.get("topic"),
+            "valor": doc.get("valor"),
+            "timestamp": cls._as_utc(doc.get("timestamp"))
+        }
+
+    def _advance(self, minute):
+        """
+        Avanza el contador deslizante hasta el minuto indicado, vaciando los buckets vencidos.
+
+        Args:
+            minute: Número de minuto actual
+        """
+        steps = min(minute - self._current_minute, WINDOW_MINUTES)
+        for offset in range(1, steps + 1):
+            index = (self._current_minute + offset) % WINDOW_MINUTES
+            self._total -= self._counts[index]
+            self._counts[index] = 0
+        if minute > self._current_minute:
+            self._current_minute = minute
+
+    def sync(self):
+        """
+        Recarga desde MongoDB los buckets de las últimas 24 horas y los totales.
+
+        Antes se guardan los incrementos pendientes; los que no se pudieron
+        guardar se vuelven a sumar a lo cargado.
+        """
+        with self._flush_lock:
+            self._sync()
+
+    def _sync(self):
+        self.flush()
+        now_minute = self._minute_number(self._now())
+        first_minute = now_minute - WINDOW_MINUTES + 1
+
+        counts = [0] * WINDOW_MINUTES
+        total = 0
+        for doc in self.minutes.find({"minute": {"$gte": self._minute_start(first_minute)}}):
+            minute = self._minute_number(doc["minute"])
+            if first_minute <= minute <= now_minute:
+                counts[minute % WINDOW_MINUTES] += doc.get("count", 0)
+                total += doc.get("count", 0)
+
+        stats = self.stats.find_one({"_id": STATS_ID}) or {}
+
+        with self._lock:
+            for minute, count in self._pending_minutes.items():
+                if first_minute <= minute <= now_minute:
+                    counts[minute % WINDOW_MINUTES] += count
+                    total += count
+            self._counts = counts
+            self._total = total
+            self._current_minute = now_minute
+            self._totals = {
+                key: stats.get(key, 0) + self._pending_totals.get(key, 0)
+                for key in ("total_predictions", "cache_hits")
+            }
+            last_message = stats.get("last_message")
+            self._last_message = self._summarize_message(last_message) if last_message else None
+            if self._pending_last and (
+                not self._last_message or self._pending_last["timestamp"] >= self._last_message["timestamp"]
+            ):
+                self._last_message = self._pending_last
+            self._synced_at = time.monotonic()
+            self._stale = False
+
+    def record_messages(self, documents):
+        """
+        Registra mensajes guardados en mqtt_messages (o en el modelo de lecturas).
+
+        Args:
+            documents: Lista de documentos guardados, con timestamp
+        """
+        if not documents:
+            return
+
+        per_minute = {}
+        for doc in documents:
+            minute = self._minute_number(doc["timestamp"])
+            per_minute[minute] = per_minute.get(minute, 0) + 1
+        last = max(documents, key=lambda doc: doc["timestamp"])
+        last_message = self._summarize_message(last)
+
+        with self._lock:
+            now_minute = self._minute_number(self._now())
+            self._advance(now_minute)
+            for minute, count in per_minute.items():
+                if now_minute - WINDOW_MINUTES < minute <= now_minute:
+                    self._counts[minute % WINDOW_MINUTES] += count
+                    self._total += count
+            if not self._last_message or last_message["timestamp"] >= self._last_message["timestamp"]:
+                self._last_message = last_message
+
+            for minute, count in per_minute.items():
+                self._pending_minutes[minute] = self._pending_minutes.get(minute, 0) + count
+            if not self._pending_last or last_message["timestamp"] >= self._pending_last["timestamp"]:
+                self._pending_last = last_message
+
+    def record_prediction(self, cache_hit=False):
+        """
+        Registra una predicción guardada.
+
+        Args:
+            cache_hit: Si la predicción se obtuvo de la caché
+        """
+        increments = {"total_predictions": 1}
+        if cache_hit:
+            increments["cache_hits"] = 1
+
+        with self._lock:
+            for key, value in increments.items():
+                self._totals[key] = self._totals.get(key, 0) + value
+                self._pending_totals[key] = self._pending_totals.get(key, 0) + value
+
+    def _take_pending(self):
+        with self._lock:
+            pending = (self._pending_minutes, self._pending_totals, self._pending_last)
+            self._pending_minutes, self._pending_totals, self._pending_last = {}, {}, None
+            return pending
+
+    def _restore_pending(self, minutes, totals, last_message):
+        # Los incrementos que no se guardaron se suman a los acumulados mientras tanto
+        with self._lock:
+            for minute, count in minutes.items():
+                self._pending_minutes[minute] = self._pending_minutes.get(minute, 0) + count
+            for key, value in totals.items():
+                self._pending_totals[key] = self._pending_totals.get(key, 0) + value
+            if last_message and (not self._pending_last or last_message["timestamp"] >= self._pending_last["timestamp"]):
+                self._pending_last = last_message
+
+    def flush(self):
+        """
+        Guarda los incrementos acumulados con una escritura por colección.
+
+        Returns:
+            bool: False si no se pudieron guardar (se reintentan en la siguiente)
+        """
+        with self._flush_lock:
+            minutes, totals, last_message = self._take_pending()
+            if not minutes and not totals and not last_message:
+                return True
+
+            try:
+                if minutes:
+                    self.minutes.bulk_write([
+                        UpdateOne(
+                            {"_id": self._minute_start(minute).isoformat()},
+                            {"$setOnInsert": {"minute": self._minute_start(minute)}, "$inc": {"count": count}},
+                            upsert=True
+                        )
+                        for minute, count in minutes.items()
+                    ], ordered=False)
+                    minutes = {}
+
+                operations = []
+                if totals:
+                    operations.append(UpdateOne({"_id": STATS_ID}, {"$inc": totals}, upsert=True))
+                if last_message:
+                    # Solo se reemplaza el último mensaje si es más reciente que el guardado por otra instancia
+                    operations.append(UpdateOne(
+                        {
+                            "_id": STATS_ID,
+                            "$or": [
+                                {"last_message.timestamp": {"$lte": last_message["timestamp"]}},
+                                {"last_message": None}
+                            ]
+                        },
+                        {"$set": {"last_message": last_message}}
+                    ))
+                if operations:
+                    self.stats.bulk_write(operations, ordered=True)
+            except PyMongoError as e:
+                self._restore_pending(minutes, totals, last_message)
+                logger.error(f"Error al guardar las estadísticas MQTT, se reintentará: {str(e)}")
+                return False
+            return True
+
+    def _run(self):
+        while not self._closing.wait(self.flush_seconds):
+            self.flush()
+
+    def close(self):
+        """
+        Detiene el hilo de escritura y guarda los incrementos pendientes.
+        """
+        self._closing.set()
+        self._thread.join(5)
+        if not self.flush():
+            logger.error("Se perdieron incrementos de las estadísticas MQTT al cerrar")
+
+    def invalidate(self):
+        """
+        Marca las estadísticas como desactualizadas tras una escritura de otra instancia.
+
+        La siguiente consulta vuelve a sincronizar desde MongoDB, como mucho
+        una vez por segundo.
+        """
+        self._stale = True
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas actuales sin consultar MongoDB (salvo al tocar sincronizar).
+
+        Returns:
+            dict: messages_last_24h, total_predictions, cache_hits y last_message
+        """
+        elapsed = time.monotonic() - self._synced_at
+        if (self.refresh_seconds and elapsed >= self.refresh_seconds) or (self._stale and elapsed >= 1):
+            self.sync()
+
+        with self._lock:
+            self._advance(self._minute_number(self._now()))
+            last_message = dict(self._last_message) if self._last_message else None
+            return {
+                "messages_last_24h": self._total,
+                "total_predictions": self._totals.get("total_predictions", 0),
+                "cache_hits": self._totals.get("cache_hits", 0),
+                "last_message": last_message
+            }
@@ -0,0 +1,728 @@
+"""
+Modelos de almacenamiento de las lecturas de temperatura del sensor.
+
+Se ofrecen dos modos (SENSOR_STORAGE_MODE):
+    - documents: cada lectura es un documento de mqtt_messages con sus
+      marcas de procesamiento (modo original).
+    - timeseries: las lecturas se guardan en una colección de series
+      temporales nativa de MongoDB y el estado de procesamiento se lleva
+      en una colección aparte de reclamos.
+"""
+
+import datetime
+import json
+import uuid
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid
+from config.database import with_write_concern
+
+TEMPERATURE_TOPIC = "sensor/temperatura"
+
+# Sensor y ubicación de las lecturas publicadas en sensor/temperatura sin más datos
+DEFAULT_SENSOR = "sensor"
+DEFAULT_LOCATION = "ia"
+
+# Nombre de la colección de series temporales y de sus colecciones auxiliares
+TIMESERIES_COLLECTION = "sensor_readings"
+CLAIMS_COLLECTION = "sensor_reading_claims"
+STATE_COLLECTION = "sensor_reading_state"
+
+# Los reclamos procesados se conservan un día; después basta con la marca de agua
+CLAIMS_TTL_SECONDS = 86400
+
+# Lecturas leídas por consulta al avanzar la marca de agua
+WATERMARK_SCAN_BATCH = 1000
+
+def stream_key(location, sensor):
+    """
+    Construye la clave del flujo de lecturas de un sensor.
+
+    Args:
+        location: Ubicación del sensor
+        sensor: Nombre del sensor
+
+    Returns:
+        str: Clave "ubicacion/sensor"
+    """
+    return f"{location}/{sensor}"
+
+DEFAULT_STREAM = stream_key(DEFAULT_LOCATION, DEFAULT_SENSOR)
+
+def split_stream_key(stream):
+    """
+    Separa una clave de flujo en ubicación y sensor.
+
+    Args:
+        stream: Clave "ubicacion/sensor"
+
+    Returns:
+        tuple: (location, sensor)
+    """
+    location, _, sensor = stream.partition("/")
+    return location, sensor or DEFAULT_SENSOR
+
+def is_temperature_topic(topic):
+    """
+    Indica si un tópico corresponde a lecturas de temperatura.
+
+    Args:
+        topic: Tópico MQTT
+
+    Returns:
+        bool: True para sensor/temperatura y sus subtópicos
+    """
+    if not isinstance(topic, str):
+        return False
+    return topic == TEMPERATURE_TOPIC or topic.startswith(TEMPERATURE_TOPIC + "/")
+
+def parse_temperature_message(topic, valor):
+    """
+    Obtiene la temperatura, el sensor y la ubicación de un mensaje.
+
+    El sensor y la ubicación se toman de la jerarquía del tópico
+    (sensor/temperatura/<ubicacion>/<sensor>) y, si el valor es un objeto
+    JSON ({"valor": 21.5, "sensor": "s1", "location": "invernadero1"}),
+    del propio mensaje, que tiene prioridad.
+
+    Args:
+        topic: Tópico MQTT
+        valor: Valor recibido (número, cadena u objeto)
+
+    Returns:
+        tuple: (temperatura, sensor, location)
+
+    Raises:
+        TypeError, ValueError: Si el valor no contiene una temperatura válida
+    """
+    levels = [level for level in topic[len(TEMPERATURE_TOPIC):].split("/") if level]
+    location = levels[0] if levels else DEFAULT_LOCATION
+    sensor = levels[1] if len(levels) > 1 else DEFAULT_SENSOR
+
+    payload = valor
+    if isinstance(payload, str) and payload.lstrip().startswith("{"):
+        payload = json.loads(payload)
+    if isinstance(payload, dict):
+        sensor = str(payload.get("sensor") or sensor)
+        location = str(payload.get("location") or location)
+        payload = payload.get("valor", payload.get("value"))
+
+    return float(payload), sensor, location
+
+def _write_errors(error):
+    """
+    Convierte un BulkWriteError en la lista de errores por índice.
+
+    Args:
+        error: Excepción BulkWriteError
+
+    Returns:
+        list: Lista de diccionarios {"index", "message"}
+    """
+    return [
+        {"index": write_error["index"], "message": write_error.get("errmsg")}
+        for write_error in error.details.get("writeErrors", [])
+    ]
+
+class SensorReadingModel:
+    """
+    Lecturas de temperatura guardadas como documentos de mqtt_messages.
+
+    Las lecturas llevan el campo processed y, mientras una ventana se
+    procesa, claim_token/claimed_at para que solo una instancia la envíe
+    al modelo. El campo stream identifica el flujo (ubicación/sensor); las
+    lecturas guardadas antes de existir ese campo pertenecen al flujo por
+    defecto.
+    """
+
+    storage_mode = "documents"
+
+    def __init__(self, db, write_concern=None):
+        """
+        Inicializa el modelo con la base de datos.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            write_concern: Write concern de las inserciones de lecturas (opcional)
+        """
+        self.db = db
+        self.collection = db.mqtt_messages
+        # Las inserciones usan su propio write concern; los reclamos siguen con el del servidor
+        self.inserts = with_write_concern(self.collection, write_concern)
+
+        # Índices para localizar las temperaturas pendientes de cada flujo en orden cronológico
+        self.collection.create_index([("topic", 1), ("processed", 1), ("timestamp", 1)])
+        self.collection.create_index([("stream", 1), ("processed", 1), ("timestamp", 1)])
+
+    def _stream_query(self, stream):
+        """
+        Construye el filtro de las lecturas de un flujo.
+
+        Solo las temperaturas llevan el campo processed, lo que excluye el
+        resto de mensajes sin campo stream.
+
+        Args:
+            stream: Clave del flujo
+
+        Returns:
+            dict: Filtro de consulta
+        """
+        if stream == DEFAULT_STREAM:
+            return {"stream": {"$in": [stream, None]}, "processed": {"$exists": True}}
+        return {"stream": stream, "processed": {"$exists": True}}
+
+    def streams(self):
+        """
+        Obtiene las claves de los flujos con lecturas guardadas.
+
+        Returns:
+            list: Claves de flujo
+        """
+        keys = self.collection.distinct("stream", {"processed": {"$exists": True}})
+        return sorted({key or DEFAULT_STREAM for key in keys})
+
+    def insert_one(self, document):
+        """
+        Guarda una lectura.
+
+        Args:
+            document: Documento construido por el controlador; se le asigna
+                el _id guardado
+
+        Returns:
+            ObjectId: ID de la lectura guardada
+        """
+        return self.inserts.insert_one(document).inserted_id
+
+    def insert(self, documents):
+        """
+        Guarda lecturas con insert_many no ordenado.
+
+        Args:
+            documents: Lista de documentos construidos por el controlador; se
+                les asigna el _id guardado
+
+        Returns:
+            list: Errores de escritura por índice (vacía si todo se guardó)
+        """
+        try:
+            self.inserts.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            return _write_errors(e)
+        return []
+
+    def load_pending(self, stream):
+        """
+        Obtiene las lecturas no procesadas de un flujo en orden cronológico.
+
+        Args:
+            stream: Clave del flujo
+
+        Returns:
+            list: Lista de tuplas (doc_id, valor)
+        """
+        query = dict(self._stream_query(stream), processed=False)
+        cursor = self.collection.find(query, {"valor": 1}).sort([("timestamp", 1), ("_id", 1)])
+        return [(doc["_id"], doc["valor"]) for doc in cursor]
+
+    def load_recent(self, stream, limit):
+        """
+        Obtiene las últimas lecturas de un flujo, procesadas o no, en orden cronológico.
+
+        Args:
+            stream: Clave del flujo
+            limit: Número de lecturas
+
+        Returns:
+            tuple: (readings, fresh) donde readings es la lista de tuplas
+                (doc_id, valor) y fresh cuántas de ellas no se han procesado
+        """
+        cursor = self.collection.find(
+            self._stream_query(stream),
+            {"valor": 1, "processed": 1}
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit)
+        docs = list(cursor)[::-1]
+        fresh = sum(1 for doc in docs if not doc["processed"])
+        return [(doc["_id"], doc["valor"]) for doc in docs], fresh
+
+    def claim(self, doc_ids, lease_seconds):
+        """
+        Reclama atómicamente un conjunto de lecturas no procesadas.
+
+        Solo se reclaman documentos no procesados que no tengan un reclamo
+        vigente, de modo que cada ventana se procesa una única vez aunque
+        varios hilos o procesos lleguen a la vez a las 60 lecturas.
+
+        Args:
+            doc_ids: Lista de IDs de las lecturas
+            lease_seconds: Segundos tras los cuales un reclamo no completado caduca
+
+        Returns:
+            tuple: (token, taken) donde token es None si otra instancia tomó
+                parte de las lecturas y taken son los IDs que ya no deben reintentarse
+        """
+        token = uuid.uuid4().hex
+        now = datetime.datetime.now(datetime.timezone.utc)
+        lease_expired = now - datetime.timedelta(seconds=lease_seconds)
+
+        result = self.collection.update_many(
+            {
+                "_id": {"$in": doc_ids},
+                "processed": False,
+                "$or": [
+                    {"claim_token": None},
+                    {"claimed_at": {"$lt": lease_expired}}
+                ]
+            },
+            {"$set": {"claim_token": token, "claimed_at": now}}
+        )
+
+        if result.modified_count == len(doc_ids):
+            return token, set()
+
+        # Reclamo parcial: liberar lo reclamado e indicar lo que ya tomó otra instancia
+        self.release(token)
+        taken = {
+            doc["_id"]
+            for doc in self.collection.find(
+                {
+                    "_id": {"$in": doc_ids},
+                    "$or": [{"processed": True}, {"claim_token": {"$ne": None}}]
+                },
+                {"_id": 1}
+            )
+        }
+        return None, taken
+
+    def release(self, token):
+        """
+        Libera las lecturas reclamadas con un token sin marcarlas como procesadas.
+
+        Args:
+            token: Token del reclamo
+        """
+        self.collection.update_many(
+            {"claim_token": token},
+            {"$unset": {"claim_token": "", "claimed_at": ""}}
+        )
+
+    def mark_processed(self, doc_ids, token, stream):
+        """
+        Marca como procesadas las lecturas reclamadas con una única operación.
+
+        Args:
+            doc_ids: Lista de IDs de las lecturas
+            token: Token del reclamo
+            stream: Clave del flujo
+        """
+        self.collection.update_many(
+            {"_id": {"$in": doc_ids}, "claim_token": token},
+            {
+                "$set": {"processed": True},
+                "$unset": {"claim_token": "", "claimed_at": ""}
+            }
+        )
+
+    def set_processed(self, doc_ids, stream):
+        """
+        Marca lecturas como procesadas sin reclamarlas.
+
+        Lo usan las recargas históricas, que procesan sus propias ventanas
+        sin competir con otras instancias.
+
+        Args:
+            doc_ids: Lista de IDs de las lecturas
+            stream: Clave del flujo
+        """
+        if doc_ids:
+            self.collection.update_many({"_id": {"$in": doc_ids}}, {"$set": {"processed": True}})
+
+    def readings_after(self, stream, after_id, limit):
+        """
+        Obtiene las lecturas de un flujo posteriores a un ID, en orden de ID.
+
+        Permite recorrer todas las lecturas guardadas por lotes (por ejemplo
+        para reconstruir las predicciones).
+
+        Args:
+            stream: Clave del flujo
+            after_id: ID de la última lectura del lote anterior, o None
+            limit: Número máximo de lecturas
+
+        Returns:
+            list: Lista de tuplas (doc_id, valor, timestamp)
+        """
+        query = self._stream_query(stream)
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        cursor = self.collection.find(query, {"valor": 1, "timestamp": 1}).sort("_id", 1).limit(limit)
+        return [(doc["_id"], doc["valor"], doc["timestamp"]) for doc in cursor]
+
+    def find(self, topic, limit, skip):
+        """
+        Obtiene las lecturas más recientes de un tópico para el listado de mensajes.
+
+        Args:
+            topic: Tópico de las lecturas
+            limit: Número máximo de lecturas
+            skip: Lecturas a omitir
+
+        Returns:
+            tuple: (documents, total)
+        """
+        query = {"topic": topic}
+        cursor = self.collection.find(query).sort("timestamp", -1).skip(skip).limit(limit)
+        return list(cursor), self.collection.count_documents(query)
+
+class TimeSeriesReadingModel(SensorReadingModel):
+    """
+    Lecturas de temperatura guardadas en una colección de series temporales.
+
+    Cada lectura ocupa solo la marca de tiempo, el valor y los metadatos
+    del sensor (agrupados por MongoDB en buckets comprimidos), sin repetir
+    el mensaje transformado ni las marcas de procesamiento.
+
+    Como los documentos de series temporales no admiten las actualizaciones
+    por documento del modo original, el procesamiento se registra aparte:
+        - sensor_reading_claims: un documento por lectura reclamada (su _id
+          es el de la lectura, así un insert no ordenado reclama de forma
+          atómica) con expiración automática.
+        - sensor_reading_state: la marca de agua de cada flujo con el mayor
+          ID hasta el que todas las lecturas están procesadas; las lecturas
+          anteriores se consideran procesadas.
+    """
+
+    storage_mode = "timeseries"
+
+    def __init__(self, db, expire_after_seconds=None, write_concern=None):
+        """
+        Inicializa el modelo y crea la colección de series temporales si no existe.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            expire_after_seconds: Retención de las lecturas en segundos (opcional)
+            write_concern: Write concern de las inserciones de lecturas (opcional)
+        """
+        self.db = db
+        self.collection = self.ensure_collection(db, expire_after_seconds)
+        self.inserts = with_write_concern(self.collection, write_concern)
+        self.claims = db[CLAIMS_COLLECTION]
+        self.state = db[STATE_COLLECTION]
+
+        self.claims.create_index("claimed_at", expireAfterSeconds=CLAIMS_TTL_SECONDS)
+        self.claims.create_index("claim_token")
+
+        # Índice secundario por flujo sobre los metadatos y el tiempo
+        self.collection.create_index([("meta.stream", 1), ("timestamp", 1)])
+
+    @staticmethod
+    def ensure_collection(db, expire_after_seconds=None):
+        """
+        Crea la colección de series temporales de lecturas si no existe.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            expire_after_seconds: Retención de las lecturas en segundos (opcional)
+
+        Returns:
+            Collection: Colección de series temporales
+        """
+        if TIMESERIES_COLLECTION not in db.list_collection_names():
+            options = {
+                "timeseries": {
+                    "timeField": "timestamp",
+                    "metaField": "meta",
+                    "granularity": "seconds"
+                }
+            }
+            if expire_after_seconds:
+                options["expireAfterSeconds"] = expire_after_seconds
+            try:
+                db.create_collection(TIMESERIES_COLLECTION, **options)
+            except CollectionInvalid:
+                # Otra instancia la creó entre la comprobación y la creación
+                pass
+        return db[TIMESERIES_COLLECTION]
+
+    @staticmethod
+    def to_timeseries(document):
+        """
+        Convierte un documento de mqtt_messages en una lectura de series temporales.
+
+        Args:
+            document: Documento con topic, valor, timestamp y source
+
+        Returns:
+            dict: Lectura con el mismo _id
+        """
+        transformed = document.get("valor_transformado") or {}
+        reading = {
+            "timestamp": document["timestamp"],
+            "meta": {
+                "topic": document["topic"],
+                "stream": document.get("stream", DEFAULT_STREAM),
+                "sensor": transformed.get("sensor", DEFAULT_SENSOR),
+                "location": transformed.get("location", DEFAULT_LOCATION),
+                "source": document.get("source")
+            },
+            "valor": document["valor"]
+        }
+        if "_id" in document:
+            reading["_id"] = document["_id"]
+        return reading
+
+    @staticmethod
+    def from_timeseries(reading):
+        """
+        Convierte una lectura de series temporales al formato de mqtt_messages.
+
+        Args:
+            reading: Documento de la colección de series temporales
+
+        Returns:
+            dict: Documento con topic, valor, timestamp y source
+        """
+        meta = reading.get("meta") or {}
+        return {
+            "_id": reading["_id"],
+            "topic": meta.get("topic", TEMPERATURE_TOPIC),
+            "valor": reading["valor"],
+            "timestamp": reading["timestamp"],
+            "source": meta.get("source"),
+            "stream": meta.get("stream", DEFAULT_STREAM),
+            "sensor": meta.get("sensor"),
+            "location": meta.get("location")
+        }
+
+    def insert_one(self, document):
+        document.setdefault("_id", ObjectId())
+        return self.inserts.insert_one(self.to_timeseries(document)).inserted_id
+
+    def insert(self, documents):
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+        try:
+            self.inserts.insert_many([self.to_timeseries(document) for document in documents], ordered=False)
+        except BulkWriteError as e:
+            return _write_errors(e)
+        return []
+
+    def _stream_query(self, stream):
+        if stream == DEFAULT_STREAM:
+            return {"meta.stream": {"$in": [stream, None]}}
+        return {"meta.stream": stream}
+
+    def streams(self):
+        keys = self.collection.distinct("meta.stream")
+        return sorted({key or DEFAULT_STREAM for key in keys})
+
+    def _watermark(self, stream):
+        """
+        Obtiene el mayor ID de lectura procesada de un flujo.
+
+        Args:
+            stream: Clave del flujo
+
+        Returns:
+            ObjectId: Marca de agua, o None si aún no se ha procesado ninguna lectura
+        """
+        state = self.state.find_one({"_id": stream})
+        return state.get("last_processed_id") if state else None
+
+    def _processed_ids(self, doc_ids):
+        """
+        Obtiene cuáles de las lecturas tienen un reclamo procesado.
+
+        Args:
+            doc_ids: Lista de IDs de las lecturas
+
+        Returns:
+            set: IDs procesados
+        """
+        return {
+            doc["_id"]
+            for doc in self.claims.find({"_id": {"$in": doc_ids}, "processed": True}, {"_id": 1})
+        }
+
+    def _pending_filter(self, stream, watermark):
+        """
+        Construye el filtro de las lecturas de un flujo posteriores a la marca de agua.
+
+        El filtro por timestamp permite a MongoDB descartar buckets completos;
+        los IDs se generan al guardar la lectura, así que su fecha coincide con
+        la de la lectura salvo por un pequeño margen.
+
+        Args:
+            stream: Clave del flujo
+            watermark: Marca de agua, o None
+
+        Returns:
+            dict: Filtro de consulta
+        """
+        query = self._stream_query(stream)
+        if watermark is not None:
+            query["timestamp"] = {"$gte": watermark.generation_time - datetime.timedelta(minutes=1)}
+            query["_id"] = {"$gt": watermark}
+        return query
+
+    def load_pending(self, stream):
+        watermark = self._watermark(stream)
+        cursor = self.collection.find(
+            self._pending_filter(stream, watermark),
+            {"valor": 1, "timestamp": 1}
+        ).sort([("timestamp", 1), ("_id", 1)])
+        docs = list(cursor)
+        processed = self._processed_ids([doc["_id"] for doc in docs])
+        return [(doc["_id"], doc["valor"]) for doc in docs if doc["_id"] not in processed]
+
+    def load_recent(self, stream, limit):
+        watermark = self._watermark(stream)
+        cursor = self.collection.find(
+            self._stream_query(stream),
+            {"valor": 1, "timestamp": 1}
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit)
+        docs = list(cursor)[::-1]
+        processed = self._processed_ids([doc["_id"] for doc in docs])
+        fresh = sum(
+            1 for doc in docs
+            if doc["_id"] not in processed and (watermark is None or doc["_id"] > watermark)
+        )
+        return [(doc["_id"], doc["valor"]) for doc in docs], fresh
+
+    def claim(self, doc_ids, lease_seconds):
+        token = uuid.uuid4().hex
+        now = datetime.datetime.now(datetime.timezone.utc)
+        lease_expired = now - datetime.timedelta(seconds=lease_seconds)
+
+        # Descartar los reclamos caducados antes de intentar tomarlos
+        self.claims.delete_many({
+            "_id": {"$in": doc_ids},
+            "processed": False,
+            "claimed_at": {"$lt": lease_expired}
+        })
+
+        try:
+            self.claims.insert_many(
+                [{"_id": doc_id, "claim_token": token, "claimed_at": now, "processed": False} for doc_id in doc_ids],
+                ordered=False
+            )
+            return token, set()
+        except BulkWriteError:
+            # Reclamo parcial: liberar lo reclamado e indicar lo que ya tomó otra instancia
+            self.release(token)
+            taken = {
+                doc["_id"]
+                for doc in self.claims.find({"_id": {"$in": doc_ids}}, {"_id": 1})
+            }
+            return None, taken
+
+    def release(self, token):
+        self.claims.delete_many({"claim_token": token, "processed": False})
+
+    def mark_processed(self, doc_ids, token, stream):
+        if not doc_ids:
+            return
+        self.claims.update_many(
+            {"_id": {"$in": doc_ids}, "claim_token": token},
+            {"$set": {"processed": True}}
+        )
+        self._advance_contiguous_watermark(stream)
+
+    def set_processed(self, doc_ids, stream):
+        if not doc_ids:
+            return
+        self.record_processed(self.claims, doc_ids)
+        self._advance_contiguous_watermark(stream)
+
+    @staticmethod
+    def record_processed(claims, doc_ids):
+        """
+        Registra lecturas como procesadas sin reclamo previo.
+
+        Args:
+            claims: Colección sensor_reading_claims
+            doc_ids: Lista de IDs de las lecturas
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        claims.bulk_write(
+            [UpdateOne({"_id": doc_id}, {"$set": {"processed": True, "claimed_at": now}}, upsert=True) for doc_id in doc_ids],
+            ordered=False
+        )
+
+    def _advance_contiguous_watermark(self, stream):
+        """
+        Avanza la marca de agua de un flujo hasta la última lectura anterior a la primera pendiente.
+
+        Una ventana anterior que sigue pendiente (devuelta a la ventana tras un
+        error, o en proceso en otro hilo) detiene la marca de agua; las lecturas
+        procesadas posteriores se reconocen por su reclamo hasta que la marca
+        de agua las alcance.
+
+        Args:
+            stream: Clave del flujo
+        """
+        watermark = self._watermark(stream)
+        last_processed = None
+        # Se recorre por bloques: normalmente la primera lectura pendiente está al principio
+        while True:
+            docs = list(self.collection.find(
+                self._pending_filter(stream, last_processed or watermark),
+                {"_id": 1, "timestamp": 1}
+            ).sort("_id", 1).limit(WATERMARK_SCAN_BATCH))
+            processed = self._processed_ids([doc["_id"] for doc in docs])
+            for doc in docs:
+                if doc["_id"] not in processed:
+                    break
+                last_processed = doc["_id"]
+            else:
+                if len(docs) == WATERMARK_SCAN_BATCH:
+                    continue
+            break
+
+        if last_processed is not None:
+            self.advance_watermark(self.state, stream, last_processed)
+
+    def readings_after(self, stream, after_id, limit):
+        cursor = self.collection.find(
+            self._pending_filter(stream, after_id),
+            {"valor": 1, "timestamp": 1}
+        ).sort("_id", 1).limit(limit)
+        return [(doc["_id"], doc["valor"], doc["timestamp"]) for doc in cursor]
+
+    @staticmethod
+    def advance_watermark(state, stream, doc_id):
+        """
+        Avanza la marca de agua de lecturas procesadas de un flujo.
+
+        Args:
+            state: Colección sensor_reading_state
+            stream: Clave del flujo
+            doc_id: ID de la última lectura procesada
+        """
+        state.update_one(
+            {"_id": stream},
+            {"$max": {"last_processed_id": doc_id}},
+            upsert=True
+        )
+
+    def find(self, topic, limit, skip):
+        query = {"meta.topic": topic}
+        cursor = self.collection.find(query).sort("timestamp", -1).skip(skip).limit(limit)
+        return [self.from_timeseries(doc) for doc in cursor], self.collection.count_documents(query)
+
+def create_sensor_reading_model(db, storage_mode="documents", expire_after_seconds=None, write_concern=None):
+    """
+    Crea el modelo de lecturas correspondiente al modo de almacenamiento.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        storage_mode: "documents" o "timeseries"
+        expire_after_seconds: Retención de las lecturas en modo timeseries (opcional)
+        write_concern: Write concern de las inserciones de lecturas (opcional)
+
+    Returns:
+        SensorReadingModel: Modelo de lecturas
+    """
+    if storage_mode == "timeseries":
+        return TimeSeriesReadingModel(db, expire_after_seconds=expire_after_seconds, write_concern=write_concern)
+    return SensorReadingModel(db, write_concern=write_concern)
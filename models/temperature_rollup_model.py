@@ -0,0 +1,145 @@
+"""
+Modelo para los agregados incrementales de temperatura (por minuto, hora y día).
+"""
+
+import datetime
+import math
+from pymongo import UpdateOne
+
+# Granularidades soportadas y cómo truncar una fecha a su inicio
+GRANULARITIES = {
+    "minute": lambda ts: ts.replace(second=0, microsecond=0),
+    "hour": lambda ts: ts.replace(minute=0, second=0, microsecond=0),
+    "day": lambda ts: ts.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+
+GRANULARITY_STEPS = {
+    "minute": datetime.timedelta(minutes=1),
+    "hour": datetime.timedelta(hours=1),
+    "day": datetime.timedelta(days=1)
+}
+
+class TemperatureRollupModel:
+    """
+    Mantiene agregados de temperatura (count, sum, sum_sq, min, max) por intervalo.
+
+    Los agregados se actualizan con upserts $inc/$min/$max a medida que se
+    guardan las lecturas, de modo que las estadísticas se responden leyendo
+    un documento por intervalo en lugar de recorrer mqtt_messages.
+    """
+
+    def __init__(self, db):
+        """
+        Inicializa el modelo con la base de datos.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+        """
+        self.collection = db.temperature_rollups
+        self.collection.create_index([("granularity", 1), ("bucket_start", -1)])
+
+    def record(self, readings):
+        """
+        Registra lecturas en los agregados de cada granularidad.
+
+        Las lecturas se agrupan primero en memoria, así un lote genera una
+        sola operación por intervalo.
+
+        Args:
+            readings: Lista de tuplas (timestamp, valor)
+        """
+        buckets = {}
+        for timestamp, value in readings:
+            for granularity, truncate in GRANULARITIES.items():
+                bucket_start = truncate(timestamp)
+                key = (granularity, bucket_start)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {"count": 1, "sum": value, "sum_sq": value * value, "min": value, "max": value}
+                else:
+                    bucket["count"] += 1
+                    bucket["sum"] += value
+                    bucket["sum_sq"] += value * value
+                    bucket["min"] = min(bucket["min"], value)
+                    bucket["max"] = max(bucket["max"], value)
+
+        if not buckets:
+            return
+
+        operations = [
+            UpdateOne(
+                {"_id": f"{granularity}:{bucket_start.isoformat()}"},
+                {
+                    "$setOnInsert": {"granularity": granularity, "bucket_start": bucket_start},
+                    "$inc": {"count": bucket["count"], "sum": bucket["sum"], "sum_sq": bucket["sum_sq"]},
+                    "$min": {"min": bucket["min"]},
+                    "$max": {"max": bucket["max"]}
+                },
+                upsert=True
+            )
+            for (granularity, bucket_start), bucket in buckets.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+    def get_buckets(self, granularity, start, end):
+        """
+        Obtiene los agregados de un rango de tiempo.
+
+        Args:
+            granularity: minute, hour o day
+            start: Fecha inicial (incluida)
+            end: Fecha final (excluida)
+
+        Returns:
+            list: Agregados con promedio y desviación estándar, en orden cronológico
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Granularidad inválida: {granularity}. Use minute, hour o day")
+
+        cursor = self.collection.find({
+            "granularity": granularity,
+            "bucket_start": {"$gte": GRANULARITIES[granularity](start), "$lt": end}
+        }).sort("bucket_start", 1)
+
+        return [self._summarize(doc) for doc in cursor]
+
+    @staticmethod
+    def summarize_totals(buckets):
+        """
+        Combina varios agregados en uno solo.
+
+        Args:
+            buckets: Lista devuelta por get_buckets
+
+        Returns:
+            dict: Agregado combinado o None si no hay datos
+        """
+        if not buckets:
+            return None
+        combined = {
+            "count": sum(b["count"] for b in buckets),
+            "sum": sum(b["sum"] for b in buckets),
+            "sum_sq": sum(b["sum_sq"] for b in buckets),
+            "min": min(b["min"] for b in buckets),
+            "max": max(b["max"] for b in buckets)
+        }
+        return TemperatureRollupModel._summarize(combined)
+
+    @staticmethod
+    def _summarize(doc):
+        count = doc["count"]
+        avg = doc["sum"] / count if count else None
+        variance = max(0.0, doc["sum_sq"] / count - avg * avg) if count else None
+        summary = {
+            "count": count,
+            "sum": doc["sum"],
+            "sum_sq": doc["sum_sq"],
+            "min": doc["min"],
+            "max": doc["max"],
+            "avg": round(avg, 4) if avg is not None else None,
+            "stddev": round(math.sqrt(variance), 4) if variance is not None else None
+        }
+        if "bucket_start" in doc:
+            bucket_start = doc["bucket_start"]
+            summary["bucket_start"] = bucket_start.isoformat() if hasattr(bucket_start, "isoformat") else str(bucket_start)
+        return summary
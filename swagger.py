@@ -36,6 +36,10 @@ def get_swagger_config():
             {
                 "name": "mqtt",
                 "description": "Operaciones relacionadas con MQTT y sensores"
+            },
+            {
+                "name": "eventos",
+                "description": "Feed de eventos en vivo"
             }
         ],
         "paths": {
@@ -227,8 +231,8 @@ def get_swagger_config():
                 "post": {
                     "tags": ["mqtt"],
                     "summary": "Recibir mensaje MQTT",
-                    "description": "Recibe un mensaje MQTT desde un cliente externo",
-                    "consumes": ["application/json"],
+                    "description": "Recibe un mensaje MQTT desde un cliente externo. Además de JSON acepta MessagePack (application/msgpack), CBOR (application/cbor) y line protocol (text/plain: 'sensor/temperatura,location=inv1,sensor=s1 valor=25.5')",
+                    "consumes": ["application/json", "application/msgpack", "application/cbor", "text/plain"],
                     "produces": ["application/json"],
                     "parameters": [
                         {
@@ -261,6 +265,64 @@ def get_swagger_config():
                         "400": {
                             "description": "Solicitud inválida"
                         },
+                        "415": {
+                            "description": "Content-Type no soportado"
+                        },
+                        "500": {
+                            "description": "Error interno del servidor"
+                        }
+                    }
+                }
+            },
+            "/api/mensajes/batch": {
+                "post": {
+                    "tags": ["mqtt"],
+                    "summary": "Recibir lote de mensajes MQTT",
+                    "description": "Recibe una lista de mensajes MQTT y los guarda con una única escritura no ordenada. Además de JSON acepta MessagePack y CBOR (una lista o varios frames concatenados) y line protocol (una lectura por línea)",
+                    "consumes": ["application/json", "application/msgpack", "application/cbor", "text/plain"],
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "body",
+                            "in": "body",
+                            "description": "Lista de mensajes MQTT (o un objeto con la clave 'mensajes')",
+                            "required": True,
+                            "schema": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "required": ["topic", "valor"],
+                                    "properties": {
+                                        "topic": {"type": "string", "example": "sensor/temperatura"},
+                                        "valor": {"type": "string", "example": "25.5"}
+                                    }
+                                }
+                            }
+                        }
+                    ],
+                    "responses": {
+                        "201": {
+                            "description": "Lote recibido",
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "status": {"type": "string", "example": "success"},
+                                    "message": {"type": "string", "example": "100 de 100 mensajes guardados correctamente"},
+                                    "inserted": {"type": "integer", "example": 100},
+                                    "rejected": {"type": "array", "items": {"type": "object"}},
+                                    "write_errors": {"type": "array", "items": {"type": "object"}}
+                                }
+                            }
+                        },
+                        "400": {
+                            "description": "Solicitud inválida"
+                        },
+                        "413": {
+                            "description": "El lote excede el tamaño máximo"
+                        },
+                        "415": {
+                            "description": "Content-Type no soportado"
+                        },
                         "500": {
                             "description": "Error interno del servidor"
                         }
@@ -322,6 +384,151 @@ def get_swagger_config():
                     }
                 }
             },
+            "/api/predicciones": {
+                "get": {
+                    "tags": ["mqtt"],
+                    "summary": "Obtener predicciones",
+                    "description": "Obtiene las predicciones de temperatura. Por defecto las temperaturas de la ventana se devuelven empaquetadas (float32 en base64) y solo con el rango de IDs",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "limit",
+                            "in": "query",
+                            "description": "Número máximo de predicciones a retornar",
+                            "required": False,
+                            "type": "integer",
+                            "default": 10
+                        },
+                        {
+                            "name": "skip",
+                            "in": "query",
+                            "description": "Número de predicciones a omitir (para paginación)",
+                            "required": False,
+                            "type": "integer",
+                            "default": 0
+                        },
+                        {
+                            "name": "expand",
+                            "in": "query",
+                            "description": "Devolver la lista de temperaturas, los IDs de las lecturas y la respuesta cruda del modelo (si se guardó)",
+                            "required": False,
+                            "type": "boolean",
+                            "default": False
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Operación exitosa"
+                        },
+                        "500": {
+                            "description": "Error interno del servidor"
+                        }
+                    }
+                }
+            },
+            "/api/predicciones/jobs": {
+                "get": {
+                    "tags": ["mqtt"],
+                    "summary": "Trabajos de predicción",
+                    "description": "Obtiene los trabajos de predicción pendientes y los terminados recientemente",
+                    "produces": ["application/json"],
+                    "responses": {
+                        "200": {
+                            "description": "Operación exitosa",
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "status": {"type": "string", "example": "success"},
+                                    "total_pending": {"type": "integer", "example": 1},
+                                    "total_completed": {"type": "integer", "example": 10},
+                                    "pending": {"type": "array", "items": {"type": "object"}},
+                                    "completed": {"type": "array", "items": {"type": "object"}}
+                                }
+                            }
+                        },
+                        "500": {
+                            "description": "Error interno del servidor"
+                        }
+                    }
+                }
+            },
+            "/api/predicciones/jobs/{job_id}": {
+                "get": {
+                    "tags": ["mqtt"],
+                    "summary": "Estado de un trabajo de predicción",
+                    "description": "Obtiene el estado de un trabajo de predicción (pending, running, completed o failed)",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "job_id",
+                            "in": "path",
+                            "description": "ID del trabajo",
+                            "required": True,
+                            "type": "string"
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Operación exitosa"
+                        },
+                        "404": {
+                            "description": "Trabajo no encontrado"
+                        }
+                    }
+                }
+            },
+            "/api/temperaturas/stats": {
+                "get": {
+                    "tags": ["mqtt"],
+                    "summary": "Estadísticas de temperatura",
+                    "description": "Obtiene conteo, promedio, mínimo, máximo y desviación estándar por intervalo desde los agregados incrementales",
+                    "produces": ["application/json"],
+                    "parameters": [
+                        {
+                            "name": "granularity",
+                            "in": "query",
+                            "description": "Tamaño del intervalo: minute, hour o day",
+                            "required": False,
+                            "type": "string",
+                            "default": "hour"
+                        },
+                        {
+                            "name": "from",
+                            "in": "query",
+                            "description": "Fecha inicial ISO 8601 (por defecto, inicio del día para hour; últimos 60 minutos o 30 días en otro caso)",
+                            "required": False,
+                            "type": "string"
+                        },
+                        {
+                            "name": "to",
+                            "in": "query",
+                            "description": "Fecha final ISO 8601 (por defecto, ahora)",
+                            "required": False,
+                            "type": "string"
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Operación exitosa",
+                            "schema": {
+                                "type": "object",
+                                "properties": {
+                                    "status": {"type": "string", "example": "success"},
+                                    "granularity": {"type": "string", "example": "hour"},
+                                    "summary": {"type": "object"},
+                                    "data": {"type": "array", "items": {"type": "object"}}
+                                }
+                            }
+                        },
+                        "400": {
+                            "description": "Parámetros inválidos"
+                        },
+                        "500": {
+                            "description": "Error interno del servidor"
+                        }
+                    }
+                }
+            },
             "/api/mqtt/status": {
                 "get": {
                     "tags": ["mqtt"],
@@ -352,6 +559,54 @@ def get_swagger_config():
                     }
                 }
             },
+            "/api/eventos": {
+                "get": {
+                    "tags": ["eventos"],
+                    "summary": "Feed de eventos en vivo (SSE)",
+                    "description": "Flujo text/event-stream con los eventos mensaje, prediccion y deteccion. Al reconectar, la cabecera Last-Event-ID reenvía los eventos perdidos; si ya no están disponibles se envía un evento reset. Si el cliente se atrasa se descartan sus eventos más antiguos y se envía un evento lagged",
+                    "produces": ["text/event-stream"],
+                    "parameters": [
+                        {
+                            "name": "types",
+                            "in": "query",
+                            "description": "Tipos de evento separados por comas (mensaje, prediccion, deteccion)",
+                            "required": False,
+                            "type": "string"
+                        },
+                        {
+                            "name": "Last-Event-ID",
+                            "in": "header",
+                            "description": "ID del último evento recibido",
+                            "required": False,
+                            "type": "string"
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Flujo de eventos"
+                        },
+                        "400": {
+                            "description": "Tipos de evento inválidos"
+                        },
+                        "503": {
+                            "description": "Se alcanzó el número máximo de clientes"
+                        }
+                    }
+                }
+            },
+            "/api/eventos/stats": {
+                "get": {
+                    "tags": ["eventos"],
+                    "summary": "Estadísticas del feed de eventos",
+                    "description": "Clientes conectados y eventos publicados",
+                    "produces": ["application/json"],
+                    "responses": {
+                        "200": {
+                            "description": "Operación exitosa"
+                        }
+                    }
+                }
+            },
             "/api/test/temperatura": {
                 "post": {
                     "tags": ["mqtt"],
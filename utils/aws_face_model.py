@@ -6,6 +6,8 @@ import requests
 import logging
 import json
 import base64
+from utils.http_client import get_http_client, RequestHedger
+from config import settings
 
 # Configurar logging
 logging.basicConfig(
@@ -19,17 +21,31 @@ class AWSFaceModel:
     Clase para comunicarse con el modelo de detección de rostros en AWS.
     """
     
-    def __init__(self, api_url=None, api_key=None):
+    def __init__(self, api_url=None, api_key=None, http_client=None):
         """
         Inicializa la clase con la URL y la clave de la API.
         
         Args:
             api_url: URL de la API de AWS (opcional)
             api_key: Clave de la API de AWS (opcional)
+            http_client: Cliente HTTP compartido (opcional)
         """
         self.api_url = api_url or "https://npdvcvx4o8.execute-api.us-east-1.amazonaws.com/prodfaces"
         self.api_key = api_key
         
+        # Cliente con conexiones persistentes, timeouts, reintentos y circuit breaker
+        self.http_client = http_client or get_http_client("aws_face_model")
+
+        # Hedging opcional para recortar la latencia de cola de la detección
+        self.hedger = None
+        if settings.FACE_HEDGING_ENABLED:
+            self.hedger = RequestHedger(
+                self.http_client,
+                percentile=settings.FACE_HEDGING_PERCENTILE,
+                initial_delay=settings.FACE_HEDGING_INITIAL_DELAY,
+                max_hedge_ratio=settings.FACE_HEDGING_MAX_RATIO
+            )
+        
         logger.info(f"AWSFaceModel inicializado con URL: {self.api_url}")
     
     def detect_face(self, image_data):
@@ -64,10 +80,11 @@ class AWSFaceModel:
             
             # Enviar la solicitud al modelo
             logger.info("Enviando imagen al modelo de detección de rostros")
-            response = requests.post(self.api_url, json=data, headers=headers)
-            
-            # Verificar si la solicitud fue exitosa
-            response.raise_for_status()
+            # (la inferencia no tiene efectos secundarios, por lo que puede reintentarse)
+            if self.hedger:
+                response = self.hedger.post(self.api_url, json=data, headers=headers)
+            else:
+                response = self.http_client.post(self.api_url, json=data, headers=headers, idempotent=True)
             
             # Obtener la respuesta
             result = response.json()
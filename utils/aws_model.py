@@ -5,6 +5,7 @@ Utilidad para comunicarse con el modelo desplegado en AWS.
 import requests
 import logging
 import json
+from utils.http_client import get_http_client
 
 # Configurar logging
 logging.basicConfig(
@@ -18,17 +19,21 @@ class AWSModel:
     Clase para comunicarse con el modelo desplegado en AWS.
     """
     
-    def __init__(self, api_url=None, api_key=None):
+    def __init__(self, api_url=None, api_key=None, http_client=None):
         """
         Inicializa la clase con la URL y la clave de la API.
         
         Args:
             api_url: URL de la API de AWS (opcional)
             api_key: Clave de la API de AWS (opcional)
+            http_client: Cliente HTTP compartido (opcional)
         """
         self.api_url = api_url or "https://smhdxgp506.execute-api.us-east-1.amazonaws.com/prod"
         self.api_key = api_key or "JpFbj5x3uXaVVVP6XJwlz7WzLbbf54Do206KJ8bw"
         
+        # Cliente con conexiones persistentes, timeouts, reintentos y circuit breaker
+        self.http_client = http_client or get_http_client("aws_model")
+        
         logger.info(f"AWSModel inicializado con URL: {self.api_url}")
     
     def predict(self, temperatures):
@@ -59,10 +64,8 @@ class AWSModel:
             
             # Enviar la solicitud al modelo
             logger.info(f"Enviando solicitud al modelo con {len(temperatures)} valores de temperatura")
-            response = requests.post(self.api_url, json=data, headers=headers)
-            
-            # Verificar si la solicitud fue exitosa
-            response.raise_for_status()
+            # (la inferencia no tiene efectos secundarios, por lo que puede reintentarse)
+            response = self.http_client.post(self.api_url, json=data, headers=headers, idempotent=True)
             
             # Obtener la respuesta
             result = response.json()
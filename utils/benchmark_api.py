@@ -0,0 +1,521 @@
+"""
+Pruebas de carga y latencia de la API.
+
+Inicia el backend (app.create_app) en un proceso aparte contra un mongod
+local y una base de datos propia, genera carga concurrente sobre cada
+endpoint y reporta el rendimiento (solicitudes/s) y los percentiles p50,
+p95 y p99 de latencia. Los resultados se guardan en JSON para comparar
+ejecuciones y detectar regresiones.
+
+El backend iniciado no usa los servicios reales: pronóstico local, sin
+captura de la cámara ni receptor de line protocol, y cliente MQTT propio
+contra --mqtt-host (127.0.0.1 por defecto, basta con que no haya broker).
+
+Cada endpoint se prueba con cada nivel de concurrencia durante --duration
+segundos (después de --warmup segundos que no se miden). Cada cliente
+envía la siguiente solicitud al recibir la respuesta de la anterior.
+
+Uso:
+    python -m utils.benchmark_api [--mongo-url mongodb://localhost:27017] [--db back_ia_benchmark] [--mqtt-host 127.0.0.1]
+        [--endpoints mensaje,upload,image,images,status] [--concurrency 1,8,32]
+        [--duration 10] [--warmup 2] [--output-dir benchmark_results]
+        [--compare benchmark_results/anterior.json] [--threshold 10]
+    python -m utils.benchmark_api --url http://localhost:5000   (servidor ya en ejecución)
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+from config import settings
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imagen usada por los endpoints de subida y descarga
+DEFAULT_IMAGE = os.path.join(ROOT_DIR, "prueba.jpeg")
+
+# Métricas comparadas entre ejecuciones y si un valor mayor es peor
+COMPARED_METRICS = (("p95", True), ("p99", True), ("throughput_rps", False))
+
+# Configuración incluida en los resultados para saber con qué se midió
+RECORDED_SETTINGS = (
+    "SENSOR_STORAGE_MODE", "WRITE_BEHIND_ENABLED", "WRITE_CONCERN_MESSAGES", "FORECAST_MODE",
+    "PREDICTION_WORKERS", "REPUBLISH_MODE", "STATUS_REFRESH_SECONDS", "MQTT_MODE",
+    "MQTT_BROKER_HOST", "MQTT_CLIENT_ID", "LINE_LISTENER_ENABLED", "CAPTURE_ENABLED", "CHANGE_STREAMS_ENABLED"
+)
+
+# Configuración del backend iniciado que lo aísla de los servicios reales
+ISOLATED_SETTINGS = {
+    "FORECAST_MODE": "local",
+    "MQTT_MODE": "http_bridge",
+    "LINE_LISTENER_ENABLED": "false",
+    "CAPTURE_ENABLED": "false"
+}
+
+def _post_message(session, base_url, context):
+    valor = round(random.uniform(18, 38), 2)
+    return session.post(
+        f"{base_url}/api/mensaje",
+        json={"topic": "sensor/temperatura/benchmark/sensor", "valor": valor},
+        timeout=context["timeout"]
+    )
+
+def _upload_image(session, base_url, context):
+    return session.post(
+        f"{base_url}/api/upload",
+        files={"image": (context["image_name"], context["image_data"], context["image_type"])},
+        timeout=context["timeout"]
+    )
+
+def _get_image(session, base_url, context):
+    return session.get(f"{base_url}/api/image/{context['image_id']}", timeout=context["timeout"])
+
+def _list_images(session, base_url, context):
+    return session.get(f"{base_url}/api/images", timeout=context["timeout"])
+
+def _mqtt_status(session, base_url, context):
+    return session.get(f"{base_url}/api/mqtt/status", timeout=context["timeout"])
+
+# Endpoints disponibles: nombre -> (ruta, función que envía una solicitud)
+ENDPOINTS = {
+    "mensaje": ("POST /api/mensaje", _post_message),
+    "upload": ("POST /api/upload", _upload_image),
+    "image": ("GET /api/image/<id>", _get_image),
+    "images": ("GET /api/images", _list_images),
+    "status": ("GET /api/mqtt/status", _mqtt_status)
+}
+
+def _serve(ready_path):
+    """
+    Ejecuta el backend con un servidor WSGI multihilo (en el proceso iniciado por start_server).
+
+    Args:
+        ready_path: Archivo donde se escriben el puerto asignado y la configuración efectiva
+    """
+    from werkzeug.serving import make_server
+    # Al importarse, app.py construye la aplicación con create_app()
+    import app as app_module
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True)
+    temporal = ready_path + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({
+            "port": server.server_port,
+            "settings": {name: getattr(settings, name, None) for name in RECORDED_SETTINGS}
+        }, f)
+    os.replace(temporal, ready_path)
+    server.serve_forever()
+
+def _stop_server(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def start_server(mongo_url, db_name, log_path, mqtt_host, timeout=60):
+    """
+    Inicia el backend en un proceso nuevo aislado y espera a que responda.
+
+    El proceso se crea con subprocess y no con fork: la configuración se lee
+    al importarse y las variables de este proceso ya no cambiarían la suya.
+
+    Args:
+        mongo_url: URL del mongod
+        db_name: Base de datos de la prueba
+        log_path: Archivo donde se escribe la salida del servidor
+        mqtt_host: Broker MQTT del backend iniciado
+        timeout: Segundos máximos de espera
+
+    Returns:
+        tuple: (process, base_url, settings) con la configuración efectiva del backend
+    """
+    # Las variables definidas tienen prioridad sobre el archivo .env
+    env = dict(
+        os.environ,
+        DATABASE_URL=mongo_url,
+        MONGODB_DB=db_name,
+        MQTT_BROKER_HOST=mqtt_host,
+        MQTT_CLIENT_ID=f"backend_benchmark_{os.getpid()}",
+        **ISOLATED_SETTINGS
+    )
+    ready_dir = tempfile.mkdtemp(prefix="benchmark_api_")
+    ready_path = os.path.join(ready_dir, "ready.json")
+
+    # La salida del backend (un registro por mensaje) no debe mezclarse con el reporte
+    with open(log_path, "a") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "utils.benchmark_api", "--serve", ready_path],
+            cwd=ROOT_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    # Si no hay conexión a MongoDB el proceso termina sin escribir el puerto
+    deadline = time.monotonic() + timeout
+    try:
+        while not os.path.exists(ready_path):
+            if process.poll() is not None:
+                raise SystemExit(f"El backend terminó al iniciarse, revise {log_path}")
+            if time.monotonic() >= deadline:
+                _stop_server(process)
+                raise SystemExit(f"El backend no se inició en {timeout}s, revise {log_path}")
+            time.sleep(0.2)
+        with open(ready_path, encoding="utf-8") as f:
+            ready = json.load(f)
+    finally:
+        if os.path.exists(ready_path):
+            os.remove(ready_path)
+        os.rmdir(ready_dir)
+
+    base_url = f"http://127.0.0.1:{ready['port']}"
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/test", timeout=2).status_code == 200:
+                return process, base_url, ready["settings"]
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    _stop_server(process)
+    raise SystemExit(f"El backend no respondió en {timeout}s, revise {log_path}")
+
+def _percentile(values, percent):
+    """
+    Calcula un percentil con interpolación lineal.
+
+    Args:
+        values: Lista ordenada de valores
+        percent: Percentil entre 0 y 100
+
+    Returns:
+        float: Valor del percentil, o None si la lista está vacía
+    """
+    if not values:
+        return None
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+def summarize(latencies, statuses, errors, elapsed):
+    """
+    Resume las mediciones de un escenario.
+
+    Las latencias solo incluyen las respuestas correctas (código menor que
+    400), así un endpoint que falla rápido no parece más rápido.
+
+    Args:
+        latencies: Latencias en segundos de las respuestas correctas
+        statuses: Diccionario código -> cantidad
+        errors: Solicitudes sin respuesta (tiempo agotado, conexión)
+        elapsed: Segundos medidos
+
+    Returns:
+        dict: Solicitudes, errores, rendimiento y latencias en milisegundos
+    """
+    values = sorted(latency * 1000 for latency in latencies)
+    requests_count = sum(statuses.values()) + errors
+    failed = errors + sum(count for status, count in statuses.items() if int(status) >= 400)
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        "requests": requests_count,
+        "errors": failed,
+        "error_rate": round(failed / requests_count, 4) if requests_count else 0,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0,
+        "mean": rounded(sum(values) / len(values)) if values else None,
+        "p50": rounded(_percentile(values, 50)),
+        "p95": rounded(_percentile(values, 95)),
+        "p99": rounded(_percentile(values, 99)),
+        "max": rounded(values[-1]) if values else None,
+        "status_codes": statuses
+    }
+
+def run_scenario(base_url, send, context, concurrency, duration, warmup):
+    """
+    Envía solicitudes a un endpoint con varios clientes en paralelo.
+
+    Args:
+        base_url: URL base del backend
+        send: Función send(session, base_url, context) que envía una solicitud
+        context: Datos compartidos por las solicitudes
+        concurrency: Número de clientes
+        duration: Segundos medidos
+        warmup: Segundos previos sin medir
+
+    Returns:
+        dict: Resumen del escenario
+    """
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    errors = [0]
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = {}
+        local_errors = 0
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                break
+            try:
+                status = send(session, base_url, context).status_code
+            except requests.RequestException:
+                status = None
+            received = time.perf_counter()
+
+            # Solo se miden las solicitudes enviadas dentro de la ventana de medición
+            if sent < measure_from:
+                continue
+            if status is None:
+                local_errors += 1
+                continue
+            key = str(status)
+            local_statuses[key] = local_statuses.get(key, 0) + 1
+            if status < 400:
+                local_latencies.append(received - sent)
+        session.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+            for key, count in local_statuses.items():
+                statuses[key] = statuses.get(key, 0) + count
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Las respuestas pendientes al cerrar la ventana alargan la medición
+    elapsed = max(time.perf_counter(), stop_at) - measure_from
+    return summarize(latencies, statuses, errors[0], elapsed)
+
+def prepare_context(base_url, endpoints, image_path, timeout):
+    """
+    Prepara los datos de las solicitudes: la imagen y, para la descarga, su ID subido.
+
+    Returns:
+        dict: Contexto de las solicitudes
+    """
+    with open(image_path, "rb") as f:
+        image_data = f.read()
+    extension = os.path.splitext(image_path)[1].lower().lstrip(".")
+    context = {
+        "timeout": timeout,
+        "image_name": os.path.basename(image_path),
+        "image_data": image_data,
+        "image_type": "image/jpeg" if extension in ("jpg", "jpeg") else f"image/{extension}"
+    }
+    if "image" in endpoints:
+        response = _upload_image(requests, base_url, context)
+        if response.status_code != 201:
+            raise SystemExit(f"No se pudo subir la imagen de prueba: {response.status_code} {response.text}")
+        context["image_id"] = response.json()["file_id"]
+    return context
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=ROOT_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current, baseline, threshold):
+    """
+    Compara los resultados con los de una ejecución anterior.
+
+    Args:
+        current: Resultados actuales
+        baseline: Resultados de referencia
+        threshold: Porcentaje de empeoramiento tolerado
+
+    Returns:
+        list: Regresiones {endpoint, concurrency, metric, baseline, current, change_percent}
+    """
+    regressions = []
+    for endpoint, levels in current["endpoints"].items():
+        for concurrency, stats in levels.items():
+            previous = baseline.get("endpoints", {}).get(endpoint, {}).get(concurrency)
+            if not previous:
+                continue
+            for metric, higher_is_worse in COMPARED_METRICS:
+                before, after = previous.get(metric), stats.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before * 100
+                if (change if higher_is_worse else -change) > threshold:
+                    regressions.append({
+                        "endpoint": endpoint,
+                        "concurrency": int(concurrency),
+                        "metric": metric,
+                        "baseline": before,
+                        "current": after,
+                        "change_percent": round(change, 1)
+                    })
+    return regressions
+
+def print_report(results, baseline=None):
+    """
+    Imprime la tabla de resultados y, si hay referencia, la variación del p95 y del rendimiento.
+    """
+    header = f"{'endpoint':<24}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errores':>9}"
+    if baseline:
+        header += f"{'Δp95':>9}{'Δreq/s':>9}"
+    print(header)
+    print("-" * len(header))
+
+    def fmt(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    for endpoint, levels in results["endpoints"].items():
+        for concurrency, stats in levels.items():
+            line = (
+                f"{ENDPOINTS[endpoint][0]:<24}{concurrency:>6}{stats['throughput_rps']:>10.1f}"
+                f"{fmt(stats['p50']):>10}{fmt(stats['p95']):>10}{fmt(stats['p99']):>10}{stats['errors']:>9}"
+            )
+            previous = (baseline or {}).get("endpoints", {}).get(endpoint, {}).get(concurrency)
+            if previous:
+                for metric in ("p95", "throughput_rps"):
+                    before, after = previous.get(metric), stats.get(metric)
+                    change = f"{(after - before) / before * 100:+.0f}%" if before and after is not None else "-"
+                    line += f"{change:>9}"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de carga y latencia de la API")
+    parser.add_argument("--url", help="URL de un backend ya en ejecución (por defecto se inicia uno con create_app)")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017", help="mongod usado por el backend iniciado")
+    parser.add_argument("--db", default="back_ia_benchmark", help="Base de datos de la prueba (se vacía al empezar)")
+    parser.add_argument("--mqtt-host", default="127.0.0.1", help="Broker MQTT del backend iniciado (nunca el de .env)")
+    parser.add_argument("--keep-db", action="store_true", help="No vaciar la base de datos de la prueba")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Endpoints a probar ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--concurrency", default="1,8,32", help="Niveles de concurrencia separados por comas")
+    parser.add_argument("--duration", type=float, default=10, help="Segundos medidos por escenario")
+    parser.add_argument("--warmup", type=float, default=2, help="Segundos sin medir al inicio de cada escenario")
+    parser.add_argument("--timeout", type=float, default=30, help="Tiempo máximo por solicitud en segundos")
+    parser.add_argument("--image", default=DEFAULT_IMAGE, help="Imagen para los endpoints de subida y descarga")
+    parser.add_argument("--output-dir", default="benchmark_results", help="Carpeta de los resultados JSON")
+    parser.add_argument("--compare", help="Resultados JSON de referencia para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=10, help="Porcentaje de empeoramiento tolerado al comparar")
+    # Uso interno: proceso del backend iniciado por start_server
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        _serve(args.serve)
+        return
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Endpoints desconocidos: {', '.join(unknown)}")
+    try:
+        levels = [int(level) for level in args.concurrency.split(",")]
+    except ValueError:
+        parser.error("--concurrency debe ser una lista de enteros")
+    if any(level < 1 for level in levels):
+        parser.error("--concurrency debe ser mayor que 0")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    process = None
+    base_url = args.url.rstrip("/") if args.url else None
+    # Con --url solo se conoce la configuración local, no necesariamente la del servidor
+    server_settings = {name: getattr(settings, name, None) for name in RECORDED_SETTINGS}
+    if not base_url:
+        # La base de datos de la prueba se vacía: nunca la configurada en .env
+        if args.db == os.getenv("MONGODB_DB"):
+            parser.error(f"--db no puede ser la base de datos de la aplicación ({args.db})")
+        if not args.keep_db:
+            from pymongo import MongoClient
+            from pymongo.errors import PyMongoError
+            client = MongoClient(args.mongo_url, serverSelectionTimeoutMS=5000)
+            try:
+                client.drop_database(args.db)
+            except PyMongoError as e:
+                raise SystemExit(f"No se pudo conectar a {args.mongo_url}: {str(e)}")
+            finally:
+                client.close()
+        log_path = os.path.join(args.output_dir, "server.log")
+        print(f"🚀 Iniciando el backend contra {args.mongo_url}/{args.db} (registro en {log_path})")
+        process, base_url, server_settings = start_server(args.mongo_url, args.db, log_path, args.mqtt_host)
+
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    results = {
+        "started_at": started_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "server": "external" if args.url else "werkzeug (create_app)",
+        "config": {
+            "endpoints": endpoints,
+            "concurrency": levels,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "image_bytes": os.path.getsize(args.image)
+        },
+        "settings": server_settings,
+        "endpoints": {}
+    }
+
+    try:
+        context = prepare_context(base_url, endpoints, args.image, args.timeout)
+        for endpoint in endpoints:
+            route, send = ENDPOINTS[endpoint]
+            for level in levels:
+                print(f"⏱️ {route} con {level} clientes...")
+                stats = run_scenario(base_url, send, context, level, args.duration, args.warmup)
+                results["endpoints"].setdefault(endpoint, {})[str(level)] = stats
+    finally:
+        if process:
+            _stop_server(process)
+
+    results["finished_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    regressions = []
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        results["baseline"] = {"file": args.compare, "started_at": baseline.get("started_at"), "threshold": args.threshold}
+        results["regressions"] = regressions
+
+    output = os.path.join(args.output_dir, f"benchmark-{started_at.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print()
+    print_report(results, baseline)
+    print(f"\n💾 Resultados guardados en {output}")
+
+    if baseline:
+        for regression in regressions:
+            print(
+                f"⚠️ Regresión en {ENDPOINTS[regression['endpoint']][0]} con {regression['concurrency']} clientes: "
+                f"{regression['metric']} {regression['baseline']} -> {regression['current']} ({regression['change_percent']:+}%)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Sin regresiones mayores al {args.threshold}% respecto a {args.compare}")
+
+if __name__ == "__main__":
+    main()
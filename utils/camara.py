@@ -51,7 +51,7 @@ def capture_image():
         logger.error(f"[✗] Error de conexión: {e}")
         return False, None, None
 
-def start_capture_thread(image_model=None, aws_face_model=None, mqtt_client=None, interval=20):
+def start_capture_thread(image_model=None, aws_face_model=None, mqtt_client=None, interval=20, event_hub=None):
     """
     Inicia un hilo para capturar imágenes periódicamente.
     
@@ -60,6 +60,7 @@ def start_capture_thread(image_model=None, aws_face_model=None, mqtt_client=None
         aws_face_model: Modelo para detectar rostros en AWS (opcional)
         mqtt_client: Cliente MQTT para enviar alertas (opcional)
         interval: Intervalo en segundos entre capturas (por defecto 20)
+        event_hub: Hub de eventos para publicar las detecciones en el feed en vivo (opcional)
     """
     def capture_thread():
         logger.info(f"Iniciando captura automática cada {interval} segundos")
@@ -147,6 +148,18 @@ def start_capture_thread(image_model=None, aws_face_model=None, mqtt_client=None
                     image_model.update_image_metadata(file_id, detection_info)
                     
                     logger.info(f"Metadatos de detección actualizados para la imagen {file_id}")
+
+                    # Publicar la detección en el feed en vivo
+                    if event_hub:
+                        event_hub.publish("deteccion", {
+                            "image_id": str(file_id),
+                            "filename": filename,
+                            "source": "ESP32-CAM",
+                            "status": result.get("status"),
+                            "has_persons": detection_info.get("has_persons", False),
+                            "total_persons": detection_info.get("total_persons", 0),
+                            "timestamp": detection_info["detection_time"]
+                        })
                 
             except Exception as e:
                 logger.error(f"Error en el hilo de captura: {e}")
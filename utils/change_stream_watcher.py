@@ -0,0 +1,165 @@
+"""
+Observador de change streams de MongoDB para compartir eventos entre instancias.
+"""
+
+import threading
+import time
+import logging
+from pymongo.errors import PyMongoError, OperationFailure
+
+logger = logging.getLogger("change_stream_watcher")
+
+# Código de MongoDB cuando el resume token ya no está en el oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+class ChangeStreamWatcher:
+    """
+    Sigue los change streams de varias colecciones y entrega cada cambio a su manejador.
+
+    Cada colección se sigue en su propio hilo. El resume token del último
+    cambio procesado se guarda en la colección change_stream_tokens (por
+    instancia y colección), de modo que tras una caída se reanuda desde ese
+    punto sin perder ni repetir eventos. Si el token ya no está en el oplog
+    se continúa desde el momento actual.
+
+    Requiere que MongoDB se ejecute como replica set (puede ser de un solo nodo).
+    """
+
+    def __init__(self, db, handlers, instance_id, save_every=50, save_interval=1.0):
+        """
+        Inicializa el observador.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            handlers: Diccionario {nombre_coleccion: función(change)}
+            instance_id: Identificador de esta instancia para sus resume tokens
+            save_every: Cambios procesados entre escrituras del resume token
+            save_interval: Segundos máximos entre escrituras del resume token
+        """
+        self.db = db
+        self.handlers = handlers
+        self.instance_id = instance_id
+        self.save_every = save_every
+        self.save_interval = save_interval
+        self.tokens = db.change_stream_tokens
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.stats = {name: {"events": 0, "errors": 0, "restarts": 0} for name in handlers}
+
+    def _token_id(self, collection_name):
+        return f"{self.instance_id}:{collection_name}"
+
+    def _load_token(self, collection_name):
+        doc = self.tokens.find_one({"_id": self._token_id(collection_name)})
+        return doc.get("token") if doc else None
+
+    def _save_token(self, collection_name, token):
+        self.tokens.update_one(
+            {"_id": self._token_id(collection_name)},
+            {"$set": {"token": token, "updated_at": time.time()}},
+            upsert=True
+        )
+
+    def _save_pending_token(self, collection_name, token):
+        # Sin conexión el token no se guarda, pero el error original no debe ocultarse
+        try:
+            self._save_token(collection_name, token)
+        except PyMongoError as e:
+            logger.error(f"No se pudo guardar el resume token de {collection_name}: {str(e)}")
+
+    def _count(self, collection_name, key):
+        with self._lock:
+            self.stats[collection_name][key] += 1
+
+    def start(self):
+        """
+        Inicia un hilo por colección.
+        """
+        for collection_name in self.handlers:
+            thread = threading.Thread(
+                target=self._watch,
+                args=(collection_name,),
+                name=f"change-stream-{collection_name}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Change streams iniciados para: {', '.join(self.handlers)}")
+
+    def stop(self, timeout=5):
+        """
+        Detiene los hilos, que guardan su último resume token al salir.
+
+        Args:
+            timeout: Segundos máximos de espera por cada hilo
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _watch(self, collection_name):
+        """
+        Sigue el change stream de una colección, reconectando ante errores.
+
+        Args:
+            collection_name: Nombre de la colección
+        """
+        handler = self.handlers[collection_name]
+        collection = self.db[collection_name]
+        backoff = 1
+
+        while not self._stop.is_set():
+            token = self._load_token(collection_name)
+            pending = 0
+            last_saved = time.monotonic()
+            try:
+                with collection.watch(
+                    full_document="updateLookup",
+                    resume_after=token,
+                    max_await_time_ms=1000
+                ) as stream:
+                    backoff = 1
+                    try:
+                        while not self._stop.is_set() and stream.alive:
+                            change = stream.try_next()
+                            if change is not None:
+                                try:
+                                    handler(change)
+                                except Exception as e:
+                                    self._count(collection_name, "errors")
+                                    logger.error(f"Error al procesar un cambio de {collection_name}: {str(e)}")
+                                self._count(collection_name, "events")
+                                pending += 1
+
+                            # Guardar el token por lotes para no escribir en cada cambio
+                            if pending and (pending >= self.save_every or time.monotonic() - last_saved >= self.save_interval):
+                                self._save_token(collection_name, stream.resume_token)
+                                pending = 0
+                                last_saved = time.monotonic()
+                    finally:
+                        # También si el stream falla: lo ya procesado no debe repetirse al reanudar
+                        if pending:
+                            self._save_pending_token(collection_name, stream.resume_token)
+
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_HISTORY_LOST and token is not None:
+                    logger.warning(f"El resume token de {collection_name} ya no está en el oplog, se continúa desde ahora")
+                    self.tokens.delete_one({"_id": self._token_id(collection_name)})
+                else:
+                    logger.error(f"Error en el change stream de {collection_name}: {str(e)}")
+                self._count(collection_name, "restarts")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            except PyMongoError as e:
+                logger.error(f"Change stream de {collection_name} interrumpido: {str(e)}")
+                self._count(collection_name, "restarts")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "instance_id": self.instance_id,
+                "collections": {name: dict(values) for name, values in self.stats.items()}
+            }
@@ -0,0 +1,200 @@
+"""
+Hub de eventos en memoria para el feed en vivo (Server-Sent Events).
+"""
+
+from collections import deque
+import itertools
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger("event_hub")
+
+class Subscription:
+    """
+    Suscripción de un cliente al hub, con un buffer acotado propio.
+
+    Si el cliente no consume a tiempo se descartan los eventos más antiguos
+    de su buffer (sin afectar a los demás clientes) y se cuenta cuántos se
+    perdieron para avisarle.
+    """
+
+    def __init__(self, buffer_size, types=None):
+        """
+        Inicializa la suscripción.
+
+        Args:
+            buffer_size: Número máximo de eventos pendientes del cliente
+            types: Conjunto de tipos de evento a recibir (None = todos)
+        """
+        self.types = set(types) if types else None
+        self.dropped = 0
+        self._events = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def accepts(self, event):
+        return self.types is None or event["type"] in self.types
+
+    def put(self, event):
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        """
+        Espera y obtiene los eventos pendientes.
+
+        Args:
+            timeout: Segundos máximos de espera
+
+        Returns:
+            tuple: (events, dropped) con los eventos pendientes y los descartados
+                desde la llamada anterior
+        """
+        with self._condition:
+            if not self._events and not self._closed:
+                self._condition.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            dropped, self.dropped = self.dropped, 0
+            return events, dropped
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+class EventHub:
+    """
+    Pub/sub en proceso que alimenta el feed en vivo de lecturas, predicciones y detecciones.
+
+    Los eventos reciben un ID "<epoca>:<secuencia>". Se conservan los
+    últimos `history_size` para que un cliente que se reconecta con
+    Last-Event-ID reciba lo que se perdió; si el ID pertenece a otra época
+    (el proceso se reinició) o ya salió del historial, se le indica que
+    debe recargar el estado por la API REST.
+    """
+
+    def __init__(self, history_size=1000, client_buffer_size=256, max_clients=100):
+        """
+        Inicializa el hub.
+
+        Args:
+            history_size: Eventos recientes conservados para reanudar
+            client_buffer_size: Eventos pendientes máximos por cliente
+            max_clients: Clientes conectados máximos
+        """
+        self.epoch = uuid.uuid4().hex[:8]
+        self.client_buffer_size = client_buffer_size
+        self.max_clients = max_clients
+        self._history = deque(maxlen=history_size)
+        self._sequence = itertools.count(1)
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._published = 0
+
+    def publish(self, event_type, data):
+        """
+        Publica un evento para todos los clientes suscritos a su tipo.
+
+        Args:
+            event_type: Tipo de evento (mensaje, prediccion, deteccion, ...)
+            data: Contenido del evento (serializable a JSON)
+
+        Returns:
+            str: ID del evento
+        """
+        with self._lock:
+            event = {
+                "id": f"{self.epoch}:{next(self._sequence)}",
+                "type": event_type,
+                "data": data,
+                "time": time.time()
+            }
+            self._history.append(event)
+            self._published += 1
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.accepts(event):
+                subscription.put(event)
+        return event["id"]
+
+    def subscribe(self, last_event_id=None, types=None):
+        """
+        Registra un cliente.
+
+        Args:
+            last_event_id: Último ID recibido por el cliente (cabecera Last-Event-ID)
+            types: Tipos de evento a recibir (None = todos)
+
+        Returns:
+            tuple: (subscription, resumed) donde resumed es False si no se pudo
+                reanudar desde last_event_id; o (None, False) si se alcanzó el
+                máximo de clientes
+        """
+        subscription = Subscription(self.client_buffer_size, types)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_clients:
+                return None, False
+
+            resumed = True
+            if last_event_id:
+                missed = self._events_after(last_event_id)
+                if missed is None:
+                    resumed = False
+                else:
+                    for event in missed:
+                        if subscription.accepts(event):
+                            subscription.put(event)
+
+            self._subscriptions.add(subscription)
+
+        logger.info(f"Cliente suscrito al feed de eventos ({len(self._subscriptions)} conectados)")
+        return subscription, resumed
+
+    def _events_after(self, last_event_id):
+        """
+        Obtiene los eventos del historial posteriores a un ID.
+
+        Returns:
+            list: Eventos posteriores, o None si el ID no es de esta época o
+                ya no está en el historial
+        """
+        epoch, _, sequence = last_event_id.partition(":")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+        sequence = int(sequence)
+
+        if self._history and int(self._history[0]["id"].partition(":")[2]) > sequence + 1:
+            return None
+        return [event for event in self._history if int(event["id"].partition(":")[2]) > sequence]
+
+    def unsubscribe(self, subscription):
+        """
+        Elimina un cliente.
+
+        Args:
+            subscription: Suscripción devuelta por subscribe()
+        """
+        subscription.close()
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "clients": len(self._subscriptions),
+                "max_clients": self.max_clients,
+                "published": self._published,
+                "history": len(self._history)
+            }
@@ -0,0 +1,408 @@
+"""
+Capa compartida de clientes HTTP para los modelos remotos.
+
+Proporciona sesiones con conexiones persistentes, timeouts de conexión y
+lectura, reintentos con retroceso exponencial y jitter para llamadas
+idempotentes, y un circuit breaker que falla rápido mientras el
+endpoint no está sano.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import settings
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("http_client")
+
+# Códigos de estado que justifican un reintento
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Se lanza cuando el circuit breaker está abierto y la llamada no se realiza.
+    """
+
+class CircuitBreaker:
+    """
+    Circuit breaker con estados closed, open y half_open.
+
+    Tras `failure_threshold` fallos consecutivos se abre y rechaza las
+    llamadas durante `recovery_timeout` segundos; después deja pasar una
+    llamada de prueba y se cierra si tiene éxito.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.total_failures = 0
+        self.total_rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Indica si se puede realizar una llamada.
+
+        Returns:
+            bool: True si la llamada está permitida
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.total_rejected += 1
+                    return False
+                self.state = "half_open"
+                self._probe_in_flight = False
+
+            if self.state == "half_open":
+                # Solo una llamada de prueba a la vez
+                if self._probe_in_flight:
+                    self.total_rejected += 1
+                    return False
+                self._probe_in_flight = True
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit breaker '{self.name}' cerrado")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit breaker '{self.name}' abierto tras {self.consecutive_failures} fallos")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_state(self):
+        """
+        Obtiene el estado del circuit breaker.
+
+        Returns:
+            dict: Estado y contadores
+        """
+        with self._lock:
+            retry_in = None
+            if self.state == "open":
+                retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self.opened_at), 1))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "total_rejected": self.total_rejected,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": retry_in
+            }
+
+class ResilientHTTPClient:
+    """
+    Cliente HTTP con sesión compartida, timeouts, reintentos y circuit breaker.
+    """
+
+    def __init__(self, name, connect_timeout=3.05, read_timeout=15, max_retries=2,
+                 backoff_base=0.5, backoff_max=8, pool_size=10,
+                 failure_threshold=5, recovery_timeout=30):
+        """
+        Inicializa el cliente.
+
+        Args:
+            name: Nombre del cliente (se muestra en el estado)
+            connect_timeout: Segundos máximos para establecer la conexión
+            read_timeout: Segundos máximos de espera de la respuesta
+            max_retries: Reintentos para llamadas idempotentes
+            backoff_base: Base en segundos del retroceso exponencial
+            backoff_max: Retroceso máximo en segundos
+            pool_size: Conexiones persistentes por host
+            failure_threshold: Fallos consecutivos que abren el circuito
+            recovery_timeout: Segundos que el circuito permanece abierto
+        """
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(name, failure_threshold, recovery_timeout)
+
+        # Sesión con pool de conexiones keep-alive; los reintentos se gestionan aquí
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.total_requests = 0
+        self.total_retries = 0
+        # Los contadores se actualizan desde hilos de peticiones y del hedger
+        self._lock = threading.Lock()
+
+        # Hedger asociado (opcional), para exportar sus estadísticas
+        self.hedger = None
+
+    def post(self, url, idempotent=False, **kwargs):
+        """
+        Envía una solicitud POST.
+
+        Args:
+            url: URL destino
+            idempotent: Si la llamada puede reintentarse sin efectos secundarios
+            **kwargs: Argumentos adicionales para requests (json, headers, ...)
+
+        Returns:
+            requests.Response: Respuesta con estado exitoso
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+            requests.exceptions.RequestException: Si la llamada falla tras los reintentos
+        """
+        return self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    def request(self, method, url, idempotent=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempts = 1 + (self.max_retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuito abierto para '{self.name}', llamada rechazada")
+
+            with self._lock:
+                self.total_requests += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout,
+                    requests.exceptions.HTTPError) as e:
+                self.breaker.record_failure()
+                if attempt + 1 >= attempts:
+                    raise
+                delay = self._backoff(attempt)
+                with self._lock:
+                    self.total_retries += 1
+                logger.warning(f"[{self.name}] Intento {attempt + 1} fallido ({e}), reintentando en {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            except Exception:
+                # Otros errores (redirecciones, respuestas corruptas, URL inválida) no se
+                # reintentan, pero deben registrarse para liberar la prueba del semiabierto
+                self.breaker.record_failure()
+                raise
+
+            # Los errores 4xx son del cliente: no indican que el endpoint esté caído
+            self.breaker.record_success()
+            response.raise_for_status()
+            return response
+
+    def _backoff(self, attempt):
+        # Retroceso exponencial con jitter completo
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas del cliente y el estado de su circuit breaker.
+
+        Returns:
+            dict: Estadísticas del cliente
+        """
+        with self._lock:
+            total_requests = self.total_requests
+            total_retries = self.total_retries
+        stats = {
+            "total_requests": total_requests,
+            "total_retries": total_retries,
+            "timeout": {"connect": self.timeout[0], "read": self.timeout[1]},
+            "circuit_breaker": self.breaker.get_state()
+        }
+        if self.hedger:
+            stats["hedging"] = self.hedger.get_stats()
+        return stats
+
+class RequestHedger:
+    """
+    Envía solicitudes duplicadas (hedging) para recortar la latencia de cola.
+
+    Si la solicitud original no responde antes de un retraso calculado como
+    un percentil de las latencias recientes, se envía una copia y se usa la
+    primera respuesta que llegue. La proporción de solicitudes duplicadas se
+    limita para acotar el coste.
+    """
+
+    def __init__(self, client, percentile=95, initial_delay=1.0, min_delay=0.05, max_delay=5.0,
+                 max_hedge_ratio=0.1, window_size=200, min_samples=20, workers=8):
+        """
+        Inicializa el hedger.
+
+        Args:
+            client: ResilientHTTPClient que realiza las llamadas
+            percentile: Percentil de latencia tras el que se envía la copia
+            initial_delay: Retraso usado hasta tener suficientes muestras
+            min_delay: Retraso mínimo en segundos
+            max_delay: Retraso máximo en segundos
+            max_hedge_ratio: Proporción máxima de solicitudes duplicadas
+            window_size: Número de latencias recientes consideradas
+            min_samples: Muestras necesarias para usar el percentil
+            workers: Hilos disponibles para las solicitudes en curso
+        """
+        self.client = client
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window_size)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"hedge_{client.name}")
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.total_hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+
+        client.hedger = self
+
+    def hedge_delay(self):
+        """
+        Calcula el retraso antes de enviar la copia.
+
+        Returns:
+            float: Segundos de espera
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        index = min(len(samples) - 1, int(round(self.percentile / 100 * (len(samples) - 1))))
+        return min(self.max_delay, max(self.min_delay, samples[index]))
+
+    def post(self, url, **kwargs):
+        """
+        Envía una solicitud POST idempotente con hedging.
+
+        Returns:
+            requests.Response: Primera respuesta exitosa
+        """
+        with self._lock:
+            self.total_requests += 1
+
+        delay = self.hedge_delay()
+        primary = self._executor.submit(self._timed_post, url, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        if not self._hedge_allowed():
+            return primary.result()
+
+        logger.info(f"[{self.client.name}] Sin respuesta tras {delay:.3f}s, enviando solicitud duplicada")
+        hedge = self._executor.submit(self._timed_post, url, kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if future is hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return response
+        raise error
+
+    def _hedge_allowed(self):
+        with self._lock:
+            if self.total_hedged + 1 > self.max_hedge_ratio * self.total_requests:
+                self.hedges_skipped += 1
+                return False
+            self.total_hedged += 1
+            return True
+
+    def _timed_post(self, url, kwargs):
+        start = time.monotonic()
+        response = self.client.post(url, idempotent=True, **kwargs)
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return response
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas de hedging.
+
+        Returns:
+            dict: Solicitudes, copias enviadas, copias ganadoras y retraso actual
+        """
+        delay = self.hedge_delay()
+        with self._lock:
+            return {
+                "total_requests": self.total_requests,
+                "hedged": self.total_hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedges_skipped": self.hedges_skipped,
+                "max_hedge_ratio": self.max_hedge_ratio,
+                "percentile": self.percentile,
+                "current_delay": round(delay, 4),
+                "samples": len(self._latencies)
+            }
+
+# Clientes compartidos por nombre
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_http_client(name):
+    """
+    Obtiene (o crea) el cliente compartido con el nombre indicado.
+
+    Args:
+        name: Nombre del cliente
+
+    Returns:
+        ResilientHTTPClient: Cliente compartido
+    """
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ResilientHTTPClient(
+                name,
+                connect_timeout=settings.REMOTE_CONNECT_TIMEOUT,
+                read_timeout=settings.REMOTE_READ_TIMEOUT,
+                max_retries=settings.REMOTE_MAX_RETRIES,
+                backoff_base=settings.REMOTE_BACKOFF_BASE,
+                backoff_max=settings.REMOTE_BACKOFF_MAX,
+                pool_size=settings.REMOTE_POOL_SIZE,
+                failure_threshold=settings.BREAKER_FAILURE_THRESHOLD,
+                recovery_timeout=settings.BREAKER_RECOVERY_SECONDS
+            )
+        return _clients[name]
+
+def get_http_clients_stats():
+    """
+    Obtiene las estadísticas de todos los clientes compartidos.
+
+    Returns:
+        dict: Estadísticas por nombre de cliente
+    """
+    with _clients_lock:
+        return {name: client.get_stats() for name, client in _clients.items()}
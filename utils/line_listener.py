@@ -0,0 +1,304 @@
+"""
+Receptor UDP/TCP de lecturas en line protocol para dispositivos sin MQTT.
+
+Cada línea es una lectura '<tópico>[,tags] valor=<v> [timestamp]' (el mismo
+formato que acepta /api/mensajes/batch con Content-Type text/plain). Las
+lecturas se agrupan y se guardan con la misma ingesta por lotes que el
+endpoint HTTP.
+
+Puede ejecutarse dentro del backend (LINE_LISTENER_ENABLED=true) o como
+proceso independiente:
+    python -m utils.line_listener
+"""
+
+import asyncio
+import threading
+import time
+import logging
+from utils.message_codecs import parse_line
+
+logger = logging.getLogger("line_listener")
+
+# Longitud máxima de una línea TCP
+MAX_LINE_BYTES = 64 * 1024
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    def __init__(self, listener):
+        self.listener = listener
+
+    def datagram_received(self, data, addr):
+        address = addr[0]
+        for message in self.listener._parse_lines(data.splitlines(), address):
+            try:
+                self.listener._queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.listener._count(address, "dropped")
+
+class LineProtocolListener:
+    """
+    Servidor asyncio (UDP y TCP) que recibe lecturas separadas por saltos de línea.
+
+    Las lecturas válidas esperan en una cola acotada y se guardan por lotes
+    de `batch_size` o cada `batch_interval` segundos. Con la cola llena, las
+    lecturas UDP se descartan y las conexiones TCP dejan de leerse hasta que
+    haya espacio. Por cada origen (IP) se cuentan las líneas recibidas,
+    guardadas, descartadas y con error de formato o de escritura.
+    """
+
+    def __init__(self, ingest_batch, host="0.0.0.0", udp_port=8094, tcp_port=8094,
+                 batch_size=500, batch_interval=0.5, max_pending=10000, source="line_protocol"):
+        """
+        Inicializa el receptor.
+
+        Args:
+            ingest_batch: Función ingest_batch(messages, source) que guarda una
+                lista de tuplas (topic, valor) y devuelve (inserted_ids, write_errors)
+            host: Dirección en la que escuchar
+            udp_port: Puerto UDP (0 = desactivado)
+            tcp_port: Puerto TCP (0 = desactivado)
+            batch_size: Lecturas máximas por lote
+            batch_interval: Segundos máximos que una lectura espera en la cola
+            max_pending: Lecturas máximas en cola antes de descartar
+            source: Origen registrado en los documentos guardados
+        """
+        self.ingest_batch = ingest_batch
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_pending = max_pending
+        self.source = source
+
+        self.loop = None
+        self._queue = None
+        self._stopping = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.sources = {}
+
+    def _count(self, address, key, amount=1):
+        with self._lock:
+            counters = self.sources.get(address)
+            if counters is None:
+                counters = self.sources[address] = {
+                    "received": 0, "stored": 0, "dropped": 0, "parse_errors": 0, "write_errors": 0
+                }
+            counters[key] += amount
+
+    def _parse_lines(self, lines, address):
+        """
+        Interpreta líneas recibidas.
+
+        Args:
+            lines: Lista de líneas en bytes
+            address: IP de origen
+
+        Returns:
+            list: Lecturas válidas (topic, valor, address)
+        """
+        messages = []
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line or line.startswith("#"):
+                continue
+            self._count(address, "received")
+            try:
+                message = parse_line(line)
+            except ValueError as e:
+                self._count(address, "parse_errors")
+                logger.debug(f"Línea inválida de {address}: {line} ({str(e)})")
+                continue
+            messages.append((message["topic"], message["valor"], address))
+        return messages
+
+    async def _handle_tcp(self, reader, writer):
+        """
+        Atiende una conexión TCP leyendo una lectura por línea.
+        """
+        address = (writer.get_extra_info("peername") or ("desconocido",))[0]
+        try:
+            while not self._stopping.is_set():
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError as e:
+                    # Conexión cerrada: la última línea puede no tener salto de línea
+                    line = e.partial
+                    if not line:
+                        break
+                except asyncio.LimitOverrunError:
+                    self._count(address, "parse_errors")
+                    logger.warning(f"Línea demasiado larga de {address}, se cierra la conexión")
+                    break
+                # TCP es confiable: con la cola llena se espera en lugar de descartar
+                for message in self._parse_lines([line], address):
+                    await self._queue.put(message)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _next_batch(self):
+        """
+        Reúne el siguiente lote hasta completarlo o vencer el intervalo desde su primera lectura.
+
+        Returns:
+            list: Lecturas (topic, valor, address); vacía si no llegó ninguna
+        """
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.batch_interval if deadline is None else deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                if batch or self._stopping.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = self.loop.time() + self.batch_interval
+        return batch
+
+    async def _write(self, batch):
+        """
+        Guarda un lote fuera del bucle de eventos y actualiza los contadores por origen.
+        """
+        messages = [(topic, valor) for topic, valor, _ in batch]
+        try:
+            _, write_errors = await self.loop.run_in_executor(
+                None, lambda: self.ingest_batch(messages, source=self.source)
+            )
+        except Exception as e:
+            logger.error(f"Error al guardar un lote de {len(batch)} lecturas: {str(e)}")
+            write_errors = [{"index": index} for index in range(len(batch))]
+
+        failed = {error["index"] for error in write_errors}
+        for index, (_, _, address) in enumerate(batch):
+            self._count(address, "write_errors" if index in failed else "stored")
+        self.batches += 1
+
+    async def _writer(self):
+        # Al detenerse se siguen escribiendo lotes hasta vaciar la cola
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._write(batch)
+
+    async def _run(self):
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._stopping = asyncio.Event()
+
+        transport = None
+        server = None
+        try:
+            if self.udp_port:
+                transport, _ = await self.loop.create_datagram_endpoint(
+                    lambda: _UDPProtocol(self), local_addr=(self.host, self.udp_port)
+                )
+                logger.info(f"Receptor UDP de line protocol en {self.host}:{self.udp_port}")
+            if self.tcp_port:
+                server = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port, limit=MAX_LINE_BYTES)
+                logger.info(f"Receptor TCP de line protocol en {self.host}:{self.tcp_port}")
+        finally:
+            self._ready.set()
+
+        writer = asyncio.create_task(self._writer())
+        await self._stopping.wait()
+
+        # Dejar de aceptar datos y esperar a que se guarde lo que quedó en la cola
+        if transport:
+            transport.close()
+        if server:
+            server.close()
+        await writer
+
+    def _serve(self):
+        try:
+            asyncio.run(self._run())
+        except OSError as e:
+            logger.error(f"No se pudo iniciar el receptor de line protocol: {str(e)}")
+
+    def start(self):
+        """
+        Inicia el receptor en un hilo con su propio bucle de asyncio.
+        """
+        self._thread = threading.Thread(target=self._serve, name="line-listener", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self, timeout=10):
+        """
+        Detiene el receptor guardando las lecturas en cola.
+
+        Args:
+            timeout: Segundos máximos de espera
+        """
+        if self.loop and self._stopping:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread:
+            self._thread.join(timeout)
+            logger.info("Receptor de line protocol detenido")
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas del receptor.
+
+        Returns:
+            dict: Puertos, lecturas en cola, lotes y contadores por origen
+        """
+        with self._lock:
+            sources = {address: dict(counters) for address, counters in self.sources.items()}
+        return {
+            "udp_port": self.udp_port,
+            "tcp_port": self.tcp_port,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "sources": sources
+        }
+
+def main():
+    from config.database import get_database_connection, close_connection
+    from config import settings
+    from utils.mqtt_client import MQTTClient
+    from controllers.mqtt_controller import MQTTController
+
+    client, db, _ = get_database_connection()
+    mqtt_client = MQTTClient(
+        broker_host=settings.MQTT_BROKER_HOST,
+        broker_port=settings.MQTT_BROKER_PORT,
+        client_id="line_listener_publisher",
+        qos=settings.MQTT_PUBLISH_QOS,
+        buffer_size=settings.MQTT_PUBLISH_BUFFER_SIZE
+    )
+    controller = MQTTController(db, mqtt_client=mqtt_client)
+    listener = LineProtocolListener(
+        controller.ingest_messages,
+        host=settings.LINE_LISTENER_HOST,
+        udp_port=settings.LINE_LISTENER_UDP_PORT,
+        tcp_port=settings.LINE_LISTENER_TCP_PORT,
+        batch_size=settings.LINE_LISTENER_BATCH_SIZE,
+        batch_interval=settings.LINE_LISTENER_BATCH_INTERVAL,
+        max_pending=settings.LINE_LISTENER_MAX_PENDING
+    )
+    listener.start()
+    print("📡 Receptor de line protocol en ejecución (Ctrl+C para detener)")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {listener.get_stats()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+        controller.prediction_worker.stop()
+        controller.flush_writes()
+        mqtt_client.close()
+        close_connection(client)
+
+if __name__ == "__main__":
+    main()
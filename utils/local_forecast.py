@@ -0,0 +1,124 @@
+"""
+Motor local de pronóstico de temperatura con NumPy.
+
+Sirve como nivel rápido, como respaldo cuando el modelo de AWS falla
+o en modo sombra para comparar ambos resultados.
+"""
+
+import logging
+import time
+import numpy as np
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("local_forecast")
+
+METHODS = ("linear", "ar", "holt", "ensemble")
+
+class LocalForecastModel:
+    """
+    Pronóstico local de la siguiente temperatura a partir de una ventana de lecturas.
+
+    Métodos disponibles:
+        - linear: tendencia lineal por mínimos cuadrados
+        - ar: modelo autorregresivo AR(p) ajustado por mínimos cuadrados
+        - holt: suavizado exponencial doble de Holt (nivel y tendencia)
+        - ensemble: promedio de los tres anteriores
+    """
+
+    def __init__(self, method="ensemble", horizon=1, ar_order=3, alpha=0.5, beta=0.3):
+        """
+        Inicializa el motor local.
+
+        Args:
+            method: Método de pronóstico (linear, ar, holt o ensemble)
+            horizon: Pasos hacia adelante a pronosticar
+            ar_order: Orden p del modelo autorregresivo
+            alpha: Factor de suavizado del nivel (Holt)
+            beta: Factor de suavizado de la tendencia (Holt)
+        """
+        if method not in METHODS:
+            raise ValueError(f"Método de pronóstico desconocido: {method}")
+        self.method = method
+        self.horizon = horizon
+        self.ar_order = ar_order
+        self.alpha = alpha
+        self.beta = beta
+
+        logger.info(f"LocalForecastModel inicializado con método: {method}")
+
+    def predict(self, temperatures):
+        """
+        Pronostica la temperatura a partir de la ventana.
+
+        Args:
+            temperatures: Lista de valores de temperatura
+
+        Returns:
+            dict: Resultado con el mismo formato que AWSModel.predict
+        """
+        try:
+            start = time.perf_counter()
+            values = np.asarray(temperatures, dtype=np.float64)
+            if values.size < 2 or not np.all(np.isfinite(values)):
+                raise ValueError("La ventana debe tener al menos 2 valores numéricos finitos")
+
+            forecasts = {}
+            if self.method in ("linear", "ensemble"):
+                forecasts["linear"] = self._linear(values)
+            if self.method in ("ar", "ensemble"):
+                forecasts["ar"] = self._autoregressive(values)
+            if self.method in ("holt", "ensemble"):
+                forecasts["holt"] = self._holt(values)
+
+            prediction = float(np.mean(list(forecasts.values())))
+
+            return {
+                "status": "success",
+                "prediction": round(prediction, 4),
+                "engine": f"local:{self.method}",
+                "components": {name: round(float(value), 4) for name, value in forecasts.items()},
+                "elapsed_us": round((time.perf_counter() - start) * 1e6, 1)
+            }
+
+        except Exception as e:
+            logger.error(f"Error en el pronóstico local: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Error en el pronóstico local: {str(e)}",
+                "engine": f"local:{self.method}"
+            }
+
+    def _linear(self, values):
+        # Regresión lineal en forma cerrada sobre x = 0..n-1
+        x = np.arange(values.size, dtype=np.float64)
+        x_centered = x - x.mean()
+        slope = np.dot(x_centered, values - values.mean()) / np.dot(x_centered, x_centered)
+        intercept = values.mean() - slope * x.mean()
+        return intercept + slope * (values.size - 1 + self.horizon)
+
+    def _autoregressive(self, values):
+        p = min(self.ar_order, values.size - 1)
+        # Matriz de rezagos [1, y(t-1), ..., y(t-p)] construida sin bucles
+        lags = np.lib.stride_tricks.sliding_window_view(values[:-1], p)[:, ::-1]
+        design = np.column_stack([np.ones(lags.shape[0]), lags])
+        coefficients, *_ = np.linalg.lstsq(design, values[p:], rcond=None)
+
+        history = list(values[-p:][::-1])
+        forecast = values[-1]
+        for _ in range(self.horizon):
+            forecast = coefficients[0] + np.dot(coefficients[1:], history)
+            history = [forecast] + history[:-1]
+        return forecast
+
+    def _holt(self, values):
+        level = values[0]
+        trend = values[1] - values[0]
+        for value in values[1:]:
+            previous_level = level
+            level = self.alpha * value + (1 - self.alpha) * (level + trend)
+            trend = self.beta * (level - previous_level) + (1 - self.beta) * trend
+        return level + self.horizon * trend
@@ -0,0 +1,258 @@
+"""
+Decodificación de los formatos de ingesta de mensajes MQTT (JSON, MessagePack,
+CBOR y line protocol) según el Content-Type de la solicitud.
+"""
+
+import io
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+# Content-Type aceptados por formato
+CONTENT_TYPES = {
+    "json": ("application/json",),
+    "msgpack": ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack"),
+    "cbor": ("application/cbor",),
+    "line": ("text/plain", "application/x-line-protocol")
+}
+
+# Campos que contienen el valor en una línea del line protocol
+VALUE_FIELDS = ("valor", "value")
+
+class UnsupportedFormatError(ValueError):
+    """
+    El Content-Type no corresponde a un formato aceptado o falta su librería.
+    """
+
+def message_format(content_type):
+    """
+    Obtiene el formato de ingesta correspondiente a un Content-Type.
+
+    Args:
+        content_type: Valor de la cabecera Content-Type (puede ser None)
+
+    Returns:
+        str: json, msgpack, cbor o line (json si no se indicó)
+
+    Raises:
+        UnsupportedFormatError: Si el Content-Type no es aceptado
+    """
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    for name, types in CONTENT_TYPES.items():
+        if media_type in types:
+            return name
+    accepted = ", ".join(t for types in CONTENT_TYPES.values() for t in types)
+    raise UnsupportedFormatError(f"Content-Type no soportado: {media_type}. Use {accepted}")
+
+def _flatten(frames):
+    """
+    Aplana los frames decodificados en una lista de mensajes.
+
+    Cada frame puede ser un mensaje, una lista de mensajes o un objeto
+    {"mensajes": [...]}, igual que en el cuerpo JSON de los lotes.
+    """
+    messages = []
+    for frame in frames:
+        if isinstance(frame, dict) and isinstance(frame.get("mensajes"), list):
+            messages.extend(frame["mensajes"])
+        elif isinstance(frame, list):
+            messages.extend(frame)
+        else:
+            messages.append(frame)
+
+    # Los payloads MQTT reenviados como binario se guardan como texto
+    for message in messages:
+        if isinstance(message, dict) and isinstance(message.get("valor"), bytes):
+            message["valor"] = message["valor"].decode("utf-8", errors="replace")
+    return messages
+
+def _decode_msgpack(body):
+    if msgpack is None:
+        raise UnsupportedFormatError("El formato MessagePack requiere el paquete msgpack")
+    frames = []
+    # Varios frames concatenados: cada ExtraData trae el frame y los bytes restantes
+    while body:
+        try:
+            frames.append(msgpack.unpackb(body, raw=False, strict_map_key=False))
+            break
+        except msgpack.ExtraData as e:
+            frames.append(e.unpacked)
+            body = e.extra
+        except (msgpack.FormatError, msgpack.StackError, ValueError) as e:
+            raise ValueError(f"Cuerpo MessagePack inválido: {str(e)}")
+    return frames
+
+def _decode_cbor(body):
+    if cbor2 is None:
+        raise UnsupportedFormatError("El formato CBOR requiere el paquete cbor2")
+    stream = io.BytesIO(body)
+    frames = []
+    # Secuencia CBOR (RFC 8742): varios elementos concatenados
+    while stream.tell() < len(body):
+        try:
+            frames.append(cbor2.load(stream))
+        except (cbor2.CBORDecodeError, EOFError) as e:
+            raise ValueError(f"Cuerpo CBOR inválido: {str(e)}")
+    return frames
+
+def _split_unescaped(text, separator, quoted=False):
+    """
+    Divide una cadena por un separador que no esté escapado (ni entre comillas).
+
+    Args:
+        text: Cadena a dividir
+        separator: Carácter separador
+        quoted: Si las comillas dobles agrupan (valores de campo)
+
+    Returns:
+        list: Partes, sin quitar los escapes
+    """
+    parts = []
+    current = []
+    in_quotes = False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "\\" and index + 1 < len(text):
+            current.append(text[index:index + 2])
+            index += 2
+            continue
+        if quoted and char == '"':
+            in_quotes = not in_quotes
+        elif char == separator and not in_quotes:
+            parts.append("".join(current))
+            current = []
+            index += 1
+            continue
+        current.append(char)
+        index += 1
+    parts.append("".join(current))
+    return parts
+
+def _unescape(text):
+    for char in (",", "=", " ", '"', "\\"):
+        text = text.replace("\\" + char, char)
+    return text
+
+def _field_value(raw):
+    """
+    Convierte el valor de un campo del line protocol.
+
+    Returns:
+        Valor numérico, booleano o cadena
+
+    Raises:
+        ValueError: Si el valor no es válido
+    """
+    if raw.startswith('"') and raw.endswith('"') and len(raw) >= 2:
+        return _unescape(raw[1:-1])
+    if raw in ("t", "T", "true", "True", "TRUE"):
+        return True
+    if raw in ("f", "F", "false", "False", "FALSE"):
+        return False
+    if raw[-1:] in ("i", "u"):
+        return int(raw[:-1])
+    return float(raw)
+
+def parse_line(line):
+    """
+    Convierte una línea del line protocol en un mensaje.
+
+    Formato: <tópico>[,<tag>=<valor>...] <campo>=<valor>[,...] [timestamp]
+
+    El tópico es el nombre de la medición. El valor es el campo valor o
+    value (o el único campo). Si hay tags (por ejemplo sensor y location)
+    el valor se entrega como objeto {"valor": ..., <tags>} para que el
+    procesamiento de temperaturas use el sensor y la ubicación. El
+    timestamp se acepta pero se usa la hora de recepción, igual que con JSON.
+
+    Args:
+        line: Línea de texto
+
+    Returns:
+        dict: Mensaje {"topic", "valor"}
+
+    Raises:
+        ValueError: Si la línea no es válida
+    """
+    sections = _split_unescaped(line.strip(), " ", quoted=True)
+    sections = [section for section in sections if section]
+    if len(sections) not in (2, 3):
+        raise ValueError("Se esperaba '<tópico>[,tags] <campos> [timestamp]'")
+
+    series = _split_unescaped(sections[0], ",")
+    topic = _unescape(series[0])
+    if not topic:
+        raise ValueError("Falta el tópico")
+    tags = {}
+    for tag in series[1:]:
+        key, separator, value = tag.partition("=")
+        if not separator or not key:
+            raise ValueError(f"Tag inválido: {tag}")
+        tags[_unescape(key)] = _unescape(value)
+
+    fields = {}
+    for field in _split_unescaped(sections[1], ",", quoted=True):
+        key, separator, value = field.partition("=")
+        if not separator or not key or not value:
+            raise ValueError(f"Campo inválido: {field}")
+        fields[_unescape(key)] = _field_value(value)
+
+    value_field = next((name for name in VALUE_FIELDS if name in fields), None)
+    if value_field is None:
+        if len(fields) != 1:
+            raise ValueError(f"Se requiere el campo {' o '.join(VALUE_FIELDS)}")
+        value_field = next(iter(fields))
+
+    valor = fields[value_field]
+    if tags:
+        valor = dict(tags, valor=valor)
+    return {"topic": topic, "valor": valor}
+
+def _decode_line_protocol(body):
+    """
+    Decodifica un cuerpo en line protocol (una lectura por línea).
+
+    Las líneas inválidas se devuelven como ValueError en su posición para
+    informarlas sin descartar el resto del lote.
+    """
+    messages = []
+    for line in body.decode("utf-8").splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        try:
+            messages.append(parse_line(line))
+        except ValueError as e:
+            messages.append(ValueError(f"Línea inválida '{line.strip()}': {str(e)}"))
+    return messages
+
+def decode_messages(format_name, body):
+    """
+    Decodifica el cuerpo binario o de texto de una solicitud de ingesta.
+
+    Args:
+        format_name: msgpack, cbor o line
+        body: Cuerpo de la solicitud en bytes
+
+    Returns:
+        list: Mensajes decodificados; en line protocol las líneas inválidas
+            son instancias de ValueError
+
+    Raises:
+        UnsupportedFormatError: Si falta la librería del formato
+        ValueError: Si el cuerpo no se puede decodificar
+    """
+    if format_name == "msgpack":
+        return _flatten(_decode_msgpack(body))
+    if format_name == "cbor":
+        return _flatten(_decode_cbor(body))
+    if format_name == "line":
+        return _decode_line_protocol(body)
+    raise UnsupportedFormatError(f"Formato no soportado: {format_name}")
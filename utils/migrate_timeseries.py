@@ -0,0 +1,157 @@
+"""
+Migración de las temperaturas históricas de mqtt_messages a la colección
+de series temporales sensor_readings (SENSOR_STORAGE_MODE=timeseries).
+
+La migración avanza por lotes en orden de _id y guarda un punto de control
+en la colección migrations tras cada lote, de modo que puede interrumpirse
+y reanudarse sin duplicar lecturas.
+
+Uso:
+    python -m utils.migrate_timeseries [--batch-size 5000] [--delete-source] [--reset]
+"""
+
+import argparse
+import datetime
+import time
+from config.database import get_database_connection, close_connection
+from config import settings
+from models.sensor_reading_model import (
+    TimeSeriesReadingModel, TEMPERATURE_TOPIC, STATE_COLLECTION, CLAIMS_COLLECTION, DEFAULT_STREAM
+)
+
+MIGRATION_ID = "mqtt_messages_to_sensor_readings"
+
+def _existing_ids(target, batch):
+    """
+    Obtiene las lecturas del lote que ya están en la colección de destino.
+
+    Un lote interrumpido antes de guardar el punto de control se reintenta
+    al reanudar; así solo se insertan las lecturas que faltan.
+
+    Args:
+        target: Colección de series temporales
+        batch: Lista de documentos de mqtt_messages
+
+    Returns:
+        set: IDs ya migrados
+    """
+    timestamps = [doc["timestamp"] for doc in batch]
+    return {
+        doc["_id"]
+        for doc in target.find(
+            {
+                "timestamp": {"$gte": min(timestamps), "$lte": max(timestamps)},
+                "_id": {"$in": [doc["_id"] for doc in batch]}
+            },
+            {"_id": 1}
+        )
+    }
+
+def migrate(db, batch_size=5000, delete_source=False, reset=False):
+    """
+    Migra las temperaturas numéricas de mqtt_messages a sensor_readings.
+
+    Las lecturas ya procesadas (o anteriores al campo processed) avanzan la
+    marca de agua del modo timeseries hasta la primera lectura pendiente de
+    su flujo; las posteriores se registran como reclamos procesados. Las
+    pendientes siguen pendientes y se procesarán al sembrar la ventana.
+
+    Args:
+        db: Instancia de la base de datos MongoDB
+        batch_size: Documentos por lote
+        delete_source: Eliminar de mqtt_messages los documentos migrados
+        reset: Descartar el punto de control y empezar desde el principio
+
+    Returns:
+        dict: Totales de la migración
+    """
+    target = TimeSeriesReadingModel.ensure_collection(
+        db, settings.SENSOR_TIMESERIES_EXPIRE_SECONDS or None
+    )
+    checkpoints = db.migrations
+    state = db[STATE_COLLECTION]
+
+    if reset:
+        checkpoints.delete_one({"_id": MIGRATION_ID})
+
+    checkpoint = checkpoints.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = checkpoint.get("last_id")
+    # Flujos con alguna lectura pendiente ya migrada: su marca de agua no avanza más
+    blocked = set(checkpoint.get("blocked_streams", []))
+    totals = {
+        "migrated": checkpoint.get("migrated", 0),
+        "skipped": checkpoint.get("skipped", 0),
+        "deleted": checkpoint.get("deleted", 0)
+    }
+    if last_id is not None:
+        print(f"▶️ Reanudando la migración después de {last_id} ({totals['migrated']} lecturas migradas)")
+
+    while True:
+        query = {"topic": {"$regex": f"^{TEMPERATURE_TOPIC}(/|$)"}, "valor": {"$type": "number"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = list(db.mqtt_messages.find(query).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        started = time.perf_counter()
+        existing = _existing_ids(target, batch)
+        pending = [doc for doc in batch if doc["_id"] not in existing]
+        if pending:
+            target.insert_many([TimeSeriesReadingModel.to_timeseries(doc) for doc in pending], ordered=False)
+
+        # Las lecturas ya procesadas no deben volver a enviarse al modelo. La marca de
+        # agua de cada flujo solo avanza hasta su primera lectura pendiente; las
+        # procesadas posteriores se registran como reclamos procesados
+        processed = {}
+        after_pending = []
+        for doc in batch:
+            stream = doc.get("stream", DEFAULT_STREAM)
+            if doc.get("processed") is False:
+                blocked.add(stream)
+            elif stream in blocked:
+                after_pending.append(doc["_id"])
+            else:
+                processed[stream] = max(processed.get(stream, doc["_id"]), doc["_id"])
+        for stream, doc_id in processed.items():
+            TimeSeriesReadingModel.advance_watermark(state, stream, doc_id)
+        if after_pending:
+            TimeSeriesReadingModel.record_processed(db[CLAIMS_COLLECTION], after_pending)
+
+        if delete_source:
+            totals["deleted"] += db.mqtt_messages.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in batch]}}
+            ).deleted_count
+
+        last_id = batch[-1]["_id"]
+        totals["migrated"] += len(pending)
+        totals["skipped"] += len(existing)
+        checkpoints.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": dict(totals, last_id=last_id, blocked_streams=sorted(blocked), updated_at=datetime.datetime.now(datetime.timezone.utc))},
+            upsert=True
+        )
+
+        elapsed = time.perf_counter() - started
+        print(f"📦 Lote de {len(batch)} lecturas migrado en {elapsed:.2f}s (total: {totals['migrated']})")
+
+    print(f"✅ Migración completada: {totals['migrated']} migradas, {totals['skipped']} ya existentes, {totals['deleted']} eliminadas del origen")
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migra las temperaturas de mqtt_messages a la colección de series temporales sensor_readings"
+    )
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documentos por lote")
+    parser.add_argument("--delete-source", action="store_true", help="Eliminar de mqtt_messages los documentos migrados")
+    parser.add_argument("--reset", action="store_true", help="Ignorar el punto de control y empezar desde el principio")
+    args = parser.parse_args()
+
+    client, db, _ = get_database_connection()
+    try:
+        migrate(db, batch_size=args.batch_size, delete_source=args.delete_source, reset=args.reset)
+    finally:
+        close_connection(client)
+
+if __name__ == "__main__":
+    main()
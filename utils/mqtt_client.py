@@ -8,6 +8,7 @@ import logging
 import time
 import threading
 import datetime
+from collections import deque
 
 # Configurar logging
 logging.basicConfig(
@@ -16,12 +17,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mqtt_client")
 
+# Segundos mínimos entre intentos de conexión lanzados por el hilo de publicación
+RECONNECT_INTERVAL = 5
+
 class MQTTClient:
     """
     Cliente MQTT para enviar mensajes al broker Mosquitto.
+
+    Las publicaciones se encolan y las envía un hilo en segundo plano, de
+    modo que publish() nunca bloquea al llamador. Mientras el broker no
+    está disponible los mensajes esperan en un buffer acotado (si se llena
+    se descartan los más antiguos) y se envían en orden al reconectar.
     """
     
-    def __init__(self, broker_host="192.168.45.221", broker_port=1883, client_id="backend_publisher", use_websockets=False):
+    def __init__(self, broker_host="192.168.45.221", broker_port=1883, client_id="backend_publisher", use_websockets=False,
+                 qos=0, buffer_size=1000):
         """
         Inicializa el cliente MQTT.
         
@@ -30,11 +40,14 @@ class MQTTClient:
             broker_port: Puerto del broker MQTT
             client_id: Identificador del cliente
             use_websockets: Si se debe usar WebSockets para la conexión
+            qos: Nivel de QoS por defecto de las publicaciones
+            buffer_size: Mensajes pendientes máximos mientras no hay conexión
         """
         self.broker_host = broker_host
         self.broker_port = broker_port
         self.client_id = client_id
         self.use_websockets = use_websockets
+        self.qos = qos
         
         # Crear cliente MQTT con o sin WebSockets
         if use_websockets:
@@ -45,13 +58,31 @@ class MQTTClient:
             logger.info(f"Cliente MQTT configurado para usar TCP en {broker_host}:{broker_port}")
             
         self.connected = False
+
+        # Suscripciones activas (tópico -> QoS) y manejador de mensajes recibidos
+        self.subscriptions = {}
+        self.message_handler = None
         
         # Configurar callbacks
         self.client.on_connect = self._on_connect
         self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+
+        # Cola de publicaciones pendientes y contadores del hilo de publicación
+        self._outbox = deque(maxlen=buffer_size)
+        self._outbox_condition = threading.Condition()
+        self._closing = False
+        self._last_connect_attempt = time.monotonic()
+        self.published = 0
+        self.dropped = 0
+        self.failed = 0
         
         # Iniciar conexión en un hilo separado
         self._start_connection_thread()
+
+        # Iniciar el hilo que envía las publicaciones encoladas
+        self._publisher_thread = threading.Thread(target=self._publish_loop, name="mqtt-publisher", daemon=True)
+        self._publisher_thread.start()
     
     def _on_connect(self, client, userdata, flags, rc):
         """
@@ -60,6 +91,17 @@ class MQTTClient:
         if rc == 0:
             self.connected = True
             logger.info(f"✅ Conectado al broker MQTT en {self.broker_host}:{self.broker_port}")
+
+            # Restablecer las suscripciones tras cada (re)conexión
+            if self.subscriptions:
+                self.client.subscribe(list(self.subscriptions.items()))
+                logger.info(f"📡 Suscrito a los tópicos: {', '.join(self.subscriptions)}")
+
+            # Enviar los mensajes acumulados mientras no había conexión
+            with self._outbox_condition:
+                if self._outbox:
+                    logger.info(f"📤 Enviando {len(self._outbox)} mensajes pendientes")
+                self._outbox_condition.notify()
         else:
             self.connected = False
             error_messages = {
@@ -86,6 +128,35 @@ class MQTTClient:
             logger.info("🔄 Intentando reconectar...")
             self._start_connection_thread()
     
+    def _on_message(self, client, userdata, msg):
+        """
+        Callback que se ejecuta cuando llega un mensaje de un tópico suscrito.
+        """
+        if not self.message_handler:
+            return
+        try:
+            self.message_handler(msg.topic, msg.payload)
+        except Exception as e:
+            logger.error(f"Error al manejar mensaje MQTT de {msg.topic}: {e}")
+    
+    def subscribe(self, topics, handler, qos=0):
+        """
+        Suscribe el cliente a una lista de tópicos usando la conexión existente.
+        
+        Args:
+            topics: Lista de tópicos MQTT
+            handler: Función handler(topic, payload) invocada por cada mensaje
+            qos: Nivel de QoS de la suscripción
+        """
+        self.message_handler = handler
+        for topic in topics:
+            self.subscriptions[topic] = qos
+        
+        # Si ya está conectado, suscribirse ahora; si no, se hará en _on_connect
+        if self.connected:
+            self.client.subscribe([(topic, qos) for topic in topics])
+            logger.info(f"📡 Suscrito a los tópicos: {', '.join(topics)}")
+    
     def _connect(self):
         """
         Intenta conectar al broker MQTT.
@@ -108,32 +179,23 @@ class MQTTClient:
         """
         Inicia un hilo para conectar al broker MQTT.
         """
+        self._last_connect_attempt = time.monotonic()
         thread = threading.Thread(target=self._connect)
         thread.daemon = True
         thread.start()
     
-    def publish(self, topic, message):
+    def publish(self, topic, message, qos=None):
         """
-        Publica un mensaje en un tópico MQTT.
+        Encola un mensaje para publicarlo en un tópico MQTT sin bloquear.
         
         Args:
             topic: Tópico MQTT
             message: Mensaje a publicar (puede ser un diccionario o una cadena)
+            qos: Nivel de QoS (None = el configurado en el cliente)
         
         Returns:
-            bool: True si el mensaje se publicó correctamente, False en caso contrario
+            bool: True si el mensaje se encoló, False si no se pudo serializar
         """
-        # Si no está conectado, intentar reconectar
-        if not self.connected:
-            logger.warning("No conectado al broker MQTT. Intentando reconectar antes de publicar...")
-            self._connect()
-            time.sleep(2)  # Esperar un poco para que se establezca la conexión
-            
-            # Si sigue sin estar conectado, devolver False
-            if not self.connected:
-                logger.error("No se pudo conectar al broker MQTT. No se puede publicar el mensaje.")
-                return False
-        
         try:
             # Convertir el mensaje a JSON si es un diccionario
             if isinstance(message, dict):
@@ -162,26 +224,89 @@ class MQTTClient:
                 message_json = json.dumps(message)
             else:
                 message_json = message
-        
-            # Publicar el mensaje
-            result = self.client.publish(topic, message_json)
-            
-            # Verificar si el mensaje se publicó correctamente
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"📤 Mensaje publicado en {topic}: {message_json}")
-                return True
-            else:
-                logger.error(f"❌ Error al publicar mensaje en {topic}: {result.rc}")
-                return False
-    
         except Exception as e:
-            logger.error(f"❌ Error al publicar mensaje MQTT: {str(e)}")
+            logger.error(f"❌ Error al preparar mensaje MQTT: {str(e)}")
             return False
+
+        # Encolar el mensaje; si el buffer está lleno se descarta el más antiguo
+        with self._outbox_condition:
+            if len(self._outbox) == self._outbox.maxlen:
+                self.dropped += 1
+                logger.warning("Buffer de publicación MQTT lleno, se descarta el mensaje más antiguo")
+            self._outbox.append((topic, message_json, self.qos if qos is None else qos))
+            self._outbox_condition.notify()
+        return True
+
+    def _publish_loop(self):
+        """
+        Envía en orden los mensajes encolados mientras haya conexión con el broker.
+        """
+        while True:
+            with self._outbox_condition:
+                while not (self._outbox and self.connected) and not self._closing:
+                    self._outbox_condition.wait(1)
+                    # Sin conexión y con mensajes pendientes, reintentar la conexión periódicamente
+                    if (self._outbox and not self.connected and
+                            time.monotonic() - self._last_connect_attempt >= RECONNECT_INTERVAL):
+                        logger.warning(f"No conectado al broker MQTT, {len(self._outbox)} mensajes pendientes. Intentando reconectar...")
+                        self._start_connection_thread()
+                if not (self._outbox and self.connected):
+                    # Al cerrar sin conexión, los mensajes pendientes se pierden
+                    return
+                topic, message_json, qos = self._outbox.popleft()
+
+            try:
+                result = self.client.publish(topic, message_json, qos=qos)
+                rc = result.rc
+            except Exception as e:
+                logger.error(f"❌ Error al publicar mensaje MQTT: {str(e)}")
+                rc = None
+
+            if rc == mqtt.MQTT_ERR_SUCCESS:
+                self.published += 1
+                logger.info(f"📤 Mensaje publicado en {topic}: {message_json}")
+            elif rc == mqtt.MQTT_ERR_NO_CONN:
+                # Se perdió la conexión: devolver el mensaje al inicio de la cola si cabe
+                with self._outbox_condition:
+                    self.connected = False
+                    if len(self._outbox) < self._outbox.maxlen:
+                        self._outbox.appendleft((topic, message_json, qos))
+                    else:
+                        self.dropped += 1
+            else:
+                self.failed += 1
+                logger.error(f"❌ Error al publicar mensaje en {topic}: {rc}")
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas de publicación.
+
+        Returns:
+            dict: Estado de la conexión, mensajes pendientes, publicados, descartados y fallidos
+        """
+        with self._outbox_condition:
+            return {
+                "connected": self.connected,
+                "qos": self.qos,
+                "pending": len(self._outbox),
+                "buffer_size": self._outbox.maxlen,
+                "published": self.published,
+                "dropped": self.dropped,
+                "failed": self.failed
+            }
     
-    def close(self):
+    def close(self, timeout=5):
         """
-        Cierra la conexión con el broker MQTT.
+        Envía los mensajes pendientes (si hay conexión) y cierra la conexión con el broker MQTT.
+
+        Args:
+            timeout: Segundos máximos de espera para vaciar la cola
         """
+        with self._outbox_condition:
+            self._closing = True
+            self._outbox_condition.notify_all()
+        self._publisher_thread.join(timeout)
+
         try:
             self.client.loop_stop()
             self.client.disconnect()
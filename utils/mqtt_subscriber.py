@@ -0,0 +1,119 @@
+"""
+Suscriptor MQTT embebido en el backend.
+
+Reutiliza la conexión de MQTTClient para recibir los mensajes directamente
+del broker y los despacha a la misma lógica de ingesta que el endpoint
+/api/mensaje, sin pasar por el puente HTTP ni por el contexto de Flask.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("mqtt_subscriber")
+
+class EmbeddedSubscriber:
+    """
+    Despacha los mensajes MQTT recibidos a un pool acotado de hilos de ingesta.
+    """
+
+    def __init__(self, mqtt_client, ingest, topics, workers=4, max_pending=1000, source="mqtt_embedded"):
+        """
+        Inicializa el suscriptor.
+
+        Args:
+            mqtt_client: Instancia de MQTTClient cuya conexión se reutiliza
+            ingest: Función ingest(topic, valor, source) que guarda el mensaje
+            topics: Lista de tópicos a suscribir
+            workers: Número de hilos de ingesta
+            max_pending: Mensajes máximos en espera antes de descartar
+            source: Origen registrado en los documentos guardados
+        """
+        self.mqtt_client = mqtt_client
+        self.ingest = ingest
+        self.topics = topics
+        self.workers = workers
+        self.max_pending = max_pending
+        self.source = source
+        self.executor = None
+
+        # Limita los mensajes en vuelo para no crecer sin límite si MongoDB se ralentiza
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.stats = {
+            "received": 0,
+            "processed": 0,
+            "dropped": 0,
+            "errors": 0
+        }
+
+    def start(self):
+        """
+        Inicia el pool de ingesta y se suscribe a los tópicos.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="mqtt_ingest")
+        self.mqtt_client.subscribe(self.topics, self._on_message)
+        logger.info(f"Suscriptor embebido iniciado con {self.workers} hilos para: {', '.join(self.topics)}")
+
+    def stop(self):
+        """
+        Detiene el pool de ingesta esperando a que terminen los mensajes en curso.
+        """
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            logger.info("Suscriptor embebido detenido")
+
+    def _on_message(self, topic, payload):
+        """
+        Se ejecuta en el hilo de red de paho: solo decodifica y encola.
+        """
+        self._count("received")
+        # Sin hueco libre se descarta al momento: esperar bloquearía el bucle de red de MQTT
+        if not self._slots.acquire(blocking=False):
+            self._count("dropped")
+            logger.warning(f"Cola de ingesta llena, mensaje descartado: {topic}")
+            return
+
+        valor = payload.decode("utf-8", errors="replace") if isinstance(payload, bytes) else payload
+        try:
+            self.executor.submit(self._process, topic, valor)
+        except RuntimeError:
+            # El pool ya se cerró durante el apagado
+            self._slots.release()
+            self._count("dropped")
+
+    def _process(self, topic, valor):
+        try:
+            self.ingest(topic, valor, source=self.source)
+            self._count("processed")
+        except Exception as e:
+            self._count("errors")
+            logger.error(f"Error al ingerir mensaje MQTT de {topic}: {e}")
+        finally:
+            self._slots.release()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas del suscriptor.
+
+        Returns:
+            dict: Contadores y configuración del suscriptor
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update({
+            "topics": self.topics,
+            "workers": self.workers,
+            "max_pending": self.max_pending
+        })
+        return stats
@@ -1,11 +1,46 @@
 import paho.mqtt.client as mqtt
 import requests
+import asyncio
+import json
+import os
+import threading
 import time
+from collections import deque
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 BACKEND_URL = "http://localhost:5000/api/mensaje"  # Endpoint backend
+BACKEND_BATCH_URL = "http://localhost:5000/api/mensajes/batch"  # Endpoint de lotes
+
+# Modo del puente:
+#   "directo": una solicitud HTTP por mensaje
+#   "lotes": se agrupan los mensajes y se envían al alcanzar el tamaño o el intervalo
+#   "async": lotes enviados con asyncio, conexiones persistentes y spool en disco
+MODO_PUENTE = os.getenv("MODO_PUENTE", "lotes")
+TAMANO_LOTE = 500  # Número máximo de mensajes por lote
+INTERVALO_LOTE = 1.0  # Segundos máximos que un mensaje espera en el buffer
+MAX_BUFFER = 50000  # Mensajes máximos retenidos si el backend no responde
+
+# Formato de los lotes enviados al backend: "json" o "msgpack" (más compacto y rápido de decodificar)
+FORMATO_ENVIO = os.getenv("FORMATO_ENVIO", "json")
+
+# Parámetros del modo async
+MAX_COLA_ASYNC = 10000  # Mensajes máximos en memoria antes de desbordar al spool
+DIRECTORIO_SPOOL = "spool_mqtt"  # Directorio del spool en disco
+INTERVALO_FSYNC = 1.0  # Segundos máximos que lo escrito en el spool espera a sincronizarse en disco
+TIMEOUT_ASYNC = 5  # Segundos máximos por solicitud
 
 # Definición de tópicos
-TOPICO_TEMPERATURA = "sensor/temperatura"
+# "#" también coincide con sensor/temperatura: suscribirse a ambos duplicaría cada lectura
+TOPICO_TEMPERATURA = "sensor/temperatura/#"  # sensor/temperatura y sensor/temperatura/<ubicacion>/<sensor>
 TOPICO_NOTIFICACIONES = "sistema/notificaciones"
 TOPICO_VENTILADOR = "actuador/ventilador"
 TOPICO_BOMBILLO = "actuador/bombillo"
@@ -26,6 +61,298 @@ def enviar_al_backend(topic, valor):
     except requests.RequestException as e:
         print(f"❌ Error enviando al backend: {e}")
 
+def serializar_lote(lote):
+    """
+    Prepara el cuerpo de la solicitud de un lote según FORMATO_ENVIO.
+
+    Devuelve los argumentos para session.post (requests o aiohttp).
+    """
+    if FORMATO_ENVIO == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("FORMATO_ENVIO=msgpack requiere el paquete 'msgpack' (pip install msgpack)")
+        return {"data": msgpack.packb(lote), "headers": {"Content-Type": "application/msgpack"}}
+    return {"json": lote}
+
+class BufferMensajes:
+    """
+    Agrupa los mensajes recibidos y los envía al backend en lotes,
+    cuando se alcanza TAMANO_LOTE o cuando pasan INTERVALO_LOTE segundos.
+    """
+
+    def __init__(self, url=BACKEND_BATCH_URL, tamano=TAMANO_LOTE, intervalo=INTERVALO_LOTE, maximo=MAX_BUFFER):
+        self.url = url
+        self.tamano = tamano
+        self.intervalo = intervalo
+        self.maximo = maximo
+        self.mensajes = deque(maxlen=maximo)
+        self.condicion = threading.Condition()
+        self.session = requests.Session()
+        self.hilo = threading.Thread(target=self._ciclo_envio, daemon=True)
+        self.hilo.start()
+
+    def agregar(self, topic, valor):
+        with self.condicion:
+            if len(self.mensajes) >= self.maximo:
+                # La deque acotada descarta el mensaje más antiguo al agregar
+                print("⚠️ Buffer lleno, se descartó el mensaje más antiguo")
+            self.mensajes.append({"topic": topic, "valor": valor})
+            if len(self.mensajes) >= self.tamano:
+                self.condicion.notify()
+
+    def _ciclo_envio(self):
+        while True:
+            with self.condicion:
+                if len(self.mensajes) < self.tamano:
+                    self.condicion.wait(timeout=self.intervalo)
+                lote = [self.mensajes.popleft() for _ in range(min(self.tamano, len(self.mensajes)))]
+            if lote:
+                self._enviar(lote)
+
+    def _enviar(self, lote):
+        try:
+            response = self.session.post(self.url, timeout=5, **serializar_lote(lote))
+        except requests.RequestException as e:
+            print(f"❌ Error enviando lote al backend: {e}")
+            self._reintentar(lote)
+            return
+        if response.status_code >= 500:
+            print(f"❌ Error del backend al enviar lote: {response.status_code}")
+            self._reintentar(lote)
+        elif response.status_code >= 400:
+            # Un lote rechazado por el backend fallaría igual al reintentarlo
+            print(f"🗑️ Lote de {len(lote)} mensajes rechazado por el backend ({response.status_code}), se descarta")
+        else:
+            print(f"📤 Lote de {len(lote)} mensajes enviado al backend: {response.status_code}")
+
+    def _reintentar(self, lote):
+        # Devolver el lote al inicio del buffer; si no cabe se descartan los más recientes
+        with self.condicion:
+            self.mensajes.extendleft(reversed(lote))
+        time.sleep(self.intervalo)
+
+class SpoolDisco:
+    """
+    Spool en disco de solo anexado. Los mensajes se escriben como líneas JSON
+    y un archivo de offset registra hasta dónde se han entregado, de modo que
+    la reproducción continúa en orden tras un reinicio.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_SPOOL):
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta = os.path.join(directorio, "mensajes.jsonl")
+        self.ruta_offset = os.path.join(directorio, "mensajes.offset")
+        self.archivo = open(self.ruta, "ab")
+        self.tamano = self.archivo.seek(0, os.SEEK_END)
+        self.offset = 0
+        # Hay datos escritos que aún no se han sincronizado con fsync
+        self.sucio = False
+        if os.path.exists(self.ruta_offset):
+            with open(self.ruta_offset, "r") as f:
+                contenido = f.read().strip()
+                self.offset = min(int(contenido or 0), self.tamano)
+
+    def pendiente(self):
+        return self.offset < self.tamano
+
+    def escribir(self, mensajes):
+        for mensaje in mensajes:
+            self.archivo.write(json.dumps(mensaje).encode("utf-8") + b"\n")
+        self.archivo.flush()
+        self.sucio = True
+        self.tamano = self.archivo.tell()
+
+    def sincronizar(self):
+        """
+        Fuerza a disco lo escrito desde la última sincronización.
+
+        Se llama periódicamente fuera del bucle de asyncio, en lugar de hacer
+        un fsync por cada escritura.
+        """
+        if not self.sucio:
+            return
+        self.sucio = False
+        os.fsync(self.archivo.fileno())
+
+    def leer(self, maximo):
+        """
+        Lee hasta `maximo` mensajes desde el offset confirmado.
+
+        Returns:
+            tuple: (mensajes, nuevo_offset)
+        """
+        mensajes = []
+        nuevo_offset = self.offset
+        with open(self.ruta, "rb") as f:
+            f.seek(self.offset)
+            while len(mensajes) < maximo:
+                linea = f.readline()
+                if not linea.endswith(b"\n"):
+                    break
+                nuevo_offset = f.tell()
+                try:
+                    mensajes.append(json.loads(linea))
+                except json.JSONDecodeError:
+                    print("⚠️ Línea corrupta en el spool, se omite")
+        return mensajes, nuevo_offset
+
+    def confirmar(self, offset):
+        self.offset = offset
+        if self.offset >= self.tamano:
+            # Todo entregado: vaciar el spool
+            self.archivo.truncate(0)
+            self.archivo.seek(0)
+            self.tamano = 0
+            self.offset = 0
+        temporal = self.ruta_offset + ".tmp"
+        with open(temporal, "w") as f:
+            f.write(str(self.offset))
+        os.replace(temporal, self.ruta_offset)
+
+class PuenteAsync:
+    """
+    Puente asíncrono hacia el backend. El callback de MQTT solo encola; el envío
+    se realiza en el bucle de asyncio con una sesión HTTP persistente. Un único
+    emisor envía los lotes de uno en uno, de modo que llegan en el orden en que
+    se recibieron. Si la cola se llena o el backend no responde, los mensajes
+    se desbordan al spool en disco y se reproducen en orden después.
+
+    Mientras el spool tiene datos la cola en memoria está vacía: todo lo nuevo
+    va al spool, detrás de lo anterior.
+    """
+
+    def __init__(self, url=BACKEND_BATCH_URL, tamano=TAMANO_LOTE, intervalo=INTERVALO_LOTE,
+                 max_cola=MAX_COLA_ASYNC, directorio_spool=DIRECTORIO_SPOOL):
+        if aiohttp is None:
+            raise RuntimeError("El modo async requiere el paquete 'aiohttp' (pip install aiohttp)")
+        self.url = url
+        self.tamano = tamano
+        self.intervalo = intervalo
+        self.max_cola = max_cola
+        self.spool = SpoolDisco(directorio_spool)
+        self.loop = asyncio.new_event_loop()
+        self.cola = deque()
+        self.hay_mensajes = asyncio.Event()
+        # Un lote tomado de la cola está en envío: hasta saber si falló, nada puede ir al spool antes que él
+        self.enviando = False
+        self.session = None
+
+    def encolar(self, topic, valor):
+        """
+        Encola un mensaje desde el hilo de MQTT sin bloquearlo.
+        """
+        self.loop.call_soon_threadsafe(self._encolar, {"topic": topic, "valor": valor})
+
+    def _encolar(self, mensaje):
+        # Mientras haya datos en el spool, lo nuevo va detrás para conservar el orden
+        if self.spool.pendiente():
+            self.spool.escribir([mensaje])
+            return
+        self.cola.append(mensaje)
+        # Con un lote en envío la cola puede superar el máximo durante, como mucho, TIMEOUT_ASYNC
+        if len(self.cola) >= self.max_cola and not self.enviando:
+            self._desbordar()
+        self.hay_mensajes.set()
+
+    def _desbordar(self, lote=()):
+        """
+        Pasa al spool un lote no entregado y, detrás, toda la cola en memoria.
+        """
+        mensajes = list(lote) + list(self.cola)
+        self.cola.clear()
+        if mensajes:
+            self.spool.escribir(mensajes)
+            print(f"💾 {len(mensajes)} mensajes guardados en el spool")
+
+    def ejecutar(self):
+        """
+        Ejecuta el bucle de asyncio del puente en el hilo actual.
+        """
+        self.loop.run_until_complete(self._ejecutar())
+
+    async def _ejecutar(self):
+        # Una sola conexión persistente: los envíos son secuenciales
+        conector = aiohttp.TCPConnector(limit=1, keepalive_timeout=60)
+        timeout = aiohttp.ClientTimeout(total=TIMEOUT_ASYNC)
+        async with aiohttp.ClientSession(connector=conector, timeout=timeout) as session:
+            self.session = session
+            await asyncio.gather(self._emisor(), self._sincronizador())
+
+    async def _siguiente_lote(self):
+        """
+        Espera a que haya un lote completo o pase el intervalo y lo toma de la cola.
+
+        Los mensajes permanecen en la cola mientras se espera, así un
+        desbordamiento los lleva al spool en orden. Devuelve una lista vacía
+        si la cola se desbordó durante la espera.
+        """
+        while not self.cola:
+            self.hay_mensajes.clear()
+            await self.hay_mensajes.wait()
+        limite = self.loop.time() + self.intervalo
+        while len(self.cola) < self.tamano and not self.spool.pendiente():
+            restante = limite - self.loop.time()
+            if restante <= 0:
+                break
+            self.hay_mensajes.clear()
+            try:
+                await asyncio.wait_for(self.hay_mensajes.wait(), restante)
+            except asyncio.TimeoutError:
+                break
+        return [self.cola.popleft() for _ in range(min(self.tamano, len(self.cola)))]
+
+    async def _emisor(self):
+        espera = self.intervalo
+        while True:
+            if self.spool.pendiente():
+                # Lo del spool es anterior a todo lo que llegue después
+                lote, offset = self.spool.leer(self.tamano)
+                if not lote:
+                    self.spool.confirmar(offset)
+                    continue
+                if await self._enviar(lote):
+                    self.spool.confirmar(offset)
+                    espera = self.intervalo
+                else:
+                    # Backend no disponible: esperar con retroceso exponencial
+                    await asyncio.sleep(espera)
+                    espera = min(espera * 2, 60)
+                continue
+
+            lote = await self._siguiente_lote()
+            if not lote:
+                continue
+            self.enviando = True
+            try:
+                enviado = await self._enviar(lote)
+            finally:
+                self.enviando = False
+            if not enviado:
+                # El lote va al spool antes que los mensajes que llegaron durante el envío
+                self._desbordar(lote)
+            elif len(self.cola) >= self.max_cola:
+                self._desbordar()
+
+    async def _sincronizador(self):
+        # El fsync del spool se agrupa por intervalo y se ejecuta en un hilo aparte
+        while True:
+            await asyncio.sleep(INTERVALO_FSYNC)
+            await self.loop.run_in_executor(None, self.spool.sincronizar)
+
+    async def _enviar(self, lote):
+        try:
+            async with self.session.post(self.url, **serializar_lote(lote)) as response:
+                if response.status >= 500:
+                    print(f"❌ Error del backend al enviar lote: {response.status}")
+                    return False
+                print(f"📤 Lote de {len(lote)} mensajes enviado al backend: {response.status}")
+                return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"❌ Error enviando lote al backend: {e}")
+            return False
+
+buffer_mensajes = None
+puente_async = None
+
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print("✅ Conectado al MQTT Broker")
@@ -39,9 +366,42 @@ def on_connect(client, userdata, flags, rc):
 def on_message(client, userdata, msg):
     payload = msg.payload.decode()
     print(f"📨 Mensaje MQTT recibido: {msg.topic} -> {payload}")
-    enviar_al_backend(msg.topic, payload)
+    if puente_async:
+        puente_async.encolar(msg.topic, payload)
+    elif buffer_mensajes:
+        buffer_mensajes.agregar(msg.topic, payload)
+    else:
+        enviar_al_backend(msg.topic, payload)
+
+def main_async():
+    global puente_async
+    puente_async = PuenteAsync()
+    print(f"⚡ Modo async activado: envío en orden por una conexión persistente, spool en {DIRECTORIO_SPOOL}")
+
+    client = mqtt.Client(transport="websockets")
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    # El hilo de paho gestiona la conexión y las reconexiones; asyncio ocupa el hilo principal
+    print(f"🔌 Conectando al broker MQTT por WebSocket {BROKER}:{PUERTO}{WEBSOCKETS_PATH}...")
+    client.ws_set_options(path=WEBSOCKETS_PATH)
+    client.reconnect_delay_set(min_delay=1, max_delay=30)
+    client.connect_async(BROKER, PUERTO, 60)
+    client.loop_start()
+    try:
+        puente_async.ejecutar()
+    finally:
+        client.loop_stop()
 
 def main():
+    global buffer_mensajes
+    if MODO_PUENTE == "async":
+        main_async()
+        return
+    if MODO_PUENTE == "lotes":
+        buffer_mensajes = BufferMensajes()
+        print(f"📦 Envío por lotes activado: {TAMANO_LOTE} mensajes o {INTERVALO_LOTE}s")
+
     client = mqtt.Client(transport="websockets")
     client.on_connect = on_connect
     client.on_message = on_message
@@ -0,0 +1,102 @@
+"""
+Caché de predicciones de temperatura indexada por la ventana cuantizada.
+"""
+
+from collections import OrderedDict
+import hashlib
+import struct
+import threading
+import time
+
+class PredictionCache:
+    """
+    Caché LRU con expiración para las respuestas del modelo de temperatura.
+
+    Las ventanas se cuantizan a la precisión del sensor antes de calcular la
+    clave, de modo que ventanas iguales a esa precisión reutilizan la misma
+    predicción en lugar de volver a llamar al modelo remoto.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=3600, precision=1):
+        """
+        Inicializa la caché.
+
+        Args:
+            max_entries: Número máximo de predicciones guardadas
+            ttl_seconds: Segundos que una predicción sigue siendo válida
+            precision: Decimales a los que se redondean las temperaturas
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, temperatures):
+        """
+        Calcula la clave de una ventana de temperaturas.
+
+        Args:
+            temperatures: Lista de valores de temperatura
+
+        Returns:
+            str: Hash hexadecimal de la ventana cuantizada
+        """
+        scale = 10 ** self.precision
+        quantized = [int(round(float(value) * scale)) for value in temperatures]
+        packed = struct.pack(f"<{len(quantized)}q", *quantized)
+        return hashlib.sha1(packed).hexdigest()
+
+    def get(self, key):
+        """
+        Obtiene una predicción de la caché.
+
+        Returns:
+            dict: Resultado guardado o None si no existe o expiró
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, result):
+        """
+        Guarda una predicción en la caché, desalojando la menos usada si está llena.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Vacía la caché (por ejemplo, al eliminarse predicciones en otra instancia).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas de la caché.
+
+        Returns:
+            dict: Aciertos, fallos y tamaño actual
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "precision": self.precision
+            }
@@ -0,0 +1,144 @@
+"""
+Trabajador en segundo plano para ejecutar predicciones fuera del hilo de la solicitud.
+"""
+
+from collections import deque, OrderedDict
+import datetime
+import logging
+import queue
+import threading
+import uuid
+
+# Configurar logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("prediction_worker")
+
+class PredictionWorker:
+    """
+    Cola de trabajos de predicción atendida por hilos en segundo plano.
+
+    Cada trabajo pasa por los estados pending -> running -> completed/failed.
+    Los trabajos terminados se conservan en un historial acotado para
+    poder consultarlos desde la API.
+    """
+
+    def __init__(self, workers=1, history_size=100):
+        """
+        Inicializa el trabajador e inicia sus hilos.
+
+        Args:
+            workers: Número de hilos que atienden la cola
+            history_size: Número de trabajos terminados que se conservan
+        """
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = OrderedDict()
+        self._finished = deque(maxlen=history_size)
+        self._threads = []
+
+        for index in range(workers):
+            thread = threading.Thread(target=self._run, name=f"prediction_worker_{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Trabajador de predicciones iniciado con {workers} hilo(s)")
+
+    def submit(self, func, *args, description=None, **details):
+        """
+        Encola un trabajo.
+
+        Args:
+            func: Función a ejecutar; su valor de retorno se guarda como resultado
+            *args: Argumentos de la función
+            description: Descripción legible del trabajo
+            **details: Información adicional que se muestra con el trabajo
+
+        Returns:
+            str: ID del trabajo
+        """
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "pending",
+            "description": description,
+            "details": details,
+            "created_at": self._now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._active[job["job_id"]] = job
+        self._queue.put((job, func, args))
+        return job["job_id"]
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job, func, args = item
+            with self._lock:
+                job["status"] = "running"
+                job["started_at"] = self._now()
+            try:
+                result = func(*args)
+                status, error = ("completed", None) if result is not False else ("failed", "El trabajo no se completó")
+            except Exception as e:
+                logger.error(f"Error en el trabajo de predicción {job['job_id']}: {e}")
+                result, status, error = None, "failed", str(e)
+            with self._lock:
+                job["status"] = status
+                job["result"] = result if isinstance(result, (str, int, float, dict, list)) else None
+                job["error"] = error
+                job["finished_at"] = self._now()
+                self._active.pop(job["job_id"], None)
+                self._finished.appendleft(job)
+            self._queue.task_done()
+
+    def get_job(self, job_id):
+        """
+        Obtiene un trabajo por su ID.
+
+        Returns:
+            dict: Copia del trabajo o None si no existe
+        """
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is None:
+                job = next((j for j in self._finished if j["job_id"] == job_id), None)
+            return dict(job) if job else None
+
+    def get_jobs(self):
+        """
+        Obtiene los trabajos en curso y los terminados recientemente.
+
+        Returns:
+            dict: {"pending": [...], "completed": [...]} con copias de los trabajos
+        """
+        with self._lock:
+            return {
+                "pending": [dict(job) for job in self._active.values()],
+                "completed": [dict(job) for job in self._finished]
+            }
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._active)
+
+    def stop(self, timeout=10):
+        """
+        Detiene los hilos después de atender los trabajos ya encolados.
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        logger.info("Trabajador de predicciones detenido")
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc).isoformat()
@@ -0,0 +1,783 @@
+"""
+Reproducción y recarga de lecturas históricas de temperatura.
+
+Lee lecturas de archivos CSV o JSONL y las pasa por la misma lógica que la
+ingesta (documentos de receive_message) y que las predicciones (ventanas de
+_process_temperatures). Modos:
+    - backfill: guarda las lecturas con su timestamp original con
+      insert_many no ordenado y calcula las predicciones de cada ventana
+      con una escritura por lote. No publica eventos ni notificaciones MQTT.
+    - live: envía las lecturas por ingest_messages (como /api/mensajes/batch)
+      respetando los intervalos originales comprimidos por --speed.
+    - rebuild: recalcula las predicciones de las lecturas ya guardadas, por
+      ejemplo tras cambiar el modelo.
+
+Los flujos (ubicación/sensor) se reparten entre --partitions procesos. Un
+único lector recorre los archivos y envía a cada partición solo sus
+registros. Cada partición guarda su punto de control en la colección
+migrations tras cada lote, de modo que la reproducción puede interrumpirse
+y reanudarse sin duplicar lecturas ni predicciones.
+
+Entrada: campos timestamp, valor (o value) y opcionalmente topic, sensor y
+location. El timestamp puede ser ISO 8601 o segundos (o milisegundos) desde
+epoch. Las lecturas de cada flujo deben estar en orden cronológico.
+
+Uso:
+    python -m utils.replay_readings lecturas.csv [--mode backfill|live] [--speed 60]
+        [--partitions 4] [--batch-size 5000] [--job nombre] [--reset]
+    python -m utils.replay_readings --mode rebuild [--stream invernadero1/s1] [--replace]
+"""
+
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import struct
+import time
+import zlib
+from bson import ObjectId
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+from config.database import get_database_connection, close_connection
+from config import settings
+from models.sensor_reading_model import (
+    TEMPERATURE_TOPIC, is_temperature_topic, parse_temperature_message, stream_key
+)
+
+logger = logging.getLogger("replay_readings")
+
+REPLAY_MODES = ("backfill", "live", "rebuild")
+
+# Origen registrado en los documentos guardados por la reproducción
+REPLAY_SOURCE = "replay"
+
+# Registros por envío del lector a una partición y envíos en espera por partición
+CHUNK_SIZE = 1000
+MAX_PENDING_CHUNKS = 8
+
+def _checkpoint_id(job, partition=None):
+    if partition is None:
+        return f"replay:{job}"
+    return f"replay:{job}:{partition}"
+
+def _parse_timestamp(value):
+    """
+    Convierte el timestamp de una lectura en una fecha UTC.
+
+    Args:
+        value: Fecha ISO 8601 o segundos/milisegundos desde epoch
+
+    Returns:
+        datetime: Fecha con zona horaria UTC
+
+    Raises:
+        ValueError: Si falta o no es válido
+    """
+    if value is None or value == "":
+        raise ValueError("Falta el timestamp")
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        text = str(value).strip()
+        if text.endswith("Z"):
+            text = text[:-1] + "+00:00"
+        timestamp = datetime.datetime.fromisoformat(text)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+        return timestamp.astimezone(datetime.timezone.utc)
+
+    # Valores mayores que ~año 5000 en segundos se interpretan como milisegundos
+    if seconds > 1e11:
+        seconds /= 1000
+    return datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+
+def _to_message(record):
+    """
+    Convierte un registro de entrada en un mensaje.
+
+    Args:
+        record: Diccionario con timestamp, valor y opcionalmente topic, sensor y location
+
+    Returns:
+        tuple: (topic, valor, timestamp)
+
+    Raises:
+        ValueError: Si el registro no es válido
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Se esperaba un objeto")
+    topic = record.get("topic") or TEMPERATURE_TOPIC
+    if not isinstance(topic, str):
+        raise ValueError("El topic debe ser una cadena")
+    valor = record.get("valor", record.get("value"))
+    if valor is None or valor == "":
+        raise ValueError("Falta el valor")
+
+    # Igual que los tags del line protocol: el sensor y la ubicación viajan en el valor
+    tags = {key: record[key] for key in ("sensor", "location") if record.get(key)}
+    if tags:
+        valor = dict(tags, valor=valor)
+    return topic, valor, _parse_timestamp(record.get("timestamp"))
+
+def _message_stream(topic, valor):
+    """
+    Obtiene la clave por la que se reparte un mensaje entre particiones.
+
+    Returns:
+        str: Flujo de la temperatura o, para el resto de mensajes, su tópico
+    """
+    if is_temperature_topic(topic):
+        try:
+            _, sensor, location = parse_temperature_message(topic, valor)
+            return stream_key(location, sensor)
+        except (TypeError, ValueError):
+            pass
+    return topic
+
+def _partition_of(stream, partitions):
+    # crc32 y no hash(): debe coincidir entre procesos
+    return zlib.crc32(stream.encode("utf-8")) % partitions
+
+def _read_records(paths, file_format=None):
+    """
+    Recorre los registros de los archivos de entrada.
+
+    Args:
+        paths: Lista de rutas CSV o JSONL
+        file_format: csv o jsonl (por defecto, según la extensión)
+
+    Yields:
+        tuple: (index, record) con el índice global del registro; record es
+            None si la línea JSON no es válida
+    """
+    index = 0
+    for path in paths:
+        current_format = file_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        with open(path, newline="", encoding="utf-8") as f:
+            if current_format == "csv":
+                for row in csv.DictReader(f):
+                    yield index, row
+                    index += 1
+                continue
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                yield index, record
+                index += 1
+
+def _reading_id(timestamp, prefix, index):
+    """
+    Genera el ID determinista de una lectura reproducida.
+
+    Los 4 primeros bytes son la fecha de la lectura (como los IDs generados
+    al recibirla, de los que depende la marca de agua), seguidos de un
+    prefijo del trabajo y del índice completo del registro. Así, al
+    reanudar, una lectura ya guardada conserva su ID.
+
+    Args:
+        timestamp: Fecha de la lectura
+        prefix: 3 bytes que identifican el trabajo
+        index: Índice global del registro (menor que 2^40)
+
+    Returns:
+        ObjectId: ID de la lectura
+    """
+    return ObjectId(struct.pack(">I", int(timestamp.timestamp())) + prefix + index.to_bytes(5, "big"))
+
+def _chunks(options, offsets, reader_state):
+    """
+    Lee los archivos una sola vez y agrupa los registros por partición.
+
+    Los registros inválidos se cuentan aquí, una sola vez aunque el trabajo
+    se reanude: reader_state["counted"] indica hasta qué índice ya se contaron.
+
+    Args:
+        options: Diccionario con las opciones de la línea de comandos
+        offsets: Lista con el primer índice pendiente de cada partición
+        reader_state: Diccionario {"rejected", "counted"} que se actualiza
+
+    Yields:
+        tuple: (partition, first_time, records) con hasta CHUNK_SIZE tuplas
+            (index, topic, valor, timestamp); first_time es la fecha del
+            primer registro pendiente, referencia común del modo live
+    """
+    partitions = options["partitions"]
+    start = min(offsets)
+    first_time = None
+    pending = [[] for _ in range(partitions)]
+    for index, record in _read_records(options["files"], options["format"]):
+        if index < start:
+            continue
+        try:
+            topic, valor, timestamp = _to_message(record)
+        except (TypeError, ValueError) as e:
+            if index >= reader_state["counted"]:
+                reader_state["rejected"] += 1
+                logger.debug(f"Registro {index} inválido: {str(e)}")
+            continue
+        finally:
+            reader_state["counted"] = max(reader_state["counted"], index + 1)
+        if first_time is None:
+            first_time = timestamp
+        partition = _partition_of(_message_stream(topic, valor), partitions)
+        if index < offsets[partition]:
+            continue
+        pending[partition].append((index, topic, valor, timestamp))
+        if len(pending[partition]) >= CHUNK_SIZE:
+            yield partition, first_time, pending[partition]
+            pending[partition] = []
+    for partition, records in enumerate(pending):
+        if records:
+            yield partition, first_time, records
+
+class ReplayPartition:
+    """
+    Reproduce los flujos de una partición con su propio controlador y punto de control.
+    """
+
+    def __init__(self, db, controller, options, partition, source=None):
+        """
+        Inicializa la partición y carga su punto de control.
+
+        Args:
+            db: Instancia de la base de datos MongoDB
+            controller: MQTTController de la partición
+            options: Diccionario con las opciones de la línea de comandos
+            partition: Número de la partición
+            source: Iterable de envíos (first_time, records) del lector (salvo en rebuild)
+        """
+        self.db = db
+        self.controller = controller
+        self.options = options
+        self.partition = partition
+        self.partitions = options["partitions"]
+        self.source = source or ()
+        self.job = options["job"]
+        self.prefix = hashlib.sha1(self.job.encode("utf-8")).digest()[:3]
+        self.checkpoints = db.migrations
+        self.checkpoint_id = _checkpoint_id(self.job, partition)
+
+        checkpoint = self.checkpoints.find_one({"_id": self.checkpoint_id}) or {}
+        self.resuming = bool(checkpoint)
+        self.offset = checkpoint.get("offset", 0)
+        self.totals = checkpoint.get("totals") or {
+            "read": 0, "stored": 0, "write_errors": 0, "predictions": 0
+        }
+        self.done_streams = checkpoint.get("done_streams", [])
+        self.first_time = None
+
+        # Ventanas propias, restauradas del punto de control (no las del controlador,
+        # que se siembran con las lecturas pendientes de la ingesta en vivo)
+        self.windows = {}
+        for state in checkpoint.get("windows", []):
+            window = controller._create_window(state["stream"])
+            window.seed([tuple(reading) for reading in state["readings"]], fresh=state["fresh"])
+            self.windows[state["stream"]] = window
+
+    def _window(self, stream):
+        window = self.windows.get(stream)
+        if window is None:
+            window = self.windows[stream] = self.controller._create_window(stream)
+        return window
+
+    def _save_checkpoint(self, **extra):
+        windows = []
+        for stream, window in self.windows.items():
+            readings, fresh = window.snapshot()
+            if readings:
+                windows.append({"stream": stream, "readings": [list(reading) for reading in readings], "fresh": fresh})
+        self.checkpoints.update_one(
+            {"_id": self.checkpoint_id},
+            {"$set": dict(
+                extra,
+                job=self.job,
+                partition=self.partition,
+                offset=self.offset,
+                totals=self.totals,
+                windows=windows,
+                done_streams=self.done_streams,
+                updated_at=datetime.datetime.now(datetime.timezone.utc)
+            )},
+            upsert=True
+        )
+
+    def _records(self):
+        """
+        Recorre los mensajes de la partición que envía el lector, ya filtrados
+        por el punto de control.
+
+        Yields:
+            tuple: (index, topic, valor, timestamp)
+        """
+        for first_time, records in self.source:
+            if self.first_time is None:
+                self.first_time = first_time
+            yield from records
+
+    def _batches(self, records):
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= self.options["batch_size"]:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _existing_ids(self, documents, collection):
+        """
+        Obtiene los documentos del lote que ya se guardaron antes de interrumpirse.
+
+        Args:
+            documents: Lista de documentos con _id
+            collection: Colección de destino
+
+        Returns:
+            set: IDs ya guardados
+        """
+        if not documents:
+            return set()
+        timestamps = [document["timestamp"] for document in documents]
+        return {
+            doc["_id"]
+            for doc in collection.find(
+                {
+                    "timestamp": {"$gte": min(timestamps), "$lte": max(timestamps)},
+                    "_id": {"$in": [document["_id"] for document in documents]}
+                },
+                {"_id": 1}
+            )
+        }
+
+    def _predict_window(self, stream, window, readings, fresh, timestamp):
+        """
+        Calcula la predicción de una ventana con el motor configurado.
+
+        El documento usa como _id el de la última lectura de la ventana, así
+        repetir la ventana al reanudar (o al reconstruir) lo reemplaza.
+
+        Returns:
+            dict: Documento de predicción
+        """
+        prediction = self.controller._predict([value for _, value in readings])
+        prediction_doc = self.controller._build_prediction_document(
+            stream, readings, fresh, window.sliding, prediction, timestamp=timestamp
+        )
+        prediction_doc["_id"] = readings[-1][0]
+        prediction_doc["replay_job"] = self.job
+        return prediction_doc
+
+    def _feed(self, stream, readings, predictions, processed):
+        """
+        Agrega lecturas a la ventana de su flujo y calcula las ventanas listas.
+
+        Args:
+            stream: Clave del flujo
+            readings: Lista de tuplas (doc_id, valor, timestamp) en orden
+            predictions: Lista a la que se agregan los documentos de predicción
+            processed: Diccionario flujo -> IDs procesados que se completa
+        """
+        window = self._window(stream)
+        for doc_id, value, timestamp in readings:
+            window.append(doc_id, value)
+            ready = window.take()
+            while ready:
+                window_readings, fresh = ready
+                predictions.append(self._predict_window(stream, window, window_readings, fresh, timestamp))
+                processed.setdefault(stream, []).extend(doc_id for doc_id, _ in window_readings[len(window_readings) - fresh:])
+                ready = window.take()
+
+    def _write_predictions(self, predictions):
+        if not predictions:
+            return
+        try:
+            self.controller.predictions.bulk_write(
+                [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in predictions],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            failed = len(e.details.get("writeErrors", []))
+            self.totals["write_errors"] += failed
+            logger.error(f"{failed} predicciones no se pudieron guardar: {e.details['writeErrors'][0].get('errmsg')}")
+        self.totals["predictions"] += len(predictions)
+
+    def backfill(self):
+        """
+        Guarda las lecturas con su fecha original y calcula sus predicciones.
+        """
+        controller = self.controller
+        reading_model = controller.reading_model
+        for batch in self._batches(self._records()):
+            started = time.perf_counter()
+            built = []
+            for index, topic, valor, timestamp in batch:
+                document, transformed_message = controller._build_message_document(topic, valor, REPLAY_SOURCE)
+                document["_id"] = _reading_id(timestamp, self.prefix, index)
+                document["timestamp"] = timestamp
+                if transformed_message is not None:
+                    local_time = timestamp.astimezone()
+                    transformed_message["date"] = local_time.strftime("%Y-%m-%d")
+                    transformed_message["time"] = local_time.strftime("%H:%M:%S")
+                built.append((document, transformed_message))
+
+            readings = [document for document, transformed in built if transformed is not None]
+            others = [document for document, transformed in built if transformed is None]
+
+            # Un lote interrumpido antes del punto de control se reintenta sin duplicar:
+            # las lecturas ya guardadas no se insertan (ni se suman a los agregados)
+            # pero sí vuelven a pasar por las ventanas
+            existing = set()
+            if self.resuming:
+                existing = self._existing_ids(readings, reading_model.collection)
+                existing |= self._existing_ids(others, controller.messages)
+                self.resuming = False
+
+            failed = set()
+            for documents, insert in ((readings, reading_model.insert), (others, controller._insert_messages)):
+                pending = [document for document in documents if document["_id"] not in existing]
+                if pending:
+                    failed.update(pending[error["index"]]["_id"] for error in insert(pending))
+            self.totals["write_errors"] += len(failed)
+            readings = [document for document in readings if document["_id"] not in failed]
+            inserted = [
+                document for document in readings + others
+                if document["_id"] not in failed and document["_id"] not in existing
+            ]
+            self.totals["stored"] += len(inserted) + len(existing)
+            self.totals["read"] += len(batch)
+
+            if inserted:
+                controller.rollup_model.record([
+                    (document["timestamp"], document["valor"])
+                    for document in inserted if "stream" in document
+                ])
+                controller.stats_model.record_messages(inserted)
+
+            # Ventanas de cada flujo, en el orden del archivo
+            by_stream = {}
+            for document in readings:
+                by_stream.setdefault(document["stream"], []).append(
+                    (document["_id"], document["valor"], document["timestamp"])
+                )
+            predictions = []
+            processed = {}
+            for stream, stream_readings in by_stream.items():
+                self._feed(stream, stream_readings, predictions, processed)
+
+            self._write_predictions(predictions)
+            for stream, doc_ids in processed.items():
+                reading_model.set_processed(doc_ids, stream)
+
+            self.offset = batch[-1][0] + 1
+            self._save_checkpoint(mode="backfill")
+            logger.info(
+                f"Partición {self.partition}: lote de {len(batch)} lecturas y {len(predictions)} "
+                f"predicciones en {time.perf_counter() - started:.2f}s"
+            )
+
+    def live(self):
+        """
+        Envía las lecturas por la ingesta normal respetando sus intervalos comprimidos.
+        """
+        speed = self.options["speed"]
+        started = time.monotonic()
+        batch = []
+
+        def flush():
+            inserted_ids, write_errors = self.controller.ingest_messages(
+                [(topic, valor) for _, topic, valor, _ in batch], source=REPLAY_SOURCE
+            )
+            self.totals["read"] += len(batch)
+            self.totals["stored"] += len(inserted_ids)
+            self.totals["write_errors"] += len(write_errors)
+            self.offset = batch[-1][0] + 1
+            self._save_checkpoint(mode="live")
+            batch.clear()
+
+        for record in self._records():
+            if speed > 0:
+                # Referencia común a todas las particiones: la primera lectura de los archivos
+                delay = (record[3] - self.first_time).total_seconds() / speed - (time.monotonic() - started)
+                if delay > 0:
+                    # Guardar lo acumulado antes de esperar a la siguiente lectura
+                    if batch:
+                        flush()
+                    time.sleep(delay)
+            batch.append(record)
+            if len(batch) >= self.options["batch_size"]:
+                flush()
+        if batch:
+            flush()
+
+    def rebuild(self):
+        """
+        Recalcula las predicciones de las lecturas guardadas de los flujos de la partición.
+        """
+        reading_model = self.controller.reading_model
+        streams = [
+            stream for stream in reading_model.streams()
+            if _partition_of(stream, self.partitions) == self.partition
+            and (not self.options["streams"] or stream in self.options["streams"])
+        ]
+        if self.options["replace"] and not self.resuming and streams:
+            deleted = self.controller.predictions.delete_many({"stream": {"$in": streams}}).deleted_count
+            logger.info(f"Partición {self.partition}: {deleted} predicciones anteriores eliminadas")
+            self._save_checkpoint(mode="rebuild")
+
+        checkpoint = self.checkpoints.find_one({"_id": self.checkpoint_id}) or {}
+        for stream in streams:
+            if stream in self.done_streams:
+                continue
+            after_id = checkpoint.get("after_id") if checkpoint.get("stream") == stream else None
+            while True:
+                started = time.perf_counter()
+                readings = reading_model.readings_after(stream, after_id, self.options["batch_size"])
+                if not readings:
+                    break
+                predictions = []
+                self._feed(stream, readings, predictions, {})
+                self._write_predictions(predictions)
+                self.totals["read"] += len(readings)
+                after_id = readings[-1][0]
+                self._save_checkpoint(mode="rebuild", stream=stream, after_id=after_id)
+                logger.info(
+                    f"Partición {self.partition}: {len(readings)} lecturas de {stream} y "
+                    f"{len(predictions)} predicciones en {time.perf_counter() - started:.2f}s"
+                )
+            self.windows.pop(stream, None)
+            self.done_streams.append(stream)
+            self._save_checkpoint(mode="rebuild", stream=None, after_id=None)
+
+def _run_partition(options, partition, source=None):
+    """
+    Ejecuta una partición con su propia conexión y su controlador.
+
+    Args:
+        options: Diccionario con las opciones de la línea de comandos
+        partition: Número de la partición
+        source: Iterable de envíos (first_time, records) del lector (salvo en rebuild)
+
+    Returns:
+        dict: Totales de la partición
+    """
+    from utils.mqtt_client import MQTTClient
+    from controllers.mqtt_controller import MQTTController
+
+    client, db, _ = get_database_connection()
+    mqtt_client = None
+    controller = None
+    try:
+        # Solo la reproducción en vivo publica notificaciones y alertas
+        if options["mode"] == "live":
+            mqtt_client = MQTTClient(
+                broker_host=settings.MQTT_BROKER_HOST,
+                broker_port=settings.MQTT_BROKER_PORT,
+                client_id=f"replay_{os.getpid()}",
+                qos=settings.MQTT_PUBLISH_QOS,
+                buffer_size=settings.MQTT_PUBLISH_BUFFER_SIZE
+            )
+        controller = MQTTController(db, mqtt_client=mqtt_client)
+        replay = ReplayPartition(db, controller, options, partition, source)
+        getattr(replay, options["mode"])()
+        return replay.totals
+    finally:
+        if controller:
+            controller.prediction_worker.stop()
+            controller.flush_writes()
+        if mqtt_client:
+            mqtt_client.close()
+        close_connection(client)
+
+def _queued_chunks(chunks):
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        yield chunk
+
+def _partition_process(options, partition, chunks, results):
+    """
+    Proceso de una partición: consume los envíos del lector y devuelve sus totales.
+    """
+    source = _queued_chunks(chunks) if chunks is not None else None
+    try:
+        results.put((partition, _run_partition(options, partition, source)))
+    except Exception:
+        logger.exception(f"La partición {partition} falló")
+        raise
+
+def _put(chunks, item, process, partition):
+    # Si la partición terminó, su cola no se vaciará nunca
+    while True:
+        try:
+            chunks.put(item, timeout=1)
+            return
+        except queue.Full:
+            if not process.is_alive():
+                raise SystemExit(f"La partición {partition} terminó de forma inesperada")
+
+def _run_partitions(options, chunks):
+    """
+    Ejecuta las particiones en procesos aparte y les reparte los registros.
+
+    Args:
+        options: Diccionario con las opciones de la línea de comandos
+        chunks: Iterable de (partition, first_time, records) del lector, o None en rebuild
+
+    Returns:
+        list: Totales de cada partición
+    """
+    partitions = options["partitions"]
+    if partitions == 1:
+        source = ((first_time, records) for _, first_time, records in chunks) if chunks is not None else None
+        return [_run_partition(options, 0, source)]
+
+    # spawn: los procesos no heredan la conexión a MongoDB del lector
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    queues = [context.Queue(maxsize=MAX_PENDING_CHUNKS) if chunks is not None else None for _ in range(partitions)]
+    processes = [
+        context.Process(target=_partition_process, args=(options, partition, queues[partition], results))
+        for partition in range(partitions)
+    ]
+    for process in processes:
+        process.start()
+    totals = {}
+    try:
+        if chunks is not None:
+            for partition, first_time, records in chunks:
+                _put(queues[partition], (first_time, records), processes[partition], partition)
+            for partition, chunk_queue in enumerate(queues):
+                _put(chunk_queue, None, processes[partition], partition)
+
+        while len(totals) < partitions:
+            try:
+                partition, result = results.get(timeout=1)
+                totals[partition] = result
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes) and results.empty():
+                    break
+    except BaseException:
+        # Sin el lector las demás particiones esperarían registros para siempre
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    failed = [str(partition) for partition in range(partitions) if partition not in totals]
+    if failed:
+        raise SystemExit(f"Particiones con errores: {', '.join(failed)}")
+    return [totals[partition] for partition in range(partitions)]
+
+def replay(options):
+    """
+    Ejecuta la reproducción repartiendo los flujos entre particiones.
+
+    Args:
+        options: Diccionario con las opciones de la línea de comandos
+
+    Returns:
+        dict: Totales sumados de todas las particiones
+    """
+    client, db, _ = get_database_connection()
+    try:
+        checkpoints = db.migrations
+        job_id = _checkpoint_id(options["job"])
+        if options["reset"]:
+            checkpoints.delete_many({"_id": {"$regex": f"^{re.escape(job_id)}(:|$)"}})
+
+        # Los puntos de control son por partición: no se puede reanudar con otra cantidad
+        job = checkpoints.find_one({"_id": job_id})
+        if job and job.get("partitions") != options["partitions"]:
+            raise SystemExit(
+                f"El trabajo {options['job']} se inició con {job.get('partitions')} particiones; "
+                f"use --partitions {job.get('partitions')} o --reset"
+            )
+        if job:
+            print(f"▶️ Reanudando el trabajo {options['job']}")
+        checkpoints.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "mode": options["mode"],
+                "files": options["files"],
+                "partitions": options["partitions"],
+                "updated_at": datetime.datetime.now(datetime.timezone.utc)
+            }},
+            upsert=True
+        )
+
+        # Punto de partida de cada partición y registros inválidos ya contados
+        offsets = [
+            (checkpoints.find_one({"_id": _checkpoint_id(options["job"], partition)}) or {}).get("offset", 0)
+            for partition in range(options["partitions"])
+        ]
+        reader_state = {"rejected": (job or {}).get("rejected", 0), "counted": (job or {}).get("counted", 0)}
+
+        def chunks():
+            for chunk in _chunks(options, offsets, reader_state):
+                yield chunk
+                checkpoints.update_one({"_id": job_id}, {"$set": reader_state})
+            checkpoints.update_one({"_id": job_id}, {"$set": reader_state})
+
+        started = time.perf_counter()
+        results = _run_partitions(options, chunks() if options["mode"] != "rebuild" else None)
+    finally:
+        close_connection(client)
+
+    totals = {"rejected": reader_state["rejected"]}
+    for result in results:
+        for key, value in result.items():
+            totals[key] = totals.get(key, 0) + value
+    elapsed = time.perf_counter() - started
+    rate = totals.get("read", 0) / elapsed if elapsed else 0
+    print(
+        f"✅ Reproducción completada en {elapsed:.1f}s ({rate:.0f} lecturas/s): "
+        f"{totals.get('read', 0)} leídas, {totals.get('stored', 0)} guardadas, "
+        f"{totals.get('rejected', 0)} inválidas, {totals.get('write_errors', 0)} errores de escritura, "
+        f"{totals.get('predictions', 0)} predicciones"
+    )
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Reproduce lecturas históricas de temperatura o reconstruye sus predicciones"
+    )
+    parser.add_argument("files", nargs="*", help="Archivos CSV o JSONL de lecturas")
+    parser.add_argument("--mode", choices=REPLAY_MODES, default="backfill", help="Modo de reproducción")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Formato de los archivos (por defecto, según la extensión)")
+    parser.add_argument("--speed", type=float, default=0, help="Compresión del tiempo en modo live (60 = un minuto por segundo; 0 = sin esperas)")
+    parser.add_argument("--partitions", type=int, default=1, help="Procesos en paralelo (los flujos se reparten entre ellos)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Lecturas por lote")
+    parser.add_argument("--job", help="Nombre del trabajo para el punto de control (por defecto, según los archivos)")
+    parser.add_argument("--stream", action="append", dest="streams", help="Flujo a reconstruir en modo rebuild (repetible)")
+    parser.add_argument("--replace", action="store_true", help="En modo rebuild, eliminar antes las predicciones de los flujos")
+    parser.add_argument("--reset", action="store_true", help="Ignorar los puntos de control y empezar desde el principio")
+    args = parser.parse_args()
+
+    if args.mode != "rebuild" and not args.files:
+        parser.error("Indique al menos un archivo de lecturas")
+    if args.partitions < 1 or args.batch_size < 1:
+        parser.error("--partitions y --batch-size deben ser mayores que 0")
+
+    options = vars(args)
+    options["files"] = [os.path.abspath(path) for path in args.files]
+    if not options["job"]:
+        names = "+".join(os.path.basename(path) for path in args.files) or "predicciones"
+        options["job"] = f"{args.mode}:{names}"
+    replay(options)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Política de reenvío de las lecturas de temperatura a sistema/notificaciones.
+"""
+
+import threading
+import time
+
+# Modos de reenvío disponibles
+REPUBLISH_MODES = ("all", "every_n", "delta", "interval")
+
+class RepublishPolicy:
+    """
+    Decide qué lecturas de cada flujo se reenvían a sistema/notificaciones.
+
+    Modos:
+        - all: se reenvía cada lectura (comportamiento original)
+        - every_n: una de cada `every_n` lecturas
+        - delta: solo si la temperatura cambió al menos `delta` grados respecto
+          a la última reenviada
+        - interval: como mucho una lectura cada `interval_seconds`
+
+    Las lecturas no reenviadas se acumulan y el siguiente mensaje incluye el
+    mínimo, el máximo, el promedio y la cantidad de lecturas que resume.
+    Solo afecta al reenvío: todas las lecturas se siguen guardando.
+    """
+
+    def __init__(self, mode="all", every_n=10, delta=0.5, interval_seconds=60):
+        """
+        Inicializa la política.
+
+        Args:
+            mode: Modo de reenvío (all, every_n, delta o interval)
+            every_n: Lecturas por mensaje en modo every_n
+            delta: Cambio mínimo en grados en modo delta
+            interval_seconds: Segundos mínimos entre mensajes en modo interval
+        """
+        if mode not in REPUBLISH_MODES:
+            raise ValueError(f"Modo de reenvío inválido: {mode}. Use {', '.join(REPUBLISH_MODES)}")
+        self.mode = mode
+        self.every_n = max(1, every_n)
+        self.delta = delta
+        self.interval_seconds = interval_seconds
+        self._streams = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.suppressed = 0
+
+    def offer(self, stream, temperature, transformed_message):
+        """
+        Registra una lectura y decide si se reenvía.
+
+        Args:
+            stream: Clave del flujo (ubicación/sensor)
+            temperature: Valor de la temperatura
+            transformed_message: Mensaje transformado de la lectura
+
+        Returns:
+            dict: Mensaje a publicar (con los agregados si resume varias
+                lecturas) o None si la lectura no se reenvía
+        """
+        if self.mode == "all":
+            with self._lock:
+                self.published += 1
+            return transformed_message
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._streams.get(stream)
+            if state is None:
+                state = self._streams[stream] = {
+                    "count": 0, "min": None, "max": None, "sum": 0.0,
+                    "last_value": None, "last_time": None
+                }
+
+            state["count"] += 1
+            state["sum"] += temperature
+            state["min"] = temperature if state["min"] is None else min(state["min"], temperature)
+            state["max"] = temperature if state["max"] is None else max(state["max"], temperature)
+
+            if self.mode == "every_n":
+                publish = state["count"] >= self.every_n
+            elif self.mode == "delta":
+                publish = state["last_value"] is None or abs(temperature - state["last_value"]) >= self.delta
+            else:
+                publish = state["last_time"] is None or now - state["last_time"] >= self.interval_seconds
+
+            if not publish:
+                self.suppressed += 1
+                return None
+
+            message = dict(transformed_message)
+            message.update({
+                "min": str(round(state["min"], 2)),
+                "max": str(round(state["max"], 2)),
+                "avg": str(round(state["sum"] / state["count"], 2)),
+                "count": str(state["count"])
+            })
+            state.update(count=0, min=None, max=None, sum=0.0, last_value=temperature, last_time=now)
+            self.published += 1
+            return message
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas de reenvío.
+
+        Returns:
+            dict: Modo, mensajes reenviados y lecturas retenidas
+        """
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "published": self.published,
+                "suppressed": self.suppressed
+            }
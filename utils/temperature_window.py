@@ -0,0 +1,123 @@
+"""
+Ventana en memoria de lecturas de temperatura pendientes de procesar.
+"""
+
+from collections import deque
+import threading
+
+class TemperatureWindow:
+    """
+    Buffer de lecturas (id, valor) que alimenta las predicciones del modelo.
+
+    Evita consultar MongoDB en cada mensaje: se siembra una vez al iniciar
+    y después solo se agregan las lecturas a medida que se guardan.
+
+    Admite dos modos:
+        - Ventanas consecutivas (stride=None): cada lectura se usa en una sola
+          ventana y se extrae al tomarla.
+        - Ventana deslizante (stride=N): se conservan las últimas `size`
+          lecturas y se emite una ventana cada N lecturas nuevas; las lecturas
+          compartidas entre ventanas no se vuelven a leer de MongoDB.
+    """
+
+    def __init__(self, size=60, stride=None):
+        """
+        Inicializa la ventana.
+
+        Args:
+            size: Número de lecturas necesarias para una predicción
+            stride: Lecturas nuevas entre predicciones en modo deslizante (opcional)
+        """
+        self.size = size
+        self.stride = stride
+        self._readings = deque(maxlen=size) if stride else deque()
+        # Lecturas agregadas que todavía no han formado parte de una ventana emitida
+        self._fresh = 0
+        self._lock = threading.Lock()
+
+    @property
+    def sliding(self):
+        return self.stride is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._fresh if self.sliding else len(self._readings)
+
+    def seed(self, readings, fresh=None):
+        """
+        Reemplaza el contenido de la ventana con lecturas ya guardadas.
+
+        Args:
+            readings: Iterable de tuplas (doc_id, valor) en orden cronológico
+            fresh: En modo deslizante, cuántas de las últimas lecturas no se
+                han usado aún en una predicción (por defecto, todas)
+        """
+        with self._lock:
+            self._readings = deque(readings, maxlen=self.size) if self.sliding else deque(readings)
+            self._fresh = len(self._readings) if fresh is None else min(fresh, len(self._readings))
+
+    def snapshot(self):
+        """
+        Obtiene el contenido de la ventana para restaurarlo después con seed().
+
+        Returns:
+            tuple: (readings, fresh) con la lista de tuplas (doc_id, valor) y
+                el número de lecturas finales aún no usadas en una ventana
+        """
+        with self._lock:
+            return list(self._readings), self._fresh
+
+    def append(self, doc_id, value):
+        """
+        Agrega una lectura al final de la ventana.
+
+        Args:
+            doc_id: ID del documento en mqtt_messages
+            value: Valor de temperatura
+        """
+        with self._lock:
+            self._readings.append((doc_id, value))
+            self._fresh = min(self._fresh + 1, len(self._readings)) if self.sliding else len(self._readings)
+
+    def take(self):
+        """
+        Obtiene la siguiente ventana si está lista.
+
+        Returns:
+            tuple: (readings, fresh) donde readings es la lista de `size` tuplas
+                (doc_id, valor) y fresh el número de lecturas finales que no
+                habían formado parte de otra ventana; o None si no hay ventana
+        """
+        with self._lock:
+            if len(self._readings) < self.size:
+                return None
+
+            if self.sliding:
+                if self._fresh < self.stride:
+                    return None
+                fresh = self._fresh
+                self._fresh = 0
+                return list(self._readings), fresh
+
+            readings = [self._readings.popleft() for _ in range(self.size)]
+            self._fresh = len(self._readings)
+            return readings, self.size
+
+    def restore(self, readings, fresh, exclude=()):
+        """
+        Devuelve a la ventana lecturas tomadas que no se procesaron.
+
+        Args:
+            readings: Lista de tuplas (doc_id, valor) devuelta por take()
+            fresh: Número de lecturas nuevas devuelto por take()
+            exclude: IDs que otra instancia ya procesó y no deben reintentarse
+        """
+        exclude = set(exclude)
+        with self._lock:
+            if self.sliding:
+                # Las lecturas siguen en la ventana: solo vuelven a contar como nuevas
+                retry = sum(1 for doc_id, _ in readings[len(readings) - fresh:] if doc_id not in exclude)
+                self._fresh = min(self._fresh + retry, len(self._readings))
+            else:
+                self._readings.extendleft(reversed([r for r in readings if r[0] not in exclude]))
+                self._fresh = len(self._readings)
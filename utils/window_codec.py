@@ -0,0 +1,86 @@
+"""
+Codificación compacta de las ventanas de temperatura guardadas en predicciones.
+"""
+
+import base64
+import struct
+from bson import ObjectId
+from bson.binary import Binary
+
+# Formato de los valores empaquetados: float32 little-endian
+ENCODING = "float32-le"
+
+def pack_values(values):
+    """
+    Empaqueta una lista de valores como float32 en un Binary de BSON.
+
+    Ocupa 4 bytes por valor frente a los ~12 de cada elemento de un
+    arreglo BSON de doubles (tipo, índice como clave y valor).
+
+    Args:
+        values: Lista de números
+
+    Returns:
+        Binary: Valores empaquetados
+    """
+    return Binary(struct.pack(f"<{len(values)}f", *values))
+
+def unpack_values(data):
+    """
+    Desempaqueta los valores guardados con pack_values.
+
+    Los valores se redondean a 7 cifras significativas (la precisión de
+    float32) para devolver 20.1 en lugar de 20.100000381469727.
+
+    Args:
+        data: Bytes o Binary con los valores empaquetados
+
+    Returns:
+        list: Lista de floats
+    """
+    data = bytes(data)
+    return [float(f"{value:.7g}") for value in struct.unpack(f"<{len(data) // 4}f", data)]
+
+def pack_ids(doc_ids):
+    """
+    Empaqueta una lista de ObjectId concatenando sus 12 bytes en un Binary de BSON.
+
+    Ocupa 12 bytes por ID frente a los ~30 de cada ID guardado como cadena.
+
+    Args:
+        doc_ids: Lista de ObjectId
+
+    Returns:
+        Binary: IDs empaquetados
+    """
+    return Binary(b"".join(ObjectId(doc_id).binary for doc_id in doc_ids))
+
+def unpack_ids(data):
+    """
+    Desempaqueta los IDs guardados con pack_ids.
+
+    Args:
+        data: Bytes o Binary con los IDs empaquetados
+
+    Returns:
+        list: Lista de ObjectId
+    """
+    data = bytes(data)
+    return [ObjectId(data[i:i + 12]) for i in range(0, len(data), 12)]
+
+def encode_values(data):
+    """
+    Representa los valores empaquetados para una respuesta JSON.
+
+    Args:
+        data: Bytes o Binary con los valores empaquetados
+
+    Returns:
+        dict: {"encoding", "count", "data"} con los bytes en base64
+    """
+    data = bytes(data)
+    return {
+        "encoding": ENCODING,
+        "count": len(data) // 4,
+        "data": base64.b64encode(data).decode("ascii")
+    }
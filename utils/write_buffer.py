@@ -0,0 +1,185 @@
+"""
+Buffer de escritura diferida (write-behind) para las inserciones de mensajes.
+"""
+
+import threading
+import time
+import logging
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger("write_buffer")
+
+class WriteBehindBuffer:
+    """
+    Agrupa documentos y los guarda con una sola escritura por lote.
+
+    Los documentos reciben su _id al encolarse, así el llamador puede
+    usarlo de inmediato. Un hilo en segundo plano escribe el lote cuando
+    reúne `max_documents` documentos o cuando el más antiguo lleva
+    `max_delay_ms` esperando. Si MongoDB no está disponible el lote se
+    devuelve a la cola y se reintenta; si la cola llega a `max_pending`
+    el llamador escribe de forma síncrona en lugar de perder lecturas.
+
+    Tras cada escritura se llama a `on_written` con los documentos
+    guardados, para actualizar lo que depende de ellos (estadísticas,
+    agregados) una vez por lote.
+    """
+
+    def __init__(self, write, max_documents=500, max_delay_ms=200, max_pending=50000, name="messages", on_written=None):
+        """
+        Inicializa el buffer e inicia su hilo de escritura.
+
+        Args:
+            write: Función write(documents) que guarda un lote y devuelve
+                los errores de escritura por índice
+            max_documents: Documentos que disparan la escritura del lote
+            max_delay_ms: Milisegundos máximos que un documento espera en el buffer
+            max_pending: Documentos pendientes máximos antes de escribir en el llamador
+            name: Nombre del buffer para los registros
+            on_written: Función on_written(documents) llamada con los
+                documentos de cada lote guardado (opcional)
+        """
+        self.write = write
+        self.max_documents = max_documents
+        self.max_delay = max_delay_ms / 1000
+        self.max_pending = max_pending
+        self.name = name
+        self.on_written = on_written
+        self._pending = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.retries = 0
+
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{name}", daemon=True)
+        self._thread.start()
+
+    def add(self, documents):
+        """
+        Encola documentos para guardarlos en el siguiente lote.
+
+        Args:
+            documents: Lista de documentos; se les asigna el _id si no lo tienen
+
+        Returns:
+            list: IDs de los documentos encolados
+        """
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+
+        with self._condition:
+            # Despertar al hilo con el primer documento (para programar la
+            # espera máxima) y al completar un lote
+            if not self._pending:
+                self._oldest = time.monotonic()
+                self._condition.notify()
+            self._pending.extend(documents)
+            full = len(self._pending) >= self.max_pending
+            if len(self._pending) >= self.max_documents:
+                self._condition.notify()
+
+        # Con la cola llena (MongoDB lento o caído) se frena al productor
+        if full:
+            self.flush()
+        return [document["_id"] for document in documents]
+
+    def _take(self):
+        with self._condition:
+            batch, self._pending = self._pending, []
+            self._oldest = None
+            return batch
+
+    def flush(self):
+        """
+        Guarda de inmediato los documentos pendientes.
+
+        Returns:
+            bool: False si el lote volvió a la cola por un error de conexión
+        """
+        with self._write_lock:
+            batch = self._take()
+            if not batch:
+                return True
+
+            started = time.perf_counter()
+            try:
+                errors = self.write(batch)
+            except PyMongoError as e:
+                # Devolver el lote al inicio de la cola para reintentarlo
+                with self._condition:
+                    self._pending[:0] = batch
+                    self._oldest = time.monotonic()
+                    self.retries += 1
+                logger.error(f"Error al guardar {len(batch)} documentos de {self.name}, se reintentará: {str(e)}")
+                return False
+
+            self.batches += 1
+            self.written += len(batch) - len(errors)
+            if errors:
+                self.failed += len(errors)
+                logger.error(f"{len(errors)} documentos de {self.name} no se pudieron guardar: {errors[0].get('message')}")
+            if self.on_written:
+                failed = {error["index"] for error in errors}
+                try:
+                    self.on_written([document for index, document in enumerate(batch) if index not in failed])
+                except Exception as e:
+                    logger.error(f"Error al procesar el lote guardado de {self.name}: {str(e)}")
+            logger.debug(f"Lote de {len(batch)} documentos de {self.name} guardado en {(time.perf_counter() - started) * 1000:.1f} ms")
+            return True
+
+    def _run(self):
+        """
+        Escribe los lotes al llenarse o al vencer el tiempo máximo de espera.
+        """
+        while True:
+            with self._condition:
+                while not self._closing:
+                    if len(self._pending) >= self.max_documents:
+                        break
+                    if self._pending:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._condition.wait()
+                if self._closing:
+                    return
+
+            if not self.flush():
+                # Esperar antes de reintentar si MongoDB no está disponible
+                time.sleep(1)
+
+    def close(self):
+        """
+        Detiene el hilo de escritura y guarda los documentos pendientes.
+        """
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join(5)
+        if not self.flush():
+            logger.error(f"Se perdieron {len(self._pending)} documentos de {self.name} al cerrar")
+
+    def get_stats(self):
+        """
+        Obtiene las estadísticas del buffer.
+
+        Returns:
+            dict: Documentos pendientes, escritos, fallidos, lotes y reintentos
+        """
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "written": self.written,
+                "failed": self.failed,
+                "batches": self.batches,
+                "retries": self.retries,
+                "max_documents": self.max_documents,
+                "max_delay_ms": int(self.max_delay * 1000)
+            }
@@ -3,7 +3,7 @@ Definición de rutas para la API.
 """
 from flask import redirect
 
-def register_routes(app, image_controller, mqtt_controller=None):
+def register_routes(app, image_controller, mqtt_controller=None, events_controller=None):
     """
     Registra las rutas de la API en la aplicación Flask.
 
@@ -11,6 +11,7 @@ def register_routes(app, image_controller, mqtt_controller=None):
         app: Instancia de la aplicación Flask
         image_controller: Controlador de imágenes
         mqtt_controller: Controlador de MQTT (opcional)
+        events_controller: Controlador del feed de eventos en vivo (opcional)
     """
     
     # Ruta principal - redirige a la documentación Swagger
@@ -63,6 +64,11 @@ def register_routes(app, image_controller, mqtt_controller=None):
         def receive_mqtt_message():
             return mqtt_controller.receive_message()
 
+        # Recibir un lote de mensajes MQTT
+        @app.route('/api/mensajes/batch', methods=['POST'])
+        def receive_mqtt_messages_batch():
+            return mqtt_controller.receive_messages_batch()
+
         # Obtener mensajes MQTT
         @app.route('/api/mensajes', methods=['GET'])
         def get_mqtt_messages():
@@ -73,6 +79,21 @@ def register_routes(app, image_controller, mqtt_controller=None):
         def get_predictions():
             return mqtt_controller.get_predictions()
 
+        # Obtener trabajos de predicción pendientes y terminados
+        @app.route('/api/predicciones/jobs', methods=['GET'])
+        def get_prediction_jobs():
+            return mqtt_controller.get_prediction_jobs()
+
+        # Obtener el estado de un trabajo de predicción
+        @app.route('/api/predicciones/jobs/<job_id>', methods=['GET'])
+        def get_prediction_job(job_id):
+            return mqtt_controller.get_prediction_job(job_id)
+
+        # Obtener estadísticas de temperatura desde los agregados
+        @app.route('/api/temperaturas/stats', methods=['GET'])
+        def get_temperature_stats():
+            return mqtt_controller.get_temperature_stats()
+
         # Procesar datos de temperatura manualmente
         @app.route('/api/procesar-temperaturas', methods=['POST'])
         def process_temperatures_manually():
@@ -93,5 +114,16 @@ def register_routes(app, image_controller, mqtt_controller=None):
         def test_intrusion():
             return mqtt_controller.test_intrusion()
 
+    # ==================== RUTAS PARA EVENTOS EN VIVO ====================
 
+    # Registrar rutas del feed de eventos solo si el controlador está disponible
+    if events_controller:
+        # Feed de lecturas, predicciones y detecciones por Server-Sent Events
+        @app.route('/api/eventos', methods=['GET'])
+        def stream_events():
+            return events_controller.stream_events()
 
+        # Estadísticas del feed de eventos
+        @app.route('/api/eventos/stats', methods=['GET'])
+        def get_events_stats():
+            return events_controller.get_stats()